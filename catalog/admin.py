@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Category, Product
+from .models import Category, Product, StockMovement, StockSnapshot
 
 
 @admin.register(Category)
@@ -46,3 +46,36 @@ class ProductAdmin(admin.ModelAdmin):
     @admin.display(description="1 dona foyda")
     def profit_per_unit_display(self, obj):
         return obj.profit_per_unit
+
+
+@admin.register(StockMovement)
+class StockMovementAdmin(admin.ModelAdmin):
+    list_display = ("id", "product", "kind", "quantity", "order", "note", "created_at")
+    list_filter = ("kind",)
+    search_fields = ("product__name", "note")
+    list_select_related = ("product",)
+    raw_id_fields = ("product", "order")
+
+    # Jurnal faqat qo'shiladi: qoldiq bilan mos bo'lishi uchun admin orqali yozilmaydi.
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(StockSnapshot)
+class StockSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("id", "product", "stock", "last_movement_id", "taken_at")
+    search_fields = ("product__name",)
+    list_select_related = ("product",)
+    raw_id_fields = ("product",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
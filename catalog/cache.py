@@ -0,0 +1,158 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from rest_framework import status
+from rest_framework.response import Response
+
+from config.conditional import ConditionalGetMixin
+from .models import CacheVersion
+
+
+CATALOG_VERSION = "catalog"
+HITS_KEY = "catalog:hits"
+MISSES_KEY = "catalog:misses"
+PENDING_BUMPS_ATTR = "_pending_cache_versions"
+
+
+def catalog_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def get_cache_version(name):
+    """
+    Versiya bazadan o'qiladi (bitta PK so'rov): keshning o'zi jarayon ichida bo'lsa ham
+    boshqa worker yoki management buyrug'i qilgan bump hamma joyda ko'rinadi.
+    """
+    version = CacheVersion.objects.filter(pk=name).values_list("version", flat=True).first()
+    if version is None:
+        # Vaqtdan boshlanadi: umumiy keshda oldingi bazadan qolgan yozuvlar bilan to'qnashmasin.
+        record, _ = CacheVersion.objects.get_or_create(
+            pk=name, defaults={"version": int(time.time() * 1000)}
+        )
+        version = record.version
+    return version
+
+
+def _bump(name):
+    # Bitta UPDATE; qator hali yo'q bo'lsa yaratiladi (yangi qiymat - yangi versiya).
+    if not CacheVersion.objects.filter(pk=name).update(version=F("version") + 1):
+        get_cache_version(name)
+
+
+def _flush_cache_versions():
+    for name in sorted(transaction.get_connection().__dict__.pop(PENDING_BUMPS_ATTR, ())):
+        _bump(name)
+
+
+def bump_cache_version(name):
+    """
+    Versiya faqat commitdan keyin oshiriladi: tranzaksiya ichidagi UPDATE versiya qatorini
+    commitgacha qulflab, parallel checkoutlarni ketma-ket qilib qo'yardi. Commitgacha eski
+    versiya ostida keshlangan javob bump dan keyin o'qilmaydi.
+
+    Tranzaksiya davomidagi barcha chaqiruvlar bitta callback ga yig'iladi: checkout yoki
+    bekor qilish kaskadi nechta signal yubormasin, har bir nom uchun bitta UPDATE.
+    """
+    connection = transaction.get_connection()
+    pending = connection.__dict__.get(PENDING_BUMPS_ATTR)
+    # Tranzaksiya (yoki savepoint) bekor qilinsa callback ro'yxatdan o'chadi: qaytadan yoziladi.
+    registered = any(func is _flush_cache_versions for _, func, _ in connection.run_on_commit)
+    if pending is not None and registered:
+        pending.add(name)
+        return
+    connection.__dict__[PENDING_BUMPS_ATTR] = {name}
+    transaction.on_commit(_flush_cache_versions)
+
+
+def get_catalog_version():
+    return get_cache_version(CATALOG_VERSION)
+
+
+def bump_catalog_version():
+    bump_cache_version(CATALOG_VERSION)
+
+
+def request_catalog_version(request):
+    """So'rov davomida bir marta o'qiladi: ETag va kesh kaliti bitta versiyadan olinadi."""
+    version = getattr(request, "_catalog_version", None)
+    if version is None:
+        version = request._catalog_version = get_catalog_version()
+    return version
+
+
+def _incr(key):
+    cache = catalog_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+        return 1
+
+
+def get_cache_stats():
+    cache = catalog_cache()
+    hits = cache.get(HITS_KEY) or 0
+    misses = cache.get(MISSES_KEY) or 0
+    total = hits + misses
+    return {
+        "version": get_catalog_version(),
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": hits / total if total else 0.0,
+    }
+
+
+class CatalogCacheMixin:
+    """list/retrieve javoblarini katalog versiyasi va so'rov parametrlari bo'yicha keshlaydi."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request, **kwargs):
+        raw = "|".join(
+            [
+                request.get_host(),
+                self.basename,
+                self.action,
+                str(sorted(kwargs.items())),
+                str(sorted(request.query_params.lists())),
+                request.accepted_renderer.format,
+            ]
+        )
+        digest = hashlib.md5(raw.encode("utf-8")).hexdigest()
+        return f"catalog:{request_catalog_version(request)}:{digest}"
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        cache = catalog_cache()
+        key = self.get_cache_key(request, **kwargs)
+        data = cache.get(key)
+        if data is not None:
+            _incr(HITS_KEY)
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        _incr(MISSES_KEY)
+        response = handler(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class CatalogConditionalGetMixin(ConditionalGetMixin):
+    """
+    ETag bazadagi katalog versiyasidan olinadi: 304 uchun bitta PK so'rov, sahifa va
+    serializer yo'q. Boshqa worker yoki buyruq qilgan yozuv ham ETag ni o'zgartiradi.
+    """
+
+    def get_conditional_version(self, request):
+        return request_catalog_version(request)
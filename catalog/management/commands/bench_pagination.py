@@ -0,0 +1,96 @@
+from statistics import median
+from time import perf_counter
+from urllib.parse import parse_qs, urlsplit
+
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from catalog.models import Category, Product
+from config.pagination import KeysetCursor, KeysetPagination
+
+
+class Command(BaseCommand):
+    help = (
+        "Keyset va OFFSET paginatsiyasini turli chuqurlikdagi sahifalarda solishtiradi. "
+        "--seed berilsa, joriy bazaga sintetik mahsulotlar qo'shiladi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Qo'shiladigan mahsulotlar soni")
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options["seed"]:
+            self._seed(options["seed"])
+
+        page_size = options["page_size"]
+        repeat = options["repeat"]
+        queryset = Product.objects.filter(is_active=True).select_related("category")
+        total = queryset.count()
+        if total <= page_size:
+            self.stdout.write("Benchmark uchun mahsulotlar yetarli emas (--seed ishlating).")
+            return
+
+        self.stdout.write(f"{total} ta mahsulot, sahifa hajmi {page_size}")
+        self.stdout.write(f"{'sahifa':>10} {'keyset ms':>12} {'offset ms':>12}")
+
+        page = 1
+        last_page = total // page_size
+        while page <= last_page:
+            offset = (page - 1) * page_size
+            cursor = self._cursor_before(queryset, offset)
+            keyset_ms = self._time(
+                lambda: self._keyset_page(queryset, cursor, page_size), repeat
+            )
+            offset_ms = self._time(
+                lambda: list(queryset.order_by("-id")[offset : offset + page_size]), repeat
+            )
+            self.stdout.write(f"{page:>10} {keyset_ms:>12.2f} {offset_ms:>12.2f}")
+            page *= 10
+
+    def _cursor_before(self, queryset, offset):
+        if offset == 0:
+            return None
+        # Oldingi sahifaning oxirgi qatori; o'lchovdan tashqarida olinadi.
+        pk = queryset.order_by("-id").values_list("id", flat=True)[offset - 1]
+        paginator = KeysetPagination()
+        paginator.base_url = "/"
+        url = paginator.encode_cursor(KeysetCursor(reverse=False, position=pk, pk=pk))
+        return parse_qs(urlsplit(url).query)[paginator.cursor_query_param][0]
+
+    def _keyset_page(self, queryset, cursor, page_size):
+        params = {"page_size": page_size}
+        if cursor is not None:
+            params["cursor"] = cursor
+        request = Request(APIRequestFactory().get("/api/products/", params))
+        return KeysetPagination().paginate_queryset(queryset, request)
+
+    def _time(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = perf_counter()
+            func()
+            samples.append((perf_counter() - started) * 1000)
+        return median(samples)
+
+    def _seed(self, count, batch_size=5000):
+        category, _ = Category.objects.get_or_create(
+            slug="bench-pagination", defaults={"name": "Bench pagination"}
+        )
+        created = 0
+        while created < count:
+            size = min(batch_size, count - created)
+            Product.objects.bulk_create(
+                Product(
+                    name=f"Bench product {created + index}",
+                    price=100 + (created + index) % 1000,
+                    stock=10,
+                    total_stock_in=10,
+                    category=category,
+                )
+                for index in range(size)
+            )
+            created += size
+        self.stdout.write(f"{count} ta mahsulot qo'shildi.")
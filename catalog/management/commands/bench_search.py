@@ -0,0 +1,44 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from catalog.models import Product
+from catalog.search import get_search_backend, search_tokens
+
+
+class Command(BaseCommand):
+    help = "To'liq matnli qidiruvni eski LIKE '%term%' qidiruvi bilan solishtiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("terms", nargs="+", help="Qidiruv so'zlari")
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        queryset = Product.objects.filter(is_active=True).select_related("category")
+        page_size = options["page_size"]
+
+        self.stdout.write(f"{queryset.count()} ta mahsulot, backend: {type(backend).__name__}")
+        self.stdout.write(f"{'so`z':>20} {'indeks ms':>12} {'LIKE ms':>12}")
+        for term in options["terms"]:
+            tokens = search_tokens(term)
+            like = Q(name__icontains=term) | Q(description__icontains=term)
+            indexed_ms = self._time(
+                lambda: list(backend.search(queryset, tokens)[:page_size]), options["repeat"]
+            )
+            like_ms = self._time(
+                lambda: list(queryset.filter(like).order_by("-id")[:page_size]),
+                options["repeat"],
+            )
+            self.stdout.write(f"{term:>20} {indexed_ms:>12.2f} {like_ms:>12.2f}")
+
+    def _time(self, func, repeat):
+        samples = []
+        for _ in range(repeat):
+            started = perf_counter()
+            func()
+            samples.append((perf_counter() - started) * 1000)
+        return median(samples)
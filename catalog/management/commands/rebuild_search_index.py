@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from catalog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = (
+        "Mahsulotlar qidiruv indeksini qaytadan quradi "
+        "(bulk_create/update bilan kiritilgan qatorlar uchun)."
+    )
+
+    def handle(self, *args, **options):
+        get_search_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS("Qidiruv indeksi yangilandi."))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.models import Product
+from catalog.stock import stock_levels, take_snapshots
+
+
+class Command(BaseCommand):
+    help = "Ombor harakatlari jurnali bo'yicha mahsulot qoldiqlarining navbatdagi suratini oladi."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Jurnal bo'yicha qoldiqni Product.stock bilan solishtirish.",
+        )
+
+    def handle(self, *args, **options):
+        created = take_snapshots()
+        self.stdout.write(f"{created} ta mahsulot uchun surat olindi.")
+        if not options["verify"]:
+            return
+
+        levels = stock_levels()
+        mismatched = [
+            (product_id, stock, levels.get(product_id, 0))
+            for product_id, stock in Product.objects.values_list("pk", "stock").iterator()
+            if stock != levels.get(product_id, 0)
+        ]
+        if not mismatched:
+            self.stdout.write("Jurnal Product.stock bilan mos.")
+            return
+        for product_id, stock, ledger in mismatched[:20]:
+            self.stderr.write(f"  #{product_id}: Product.stock={stock}, jurnal={ledger}")
+        raise CommandError(f"Mos kelmagan mahsulotlar: {len(mismatched)}.")
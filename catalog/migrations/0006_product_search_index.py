@@ -0,0 +1,69 @@
+# Generated by Django 6.0 on 2026-10-17 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+SEARCH_INDEX_SQL = {
+    "sqlite": (
+        [
+            "CREATE VIRTUAL TABLE catalog_product_fts USING fts5("
+            "name, description, tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+            "INSERT INTO catalog_product_fts(catalog_product_fts, rank) "
+            "VALUES('rank', 'bm25(10.0, 1.0)')",
+            "INSERT INTO catalog_product_fts(rowid, name, description) "
+            "SELECT id, name, description FROM catalog_product",
+        ],
+        ["DROP TABLE IF EXISTS catalog_product_fts"],
+    ),
+    "postgresql": (
+        [
+            "ALTER TABLE catalog_product ADD COLUMN search_vector tsvector "
+            "GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce(description, '')), 'B')"
+            ") STORED",
+            "CREATE INDEX catalog_product_search_vector_gin "
+            "ON catalog_product USING GIN (search_vector)",
+        ],
+        [
+            "DROP INDEX IF EXISTS catalog_product_search_vector_gin",
+            "ALTER TABLE catalog_product DROP COLUMN IF EXISTS search_vector",
+        ],
+    ),
+}
+
+
+def create_search_index(apps, schema_editor):
+    forward, _ = SEARCH_INDEX_SQL.get(schema_editor.connection.vendor, ([], []))
+    for statement in forward:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    _, backward = SEARCH_INDEX_SQL.get(schema_editor.connection.vendor, ([], []))
+    for statement in backward:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_product_volume_product_weight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='catalog.product')),
+                ('document', models.TextField(db_column='catalog_product_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'catalog_product_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0 on 2026-10-17 17:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def seed_opening_balances(apps, schema_editor):
+    """Mavjud hisoblagichlardan boshlang'ich jurnal: kirim, sotuv va qoldiqqa tuzatish."""
+    Product = apps.get_model("catalog", "Product")
+    StockMovement = apps.get_model("catalog", "StockMovement")
+    note = "Boshlang'ich qoldiq"
+
+    def movements():
+        for product_id, stock, stock_in, stock_out in Product.objects.values_list(
+            "pk", "stock", "total_stock_in", "total_stock_out"
+        ).iterator(chunk_size=2000):
+            adjustment = stock - (stock_in - stock_out)
+            for kind, quantity in (("receipt", stock_in), ("sale", -stock_out), ("adjustment", adjustment)):
+                if quantity:
+                    yield StockMovement(product_id=product_id, kind=kind, quantity=quantity, note=note)
+
+    batch = []
+    for movement in movements():
+        batch.append(movement)
+        if len(batch) >= 2000:
+            StockMovement.objects.bulk_create(batch)
+            batch = []
+    StockMovement.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_category_updated_at_product_updated_at'),
+        ('orders', '0009_hourlysales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovement',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('receipt', 'Kirim'), ('sale', 'Sotuv'), ('cancel', 'Bekor qilish'), ('adjustment', 'Tuzatish')], max_length=20)),
+                ('quantity', models.IntegerField()),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='orders.order')),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_movements', to='catalog.product')),
+            ],
+            options={
+                'verbose_name': 'Ombor harakati',
+                'verbose_name_plural': 'Ombor harakatlari',
+                'indexes': [models.Index(fields=['product', 'id'], name='catalog_movement_product_id')],
+            },
+        ),
+        migrations.CreateModel(
+            name='StockSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField()),
+                ('last_movement_id', models.BigIntegerField()),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stock_snapshots', to='catalog.product')),
+            ],
+            options={
+                'verbose_name': "Ombor qoldig'i surati",
+                'verbose_name_plural': "Ombor qoldig'i suratlari",
+                'constraints': [models.UniqueConstraint(fields=('product', 'last_movement_id'), name='catalog_snapshot_product_movement')],
+            },
+        ),
+        migrations.RunPython(seed_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-17 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_stock_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'price'], name='catalog_product_active_cat'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['price'], name='catalog_product_active_price'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField()),
+            ],
+        ),
+    ]
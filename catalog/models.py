@@ -1,12 +1,14 @@
 from decimal import Decimal
 
 from django.db import models
+from django.utils import timezone
 from django.utils.text import slugify
 
 
 class Category(models.Model):
     name = models.CharField(max_length=120, unique=True)
     slug = models.SlugField(max_length=120, unique=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
 
 
@@ -40,6 +42,22 @@ class Product(models.Model):
         verbose_name="Hajm (kub metr)",
         help_text="Mahsulotning hajmi kub metrda"
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Katalog faqat faol mahsulotlarni o'qiydi: qisman indekslar nofaollarni saqlamaydi.
+        indexes = [
+            models.Index(
+                fields=["category", "price"],
+                condition=models.Q(is_active=True),
+                name="catalog_product_active_cat",
+            ),
+            models.Index(
+                fields=["price"],
+                condition=models.Q(is_active=True),
+                name="catalog_product_active_price",
+            ),
+        ]
 
     @property
     def profit_per_unit(self):
@@ -49,26 +67,126 @@ class Product(models.Model):
     def total_profit(self):
         return Decimal(self.total_stock_out) * self.profit_per_unit
 
-    def save(self, *args, **kwargs):
-        previous_stock = None
-        stock_increased = False
-        if self.pk:
-            previous_stock = (
-                Product.objects.filter(pk=self.pk).values_list("stock", flat=True).first()
-            )
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Bazadan o'qilgan stock/narx: signallar o'zgarishni qayta SELECT qilmasdan biladi.
+        instance._loaded_stock = instance.__dict__.get("stock")
+        instance._loaded_price = instance.__dict__.get("price")
+        return instance
 
-        if previous_stock is None:
+    def save(self, *args, **kwargs):
+        # Kirim/chiqim jurnalga yoziladi (catalog.signals): bu yerda bazadan o'qish yo'q.
+        update_fields = kwargs.get("update_fields")
+        stock_in = 0
+        if self._state.adding:
             if self.total_stock_in == 0:
                 self.total_stock_in = self.stock
-                stock_increased = True
-        elif self.stock > previous_stock:
-            self.total_stock_in += self.stock - previous_stock
-            stock_increased = True
+        elif update_fields is None or "stock" in update_fields:
+            loaded_stock = getattr(self, "_loaded_stock", None)
+            if loaded_stock is not None and self.stock > loaded_stock:
+                stock_in = self.stock - loaded_stock
 
-        if stock_increased and kwargs.get("update_fields") is not None:
-            kwargs["update_fields"] = set(kwargs["update_fields"]) | {"total_stock_in"}
+        counted = self.total_stock_in
+        if stock_in:
+            # Qo'lda oshirilgan qoldiq ham kirim: hisoblagich shu UPDATE da bazadagi qiymatdan oshadi.
+            self.total_stock_in = models.F("total_stock_in") + stock_in
 
-        super().save(*args, **kwargs)
+        if update_fields is not None:
+            extra_fields = {"updated_at", "total_stock_in"} if stock_in else {"updated_at"}
+            kwargs["update_fields"] = set(update_fields) | extra_fields
+
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.total_stock_in = counted
+            raise
+        self.total_stock_in = counted + stock_in
 
     def __str__(self):
         return self.name
+
+
+class ProductSearchDocument(models.Model):
+    """SQLite FTS5 indeksidagi qator (catalog_product_fts). Faqat qidiruv uchun o'qiladi."""
+
+    product = models.OneToOneField(
+        Product,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_document",
+        on_delete=models.DO_NOTHING,
+    )
+    # FTS5 jadval nomi bilan bir xil yashirin ustun: MATCH shu ustun orqali yoziladi.
+    document = models.TextField(db_column="catalog_product_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "catalog_product_fts"
+
+
+class StockMovement(models.Model):
+    """
+    Ombor harakatlari jurnali: faqat qo'shiladi, hech qachon o'zgartirilmaydi.
+    `quantity` ishorali: kirim musbat, chiqim manfiy. Mahsulot qoldig'i - barcha harakatlar yig'indisi.
+    """
+
+    class Kind(models.TextChoices):
+        RECEIPT = "receipt", "Kirim"
+        SALE = "sale", "Sotuv"
+        CANCEL = "cancel", "Bekor qilish"
+        ADJUSTMENT = "adjustment", "Tuzatish"
+
+    product = models.ForeignKey(Product, related_name="stock_movements", on_delete=models.CASCADE)
+    kind = models.CharField(max_length=20, choices=Kind.choices)
+    quantity = models.IntegerField()
+    order = models.ForeignKey(
+        "orders.Order",
+        null=True,
+        blank=True,
+        related_name="stock_movements",
+        on_delete=models.SET_NULL,
+    )
+    note = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "Ombor harakati"
+        verbose_name_plural = "Ombor harakatlari"
+        indexes = [models.Index(fields=["product", "id"], name="catalog_movement_product_id")]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.get_kind_display()} {self.quantity:+d}"
+
+
+class CacheVersion(models.Model):
+    """
+    Kesh versiyasi hisoblagichi (katalog, moliya). Bazada turadi: barcha workerlar va
+    management buyruqlari bitta qiymatni ko'radi, kesh jarayon ichida (locmem) bo'lsa ham.
+    """
+
+    name = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
+
+
+class StockSnapshot(models.Model):
+    """Mahsulot qoldig'i `last_movement_id` gacha bo'lgan barcha harakatlar bo'yicha."""
+
+    product = models.ForeignKey(Product, related_name="stock_snapshots", on_delete=models.CASCADE)
+    stock = models.IntegerField()
+    last_movement_id = models.BigIntegerField()
+    taken_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Ombor qoldig'i surati"
+        verbose_name_plural = "Ombor qoldig'i suratlari"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "last_movement_id"], name="catalog_snapshot_product_movement"
+            )
+        ]
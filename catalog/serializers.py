@@ -1,12 +1,12 @@
 from rest_framework import serializers
 
-from .models import Category, Product
+from .models import Category, Product, StockMovement
 
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = ["id", "name", "slug"]
+        fields = ["id", "name", "slug", "updated_at"]
 
 
 class ProductSerializer(serializers.ModelSerializer):
@@ -30,8 +30,36 @@ class ProductSerializer(serializers.ModelSerializer):
             "category",
             "category_name",
             "image",
+            "updated_at",
         ]
-        read_only_fields = ["total_stock_in", "total_stock_out", "profit_per_unit"]
+        read_only_fields = ["total_stock_in", "total_stock_out", "profit_per_unit", "updated_at"]
 
     def get_profit_per_unit(self, obj):
         return obj.profit_per_unit
+
+
+class StockReceiptItemSerializer(serializers.Serializer):
+    product = serializers.PrimaryKeyRelatedField(queryset=Product.objects.all())
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class StockReceiptSerializer(serializers.Serializer):
+    items = StockReceiptItemSerializer(many=True, allow_empty=False)
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True, default="")
+
+    def validate_items(self, items):
+        quantities = {}
+        for item in items:
+            product_id = item["product"].pk
+            quantities[product_id] = quantities.get(product_id, 0) + item["quantity"]
+        return quantities
+
+
+class StockLevelQuerySerializer(serializers.Serializer):
+    at = serializers.DateTimeField(required=False)
+
+
+class StockMovementSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = StockMovement
+        fields = ["id", "kind", "quantity", "order", "note", "created_at"]
@@ -0,0 +1,44 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version
+from .models import Category, Product
+from .search import get_search_backend
+from .stock import record_adjustment, record_initial_stock
+
+
+SEARCH_FIELDS = {"name", "description"}
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, created, update_fields=None, **kwargs):
+    # Faqat stock/narx yangilansa indeksga tegmaymiz.
+    if update_fields is not None and not SEARCH_FIELDS & set(update_fields):
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_save, sender=Product)
+def record_stock_change(sender, instance, created, update_fields=None, **kwargs):
+    # Oldingi qiymat `Product.from_db` da eslab qolingan: qo'shimcha SELECT yo'q.
+    loaded_stock = getattr(instance, "_loaded_stock", None)
+    if created:
+        record_initial_stock(instance)
+    elif update_fields is not None and "stock" not in update_fields:
+        return
+    elif loaded_stock is not None and instance.stock != loaded_stock:
+        record_adjustment(instance, instance.stock - loaded_stock)
+    instance._loaded_stock = instance.stock
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_catalog_cache(sender, **kwargs):
+    bump_catalog_version()
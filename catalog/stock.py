@@ -0,0 +1,234 @@
+from django.core.exceptions import ValidationError
+from django.db import NotSupportedError, connection, transaction
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from .cache import bump_catalog_version
+from .models import Product, StockMovement, StockSnapshot
+
+
+BULK_BATCH_SIZE = 2000
+# Surat chegarasi (Max(pk)) dan past id li harakat keyin commit bo'lmasligi kerak.
+# SQLite: rowid yozish paytida beriladi va yozuvchilar navbatda - qulf shart emas.
+# PostgreSQL: sequence id ni commitdan oldin beradi; SHARE MODE INSERT bilan to'qnashadi,
+# ya'ni ochiq yozuvchilar commit bo'lishini kutadi va yangilari surat tugaguncha kutadi.
+SNAPSHOT_LOCK_SQL = {
+    "sqlite": None,
+    "postgresql": "LOCK TABLE {table} IN SHARE MODE",
+}
+
+
+def _movements(kind, quantities, sign=1, order=None, note=""):
+    now = timezone.now()
+    return [
+        StockMovement(
+            product_id=product_id,
+            kind=kind,
+            quantity=sign * quantity,
+            order=order,
+            note=note,
+            created_at=now,
+        )
+        for product_id, quantity in quantities.items()
+        if quantity
+    ]
+
+
+def _per_product(quantities):
+    return Case(
+        *[When(pk=product_id, then=Value(quantity)) for product_id, quantity in quantities.items()],
+        output_field=IntegerField(),
+    )
+
+
+def record_movements(movements):
+    """Jurnalga faqat qo'shiladi: bitta bulk INSERT (har BULK_BATCH_SIZE qatorga bittadan)."""
+    return StockMovement.objects.bulk_create(movements, batch_size=BULK_BATCH_SIZE)
+
+
+def record_initial_stock(product):
+    if product.stock:
+        record_movements(_movements(StockMovement.Kind.RECEIPT, {product.pk: product.stock}))
+
+
+def record_adjustment(product, delta, note=""):
+    record_movements(_movements(StockMovement.Kind.ADJUSTMENT, {product.pk: delta}, note=note))
+
+
+def record_sale(order, quantities):
+    """Checkout: stock shartli UPDATE bilan kamaytirilgan, bu yerda faqat jurnal yoziladi."""
+    record_movements(_movements(StockMovement.Kind.SALE, quantities, sign=-1, order=order))
+
+
+@transaction.atomic
+def receive_stock(quantities, note=""):
+    """Omborga kirim: {product_id: soni}. Qoldiq bitta UPDATE bilan, jurnal bitta INSERT bilan."""
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return 0
+    delta = _per_product(quantities)
+    updated = Product.objects.filter(pk__in=quantities.keys()).update(
+        stock=F("stock") + delta,
+        total_stock_in=F("total_stock_in") + delta,
+        updated_at=timezone.now(),
+    )
+    record_movements(_movements(StockMovement.Kind.RECEIPT, quantities, note=note))
+    bump_catalog_version()
+    return updated
+
+
+def order_quantities(order):
+    """Buyurtma qatorlari mahsulot bo'yicha: {product_id: soni}."""
+    return dict(
+        order.items.values("product_id")
+        .annotate(total=Sum("quantity"))
+        .order_by()
+        .values_list("product_id", "total")
+    )
+
+
+def stock_shortages(quantities):
+    """Qoldig'i yetmaydigan mahsulotlar: {nomi: (omborda, kerak)}."""
+    in_stock = {
+        product_id: (name, stock)
+        for product_id, name, stock in Product.objects.filter(pk__in=quantities.keys()).values_list(
+            "pk", "name", "stock"
+        )
+    }
+    return {
+        in_stock[product_id][0]: (in_stock[product_id][1], quantity)
+        for product_id, quantity in quantities.items()
+        if product_id in in_stock and in_stock[product_id][1] < quantity
+    }
+
+
+def shortage_error(shortages):
+    return ValidationError(
+        [
+            f"{name}: stock yetarli emas. Omborda: {stock}, kerak: {quantity}"
+            for name, (stock, quantity) in shortages.items()
+        ]
+    )
+
+
+def restock_order(order, sign=1):
+    """
+    Buyurtma bekor qilinganda (sign=1) mahsulotlar omborga qaytadi, bekor qilish
+    qaytarib olinganda (sign=-1) yana sotuv sifatida chiqadi - checkout dagi kabi shartli
+    UPDATE bilan: qoldiq oraliqda sotilib ketgan bo'lsa ValidationError.
+    """
+    quantities = order_quantities(order)
+    if not quantities:
+        return
+    delta = _per_product(quantities)
+    products = Product.objects.filter(pk__in=quantities.keys())
+    if sign > 0:
+        products.update(
+            stock=F("stock") + delta,
+            # Checkout dan o'tmagan qatorlar (admin, import) hisoblagichga tushmagan: 0 dan pastga tushmaydi.
+            total_stock_out=Greatest(
+                F("total_stock_out") - delta, Value(0), output_field=IntegerField()
+            ),
+            updated_at=timezone.now(),
+        )
+    else:
+        reserved = products.filter(stock__gte=delta).update(
+            stock=F("stock") - delta,
+            total_stock_out=F("total_stock_out") + delta,
+            updated_at=timezone.now(),
+        )
+        if reserved != len(quantities):
+            raise shortage_error(stock_shortages(quantities))
+    kind = StockMovement.Kind.CANCEL if sign > 0 else StockMovement.Kind.SALE
+    record_movements(_movements(kind, quantities, sign=sign, order=order))
+    bump_catalog_version()
+
+
+def _latest_snapshot_boundary(at=None):
+    snapshots = StockSnapshot.objects.filter(product=OuterRef("product"))
+    if at is not None:
+        snapshots = snapshots.filter(taken_at__lte=at)
+    return Coalesce(
+        Subquery(snapshots.order_by("-last_movement_id").values("last_movement_id")[:1]),
+        Value(0),
+    )
+
+
+def stock_levels(product_ids=None, at=None):
+    """
+    Jurnal bo'yicha qoldiq {product_id: stock}: oxirgi surat (`at` dan oldingi) va
+    undan keyingi harakatlar yig'indisi. `at` berilmasa - hozirgi holat.
+    """
+    snapshots = StockSnapshot.objects.filter(last_movement_id=_latest_snapshot_boundary(at))
+    movements = StockMovement.objects.filter(pk__gt=_latest_snapshot_boundary(at))
+    if at is not None:
+        snapshots = snapshots.filter(taken_at__lte=at)
+        movements = movements.filter(created_at__lte=at)
+    if product_ids is not None:
+        snapshots = snapshots.filter(product_id__in=product_ids)
+        movements = movements.filter(product_id__in=product_ids)
+
+    levels = dict.fromkeys(product_ids or (), 0)
+    levels.update(snapshots.values_list("product_id", "stock"))
+    for product_id, delta in (
+        movements.values("product_id")
+        .annotate(delta=Sum("quantity"))
+        .order_by()
+        .values_list("product_id", "delta")
+    ):
+        levels[product_id] = levels.get(product_id, 0) + delta
+    return levels
+
+
+def _lock_movements():
+    if connection.vendor not in SNAPSHOT_LOCK_SQL:
+        raise NotSupportedError(f"Ombor suratlari {connection.vendor} bazasida qo'llab-quvvatlanmaydi.")
+    sql = SNAPSHOT_LOCK_SQL[connection.vendor]
+    if sql:
+        with connection.cursor() as cursor:
+            cursor.execute(sql.format(table=connection.ops.quote_name(StockMovement._meta.db_table)))
+
+
+@transaction.atomic
+def take_snapshots():
+    """
+    Oxirgi suratdan keyin harakati bo'lgan mahsulotlar uchun yangi surat:
+    oldingi surat + (oldingi chegara, joriy chegara] oralig'idagi harakatlar.
+    Chegara jurnal qulflangan holda olinadi (SNAPSHOT_LOCK_SQL).
+    Qaytaradi: yaratilgan suratlar soni.
+    """
+    _lock_movements()
+    boundary = StockMovement.objects.aggregate(last=Max("pk"))["last"]
+    if boundary is None:
+        return 0
+    since = StockSnapshot.objects.aggregate(last=Max("last_movement_id"))["last"] or 0
+    if boundary <= since:
+        return 0
+
+    deltas = dict(
+        StockMovement.objects.filter(pk__gt=since, pk__lte=boundary)
+        .values("product_id")
+        .annotate(delta=Sum("quantity"))
+        .order_by()
+        .values_list("product_id", "delta")
+    )
+    previous = dict(
+        StockSnapshot.objects.filter(last_movement_id=_latest_snapshot_boundary()).values_list(
+            "product_id", "stock"
+        )
+    )
+    now = timezone.now()
+    snapshots = StockSnapshot.objects.bulk_create(
+        (
+            StockSnapshot(
+                product_id=product_id,
+                stock=previous.get(product_id, 0) + delta,
+                last_movement_id=boundary,
+                taken_at=now,
+            )
+            for product_id, delta in deltas.items()
+        ),
+        batch_size=BULK_BATCH_SIZE,
+    )
+    return len(snapshots)
@@ -1,3 +1,372 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from catalog.cache import CATALOG_VERSION, bump_catalog_version, catalog_cache, get_catalog_version
+from catalog.models import CacheVersion, Category, Product, StockMovement, StockSnapshot
+from catalog.stock import stock_levels, take_snapshots
+from config.pagination import KeysetPagination
+
+User = get_user_model()
+
+
+class ProductPaginationTests(APITestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Tools", slug="tools")
+        # Narxlar ataylab takrorlanadi: (price, id) bo'yicha tartib barqaror bo'lishi kerak.
+        self.products = [
+            Product.objects.create(
+                name=f"Product {index}",
+                price=f"{100 + index % 3}.00",
+                stock=10,
+                is_active=True,
+                category=self.category,
+            )
+            for index in range(7)
+        ]
+
+    def _walk(self, url):
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.extend(row["id"] for row in response.data["results"])
+            url = response.data["next"]
+            pages += 1
+        return ids, pages
+
+    def test_cursor_walk_returns_every_product_once(self):
+        ids, pages = self._walk(f"{reverse('product-list')}?page_size=3")
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(ids, sorted((p.id for p in self.products), reverse=True))
+
+    def test_cursor_walk_with_duplicate_sort_values_is_stable(self):
+        ids, _ = self._walk(f"{reverse('product-list')}?ordering=price&page_size=2")
+
+        expected = sorted(self.products, key=lambda p: (p.price, p.id))
+        self.assertEqual(ids, [p.id for p in expected])
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get(f"{reverse('product-list')}?ordering=-price&page_size=3")
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertIsNone(first.data["previous"])
+
+    def test_page_size_is_capped(self):
+        request = Request(APIRequestFactory().get("/api/products/", {"page_size": 10_000}))
+        paginator = KeysetPagination()
+
+        self.assertEqual(paginator.get_page_size(request), settings.API_MAX_PAGE_SIZE)
+
+    def test_expression_ordered_queryset_falls_back_to_default_ordering(self):
+        request = Request(APIRequestFactory().get("/api/products/", {"page_size": 3}))
+        paginator = KeysetPagination()
+
+        page = paginator.paginate_queryset(Product.objects.order_by(F("price").desc()), request)
+        self.assertEqual(
+            [product.id for product in page], sorted((p.id for p in self.products), reverse=True)[:3]
+        )
+        self.assertIsNotNone(paginator.get_next_link())
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get(f"{reverse('product-list')}?cursor=bm9wZQ==")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ProductSearchTests(APITestCase):
+    def setUp(self):
+        # Fixture yozuvlari "commit" bo'ladi: kesh versiyasi bump lari shu yerda bajariladi.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name="Qurilish", slug="qurilish")
+            self.cement = Product.objects.create(
+                name="Portland cement M400",
+                description="50 kg qop",
+                price="85000.00",
+                stock=100,
+                category=self.category,
+            )
+            self.mortar = Product.objects.create(
+                name="Quruq qorishma",
+                description="Cement asosidagi qorishma",
+                price="60000.00",
+                stock=100,
+                category=self.category,
+            )
+            self.rebar = Product.objects.create(
+                name="Armatura 12mm",
+                description="A500C",
+                price="9000.00",
+                stock=100,
+                category=self.category,
+            )
+
+    def _search(self, term):
+        response = self.client.get(reverse("product-list"), {"search": term})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_search_matches_description_and_ranks_name_first(self):
+        self.assertEqual(self._search("cement"), [self.cement.id, self.mortar.id])
+
+    def test_search_matches_prefix(self):
+        self.assertEqual(self._search("armat"), [self.rebar.id])
+        self.assertEqual(self._search("qur qor"), [self.mortar.id])
+
+    def test_index_follows_save_and_delete(self):
+        self.rebar.name = "Sim 6mm"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rebar.save()
+        self.assertEqual(self._search("armatura"), [])
+        self.assertEqual(self._search("sim"), [self.rebar.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rebar.delete()
+        self.assertEqual(self._search("sim"), [])
+
+    def test_search_results_paginate_by_rank(self):
+        response = self.client.get(reverse("product-list"), {"search": "cement", "page_size": 1})
+        second = self.client.get(response.data["next"])
+
+        self.assertEqual(response.data["results"][0]["id"], self.cement.id)
+        self.assertEqual(second.data["results"][0]["id"], self.mortar.id)
+        self.assertIsNone(second.data["next"])
+
+
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        # Fixture yozuvlari "commit" bo'ladi: kesh versiyasi bump lari shu yerda bajariladi.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username="buyer", password="testpass123")
+            self.staff = User.objects.create_superuser(
+                username="admin", password="adminpass123", email="admin@example.com"
+            )
+            self.category = Category.objects.create(name="Tools", slug="tools")
+            self.product = Product.objects.create(
+                name="Hammer",
+                price="100.00",
+                stock=10,
+                category=self.category,
+            )
+
+    def test_repeated_list_is_served_from_cache(self):
+        first = self.client.get(reverse("product-list"))
+        # Faqat versiya qatori o'qiladi.
+        with self.assertNumQueries(1):
+            second = self.client.get(reverse("product-list"))
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second.data, first.data)
+
+    def test_query_params_are_part_of_the_key(self):
+        self.client.get(reverse("product-list"))
+        response = self.client.get(reverse("product-list"), {"search": "hammer"})
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_product_save_invalidates_cache(self):
+        self.client.get(reverse("product-detail", args=[self.product.id]))
+        self.product.price = "120.00"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+
+        response = self.client.get(reverse("product-detail", args=[self.product.id]))
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["price"], "120.00")
+
+    def test_version_bumped_by_another_process_invalidates_cache(self):
+        self.client.get(reverse("product-list"))
+        # Boshqa jarayon (worker, `seed_store`) faqat bazadagi versiyani oshiradi.
+        CacheVersion.objects.filter(pk=CATALOG_VERSION).update(version=F("version") + 1)
+
+        response = self.client.get(reverse("product-list"))
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_bumps_in_one_transaction_share_one_callback(self):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            bump_catalog_version()
+            self.product.save()
+            bump_catalog_version()
+        self.assertEqual(len(callbacks), 1)
+
+        with CaptureQueriesContext(connection) as queries:
+            callbacks[0]()
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(get_catalog_version(), version + 1)
+
+    def test_checkout_stock_write_invalidates_cache(self):
+        self.client.get(reverse("product-list"))
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(
+                reverse("order-list"),
+                {"items": [{"product": self.product.id, "quantity": 3}]},
+                format="json",
+            )
+
+        response = self.client.get(reverse("product-list"))
+        self.assertEqual(response.data["results"][0]["stock"], 7)
+
+    def test_staff_can_read_cache_stats(self):
+        self.client.get(reverse("category-list"))
+        self.client.get(reverse("category-list"))
+        self.client.force_authenticate(user=self.staff)
+
+        response = self.client.get(reverse("catalog-cache-stats"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["hits"], 1)
+        self.assertEqual(response.data["misses"], 1)
+
+
+class CatalogConditionalGetTests(APITestCase):
+    def setUp(self):
+        catalog_cache().clear()
+        # Fixture yozuvlari "commit" bo'ladi: kesh versiyasi bump lari shu yerda bajariladi.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category = Category.objects.create(name="Tools", slug="tools")
+            self.product = Product.objects.create(
+                name="Hammer",
+                price="100.00",
+                stock=10,
+                category=self.category,
+            )
+
+    def test_unchanged_list_returns_304_with_version_lookup_only(self):
+        first = self.client.get(reverse("product-list"))
+        self.assertIn("ETag", first)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                reverse("product-list"), HTTP_IF_NONE_MATCH=first["ETag"]
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], first["ETag"])
+
+    def test_version_bumped_by_another_process_changes_etag(self):
+        first = self.client.get(reverse("product-list"))
+        CacheVersion.objects.filter(pk=CATALOG_VERSION).update(version=F("version") + 1)
+
+        response = self.client.get(reverse("product-list"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def test_write_changes_etag(self):
+        first = self.client.get(reverse("category-detail", args=[self.category.id]))
+        self.category.name = "Asboblar"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.save()
+
+        response = self.client.get(
+            reverse("category-detail", args=[self.category.id]),
+            HTTP_IF_NONE_MATCH=first["ETag"],
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], "Asboblar")
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+
+class StockLedgerTests(APITestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Tools", slug="tools")
+        self.product = Product.objects.create(
+            name="Hammer", price="100.00", stock=10, category=self.category
+        )
+        self.staff = User.objects.create_superuser(username="admin", password="adminpass123")
+
+    def test_creation_is_recorded_as_receipt(self):
+        self.assertEqual(
+            list(self.product.stock_movements.values_list("kind", "quantity")),
+            [(StockMovement.Kind.RECEIPT, 10)],
+        )
+        self.assertEqual(self.product.total_stock_in, 10)
+
+    def test_save_records_adjustment_without_reading_product(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.stock = 7
+        with CaptureQueriesContext(connection) as queries:
+            product.save()
+
+        self.assertFalse(
+            [q for q in queries if q["sql"].startswith("SELECT") and '"catalog_product"' in q["sql"]]
+        )
+        movement = product.stock_movements.latest("pk")
+        self.assertEqual((movement.kind, movement.quantity), (StockMovement.Kind.ADJUSTMENT, -3))
+
+    def test_raising_stock_through_save_counts_as_stock_in(self):
+        product = Product.objects.get(pk=self.product.pk)
+        product.stock = 25
+        product.save()
+        self.assertEqual(product.total_stock_in, 25)
+
+        product.stock = 20
+        product.save(update_fields=["stock"])
+        product.refresh_from_db()
+        self.assertEqual((product.stock, product.total_stock_in), (20, 25))
+        self.assertEqual(
+            list(product.stock_movements.order_by("pk").values_list("quantity", flat=True)),
+            [10, 15, -5],
+        )
+
+    def test_receive_endpoint_updates_stock_and_ledger(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.post(
+            reverse("product-receive"),
+            {"items": [{"product": self.product.id, "quantity": 5}], "note": "Yetkazib beruvchi"},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.total_stock_in), (15, 15))
+        self.assertEqual(stock_levels([self.product.id]), {self.product.id: 15})
+
+    def test_snapshot_plus_deltas_gives_current_and_historical_stock(self):
+        self.assertEqual(take_snapshots(), 1)
+        before = timezone.now()
+        StockMovement.objects.create(
+            product=self.product,
+            kind=StockMovement.Kind.RECEIPT,
+            quantity=4,
+            created_at=before + timedelta(seconds=1),
+        )
+
+        self.assertEqual(stock_levels([self.product.id]), {self.product.id: 14})
+        self.assertEqual(stock_levels([self.product.id], at=before), {self.product.id: 10})
+        self.assertEqual(take_snapshots(), 1)
+        self.assertEqual(StockSnapshot.objects.latest("pk").stock, 14)
+        self.assertEqual(take_snapshots(), 0)
+
+    def test_snapshot_verify_fails_on_mismatch(self):
+        out = StringIO()
+        call_command("snapshot_stock", verify=True, stdout=out)
+        self.assertIn("mos", out.getvalue())
+
+        Product.objects.filter(pk=self.product.pk).update(stock=7)
+        with self.assertRaisesMessage(CommandError, "Mos kelmagan mahsulotlar: 1."):
+            call_command("snapshot_stock", verify=True, stdout=StringIO(), stderr=StringIO())
+
+    def test_stock_endpoint_is_admin_only(self):
+        url = reverse("product-stock", args=[self.product.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["stock"], 10)
+        self.assertEqual(response.data["movements"][0]["kind"], StockMovement.Kind.RECEIPT)
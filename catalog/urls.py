@@ -1,10 +1,14 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import CategoryViewSet, ProductViewSet
+from .views import CatalogCacheStatsAPIView, CategoryViewSet, ProductViewSet
 
 router = DefaultRouter()
 router.include_format_suffixes = False
 router.register("categories", CategoryViewSet, basename="category")
 router.register("products", ProductViewSet, basename="product")
 
-urlpatterns = router.urls
+urlpatterns = [
+    path("catalog/cache-stats/", CatalogCacheStatsAPIView.as_view(), name="catalog-cache-stats"),
+]
+urlpatterns += router.urls
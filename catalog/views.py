@@ -1,19 +1,68 @@
-from rest_framework import permissions, viewsets
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from .cache import CatalogCacheMixin, CatalogConditionalGetMixin, get_cache_stats
 from .filters import ProductFilter
 from .models import Category, Product
-from .serializers import CategorySerializer, ProductSerializer
+from .search import ProductSearchFilter
+from .serializers import (
+    CategorySerializer,
+    ProductSerializer,
+    StockLevelQuerySerializer,
+    StockMovementSerializer,
+    StockReceiptSerializer,
+)
+from .stock import receive_stock, stock_levels
 
 
-class CategoryViewSet(viewsets.ModelViewSet):
+class CategoryViewSet(CatalogConditionalGetMixin, CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [permissions.AllowAny]
 
 
-class ProductViewSet(viewsets.ModelViewSet):
+class ProductViewSet(CatalogConditionalGetMixin, CatalogCacheMixin, viewsets.ModelViewSet):
     queryset = Product.objects.filter(is_active=True).select_related("category")
     serializer_class = ProductSerializer
     permission_classes = [permissions.AllowAny]
+    filter_backends = [DjangoFilterBackend, ProductSearchFilter, OrderingFilter]
     filterset_class = ProductFilter
-    search_fields = ["name"]
+    search_fields = ["name", "description"]
+
+    @action(detail=False, methods=["post"], permission_classes=[permissions.IsAdminUser])
+    def receive(self, request):
+        """Omborga kirim: `{"items": [{"product": id, "quantity": n}], "note": "..."}`."""
+        serializer = StockReceiptSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = receive_stock(serializer.validated_data["items"], serializer.validated_data["note"])
+        return Response({"updated": updated}, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"], permission_classes=[permissions.IsAdminUser])
+    def stock(self, request, pk=None):
+        """Jurnal bo'yicha qoldiq (`?at=` bilan - o'sha paytdagi) va oxirgi harakatlar."""
+        product = self.get_object()
+        query = StockLevelQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        at = query.validated_data.get("at")
+        movements = product.stock_movements.order_by("-pk")
+        if at is not None:
+            movements = movements.filter(created_at__lte=at)
+        return Response(
+            {
+                "product": product.pk,
+                "at": at,
+                "stock": stock_levels([product.pk], at=at)[product.pk],
+                "movements": StockMovementSerializer(movements[:20], many=True).data,
+            }
+        )
+
+
+class CatalogCacheStatsAPIView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        return Response(get_cache_stats())
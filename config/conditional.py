@@ -0,0 +1,72 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for `list` and `retrieve`.
+
+    Validators come from `get_conditional_version()` when a view has a cheap
+    version counter, otherwise from one MAX(updated_at)/COUNT(*) aggregate over
+    the filtered queryset. A matching If-None-Match / If-Modified-Since gets a
+    304 before the page query and the serializer run.
+    """
+
+    last_modified_field = "updated_at"
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def get_conditional_version(self, request):
+        return None
+
+    def get_validators(self, request, **kwargs):
+        version = self.get_conditional_version(request)
+        if version is not None:
+            return str(version), None
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        stats = queryset.order_by().aggregate(
+            last_modified=Max(self.last_modified_field), count=Count("pk")
+        )
+        last_modified = stats["last_modified"]
+        stamp = last_modified.isoformat() if last_modified else ""
+        return f"{stats['count']}:{stamp}", last_modified
+
+    def get_etag(self, request, source, **kwargs):
+        raw = "|".join(
+            [
+                source,
+                self.basename,
+                self.action,
+                str(sorted(kwargs.items())),
+                str(sorted(request.query_params.lists())),
+                str(request.user.pk),
+                request.accepted_renderer.format,
+            ]
+        )
+        return quote_etag(hashlib.md5(raw.encode("utf-8")).hexdigest())
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        source, last_modified = self.get_validators(request, **kwargs)
+        etag = self.get_etag(request, source, **kwargs)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response["ETag"] = etag
+        if timestamp is not None:
+            response["Last-Modified"] = http_date(timestamp)
+        return response
@@ -0,0 +1,153 @@
+from base64 import b64decode, b64encode
+from collections import namedtuple
+from urllib import parse
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+KeysetCursor = namedtuple("KeysetCursor", ["reverse", "position", "pk"])
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on (sort field, id).
+
+    The cursor stores the sort value and primary key of the boundary row, so
+    every page is a single `WHERE (field, id) > (value, pk) LIMIT n` query and
+    page N costs the same as page 1. The sort field is the first term of
+    `?ordering=`, the view's default ordering or the queryset's own ordering
+    (e.g. search rank), and must be a concrete non-null column or annotation;
+    anything else falls back to `ordering`.
+    """
+
+    ordering = "-id"
+    page_size_query_param = "page_size"
+    max_page_size = getattr(settings, "API_MAX_PAGE_SIZE", 100)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        sort_field = self.get_ordering(request, queryset, view)[0]
+        self.field = self._sort_field(queryset, sort_field.lstrip("-"))
+        if self.field is None:
+            sort_field = self.ordering
+            self.field = self._sort_field(queryset, sort_field.lstrip("-"))
+        self.descending = sort_field.startswith("-")
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        queryset = queryset.order_by(*self._order_by(reverse))
+        if self.cursor is not None:
+            queryset = queryset.filter(self._seek_filter(self.cursor, reverse))
+
+        results = list(queryset[: self.page_size + 1])
+        self.page = results[: self.page_size]
+        has_more = len(results) > self.page_size
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None and bool(self.page)
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self._cursor_for(self.page[-1], reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self._cursor_for(self.page[0], reverse=True))
+
+    def get_ordering(self, request, queryset, view):
+        for backend in getattr(view, "filter_backends", []):
+            if hasattr(backend, "get_ordering"):
+                ordering = backend().get_ordering(request, queryset, view)
+                if ordering:
+                    return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+        # Only plain field names can be seek keys; expressions (`F("x").desc()`)
+        # fall back to the paginator's own ordering.
+        ordering = tuple(queryset.query.order_by)
+        if ordering and all(isinstance(term, str) for term in ordering):
+            return ordering
+        return (self.ordering,)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode("ascii")).decode("utf-8")
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            reverse = bool(int(tokens.get("r", ["0"])[0]))
+            position = self.field.to_python(tokens["p"][0])
+            pk = self.model._meta.pk.to_python(tokens["i"][0])
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if position is None or pk is None:
+            raise NotFound(self.invalid_cursor_message)
+        return KeysetCursor(reverse=reverse, position=position, pk=pk)
+
+    def encode_cursor(self, cursor):
+        tokens = {"p": str(cursor.position), "i": str(cursor.pk)}
+        if cursor.reverse:
+            tokens["r"] = "1"
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _sort_field(self, queryset, name):
+        if name == "pk":
+            name = self.model._meta.pk.name
+        self.sort_name = name
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if not field.concrete or field.is_relation or field.null:
+            return None
+        return field
+
+    def _order_by(self, reverse):
+        prefix = "-" if self.descending != reverse else ""
+        if self.sort_name == self.model._meta.pk.name:
+            return (f"{prefix}{self.sort_name}",)
+        return (f"{prefix}{self.sort_name}", f"{prefix}pk")
+
+    def _seek_filter(self, cursor, reverse):
+        lookup = "lt" if self.descending != reverse else "gt"
+        if self.sort_name == self.model._meta.pk.name:
+            return Q(**{f"pk__{lookup}": cursor.pk})
+        name = self.sort_name
+        return Q(**{f"{name}__{lookup}": cursor.position}) | Q(
+            **{name: cursor.position, f"pk__{lookup}": cursor.pk}
+        )
+
+    def _cursor_for(self, instance, reverse):
+        return KeysetCursor(
+            reverse=reverse,
+            position=getattr(instance, self.sort_name),
+            pk=instance.pk,
+        )
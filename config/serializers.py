@@ -0,0 +1,45 @@
+FIELDS_QUERY_PARAM = "fields"
+EXPAND_QUERY_PARAM = "expand"
+
+
+def query_param_set(request, name):
+    """`?name=a,b&name=c` -> {"a", "b", "c"}; missing request or parameter -> empty set."""
+    if request is None:
+        return set()
+    return {
+        part.strip()
+        for value in request.query_params.getlist(name)
+        for part in value.split(",")
+        if part.strip()
+    }
+
+
+def requested_expansions(request):
+    return query_param_set(request, EXPAND_QUERY_PARAM)
+
+
+class DynamicFieldsMixin:
+    """
+    Sparse fieldsets and opt-in expansion for a compact serializer.
+
+    `?fields=id,status` keeps only the listed fields (unknown names are
+    ignored). `?expand=name` replaces or adds a field with the serializer
+    declared in `Meta.expandable_fields = {name: (serializer_class, kwargs)}`.
+    Views read the same parameters through `requested_expansions()` to add
+    the matching `select_related` / `prefetch_related`, so the compact form
+    never pays for the expanded one.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get("request")
+
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        for name in requested_expansions(request) & expandable.keys():
+            serializer_class, kwargs = expandable[name]
+            fields[name] = serializer_class(read_only=True, **kwargs)
+
+        only = query_param_set(request, FIELDS_QUERY_PARAM)
+        if only:
+            fields = {name: field for name, field in fields.items() if name in only}
+        return fields
@@ -68,6 +68,11 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Yozuvchi tranzaksiyalar "database is locked" bilan yiqilmasdan navbat kutadi.
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
     }
 }
 
@@ -91,6 +96,8 @@ AUTH_PASSWORD_VALIDATORS = [
 
 LANGUAGE_CODE = "en-us"
 TIME_ZONE = "UTC"
+# Savdo hisobotlari (kun/soat/hafta/oy chegaralari) shu vaqt mintaqasida hisoblanadi.
+STORE_TIME_ZONE = os.getenv("STORE_TIME_ZONE", TIME_ZONE)
 USE_I18N = True
 USE_TZ = True
 
@@ -104,6 +111,76 @@ MEDIA_URL = "media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
 
+CATALOG_CACHE_BACKENDS = {
+    "locmem": "django.core.cache.backends.locmem.LocMemCache",
+    "file": "django.core.cache.backends.filebased.FileBasedCache",
+    "redis": "django.core.cache.backends.redis.RedisCache",
+    "memcached": "django.core.cache.backends.memcached.PyMemcacheCache",
+}
+CATALOG_CACHE_ALIAS = "catalog"
+# locmem har bir jarayonda alohida xotira, lekin kalitlar bazadagi versiyaga
+# (catalog.CacheVersion) bog'langan: bump barcha workerlarda eski yozuvlarni yaroqsiz
+# qiladi. Faqat hits/misses statistikasi locmem da jarayon bo'yicha hisoblanadi.
+catalog_cache_backend = os.getenv("CATALOG_CACHE_BACKEND", "locmem")
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    CATALOG_CACHE_ALIAS: {
+        "BACKEND": CATALOG_CACHE_BACKENDS[catalog_cache_backend],
+        "LOCATION": os.getenv("CATALOG_CACHE_LOCATION", "catalog"),
+        "TIMEOUT": int(os.getenv("CATALOG_CACHE_TIMEOUT", "300")),
+    },
+}
+if catalog_cache_backend in ("locmem", "file"):
+    CACHES[CATALOG_CACHE_ALIAS]["OPTIONS"] = {
+        "MAX_ENTRIES": int(os.getenv("CATALOG_CACHE_MAX_ENTRIES", "5000")),
+    }
+
+
+GEOCODER = os.getenv("GEOCODER", "orders.services.NominatimGeocoder")
+GEOCODE_IN_BACKGROUND = os.getenv("GEOCODE_IN_BACKGROUND", "True").lower() == "true"
+GEOCODE_WORKERS = int(os.getenv("GEOCODE_WORKERS", "2"))
+# 8 belgili geohash ~ 38 x 19 m katak.
+GEOCODE_CACHE_PRECISION = int(os.getenv("GEOCODE_CACHE_PRECISION", "8"))
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+GEOCODE_CACHE_MEMORY_SIZE = int(os.getenv("GEOCODE_CACHE_MEMORY_SIZE", "4096"))
+# Moliya hisoboti keshi (sekund): TTL, undan keyin fonda yangilanadigan eski qiymat
+# muddati, parallel so'rovlar bitta hisobni kutadigan eng ko'p vaqt va xotiradagi yozuvlar soni.
+FINANCE_CACHE_TTL = int(os.getenv("FINANCE_CACHE_TTL", "60"))
+FINANCE_CACHE_STALE = int(os.getenv("FINANCE_CACHE_STALE", "300"))
+FINANCE_CACHE_WAIT = int(os.getenv("FINANCE_CACHE_WAIT", "30"))
+FINANCE_CACHE_MAX_ENTRIES = int(os.getenv("FINANCE_CACHE_MAX_ENTRIES", "256"))
+FINANCE_REFRESH_IN_BACKGROUND = (
+    os.getenv("FINANCE_REFRESH_IN_BACKGROUND", "True").lower() == "true"
+)
+# Mehmon savati: imzolangan cookie (bazaga yozilmaydi), kirish/checkout da Cart ga qo'shiladi.
+GUEST_CART_COOKIE_NAME = os.getenv("GUEST_CART_COOKIE_NAME", "guest_cart")
+GUEST_CART_MAX_AGE = int(os.getenv("GUEST_CART_MAX_AGE", str(30 * 24 * 3600)))
+# Cookie 4 KB dan oshmasligi uchun.
+GUEST_CART_MAX_ITEMS = int(os.getenv("GUEST_CART_MAX_ITEMS", "100"))
+# Idempotency-Key (sekund): saqlangan javob muddati, takroriy so'rov birinchi urinishni
+# kutadigan eng ko'p vaqt va tugamay qolgan (jarayon o'lgan) urinish egallanadigan vaqt.
+IDEMPOTENCY_KEY_TTL = int(os.getenv("IDEMPOTENCY_KEY_TTL", str(24 * 3600)))
+IDEMPOTENCY_WAIT = float(os.getenv("IDEMPOTENCY_WAIT", "10"))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "60"))
+# Talab prognozi: usul (ma | ses), tarix, sirpanuvchi oyna, tekislash koeffitsienti,
+# yetkazib berish muddati va buyurtma qancha kunga yetishi kerakligi.
+FORECAST_METHOD = os.getenv("FORECAST_METHOD", "ses")
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "730"))
+FORECAST_WINDOW_DAYS = int(os.getenv("FORECAST_WINDOW_DAYS", "28"))
+FORECAST_ALPHA = float(os.getenv("FORECAST_ALPHA", "0.1"))
+REORDER_LEAD_TIME_DAYS = int(os.getenv("REORDER_LEAD_TIME_DAYS", "7"))
+REORDER_COVER_DAYS = int(os.getenv("REORDER_COVER_DAYS", "30"))
+# Kurer marshrutining boshlanish nuqtasi (ombor); bo'sh bo'lsa birinchi manzildan boshlanadi.
+DELIVERY_DEPOT_LATITUDE = os.getenv("DELIVERY_DEPOT_LATITUDE") or None
+DELIVERY_DEPOT_LONGITUDE = os.getenv("DELIVERY_DEPOT_LONGITUDE") or None
+# Benchmark uchun ajratilgan baza: `bench_indexes --drop-indexes` DEBUG o'chiq bo'lsa
+# faqat shu bayroq bilan indekslarni o'chiradi.
+BENCH_DATABASE = os.getenv("BENCH_DATABASE", "False").lower() == "true"
+
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "users.User"
@@ -121,8 +198,12 @@ REST_FRAMEWORK = {
         "rest_framework.filters.SearchFilter",
         "rest_framework.filters.OrderingFilter",
     ),
+    "DEFAULT_PAGINATION_CLASS": "config.pagination.KeysetPagination",
+    "PAGE_SIZE": int(os.getenv("API_PAGE_SIZE", "20")),
 }
 
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "100"))
+
 SPECTACULAR_SETTINGS = {
     "TITLE": "Akk API",
     "DESCRIPTION": "Uzum Market style API demo",
@@ -1,26 +1,9 @@
-from datetime import timedelta
-from decimal import Decimal
-
 from django.contrib import admin
-from django.db.models import DecimalField, ExpressionWrapper, F, Sum
-from django.db.models.functions import TruncDate
-from django.utils import timezone
-
-from .models import Cart, CartItem, Expense, Order, OrderItem
-
-
-MONEY_OUTPUT = DecimalField(max_digits=18, decimal_places=2)
-REVENUE_EXPR = ExpressionWrapper(F("price") * F("quantity"), output_field=MONEY_OUTPUT)
-COST_EXPR = ExpressionWrapper(F("cost_price") * F("quantity"), output_field=MONEY_OUTPUT)
-
-
-def _sum_or_zero(queryset, expression):
-    value = queryset.aggregate(total=Sum(expression))["total"]
-    return value or Decimal("0.00")
 
-
-def _as_decimal(value):
-    return value if isinstance(value, Decimal) else Decimal(value or 0)
+from .cart import cart_totals_update, refresh_cart_totals
+from .dispatch import dispatch_courier_orders
+from .finance import FinanceEngine, cached_finance_overview, finance_cache
+from .models import Cart, CartItem, DemandForecast, Expense, GeocodeCache, IdempotencyKey, Order, OrderItem
 
 
 @admin.register(Order)
@@ -48,6 +31,16 @@ class OrderAdmin(admin.ModelAdmin):
     )
     date_hierarchy = "created_at"
     autocomplete_fields = ["courier"]
+    actions = ["dispatch_couriers"]
+
+    @admin.action(description="Kurer biriktirish (sig'im bo'yicha)")
+    def dispatch_couriers(self, request, queryset):
+        result = dispatch_courier_orders(order_ids=queryset.values_list("id", flat=True))
+        assigned = sum(len(order_ids) for order_ids in result.assignments.values())
+        self.message_user(
+            request,
+            f"{assigned} ta buyurtmaga kurer biriktirildi, {len(result.unassigned)} tasiga joy topilmadi.",
+        )
 
 
 @admin.register(OrderItem)
@@ -63,8 +56,9 @@ class OrderItemAdmin(admin.ModelAdmin):
 
 @admin.register(Cart)
 class CartAdmin(admin.ModelAdmin):
-    list_display = ("id", "user", "created_at", "updated_at")
+    list_display = ("id", "user", "item_count", "subtotal", "created_at", "updated_at")
     search_fields = ("user__username", "user__email")
+    readonly_fields = ("item_count", "subtotal")
 
 
 @admin.register(CartItem)
@@ -73,6 +67,41 @@ class CartItemAdmin(admin.ModelAdmin):
     list_filter = ("product",)
     search_fields = ("cart__user__username", "product__name")
 
+    # Admin orqali o'zgargan qatorlar ham savat jamiga tushishi kerak.
+    def save_model(self, request, obj, form, change):
+        previous_cart_id = form.initial.get("cart")
+        super().save_model(request, obj, form, change)
+        cart_totals_update(Cart.objects.filter(pk__in={obj.cart_id, previous_cart_id} - {None}))
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_cart_totals(obj.cart_id)
+
+    def delete_queryset(self, request, queryset):
+        cart_ids = set(queryset.values_list("cart_id", flat=True))
+        super().delete_queryset(request, queryset)
+        cart_totals_update(Cart.objects.filter(pk__in=cart_ids))
+
+
+@admin.register(GeocodeCache)
+class GeocodeCacheAdmin(admin.ModelAdmin):
+    list_display = ("id", "cell", "address", "resolved_at")
+    search_fields = ("cell", "address")
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "key", "status_code", "created_at")
+    list_filter = ("status_code",)
+    search_fields = ("key", "user__username")
+    list_select_related = ("user",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Expense)
 class ExpenseAdmin(admin.ModelAdmin):
@@ -88,110 +117,37 @@ class ExpenseAdmin(admin.ModelAdmin):
         return super().changelist_view(request, extra_context=extra_context)
 
     def _finance_context(self):
-        sales_orders = Order.objects.exclude(status=Order.Status.CANCELED)
-        sales_items = OrderItem.objects.exclude(
-            order__status=Order.Status.CANCELED
-        ).select_related("product")
-
-        total_revenue = _sum_or_zero(sales_items, REVENUE_EXPR)
-        total_cost = _sum_or_zero(sales_items, COST_EXPR)
-        gross_profit = total_revenue - total_cost
-        total_expense = _as_decimal(Expense.objects.aggregate(total=Sum("amount"))["total"])
-        net_profit = gross_profit - total_expense
-
-        order_count = sales_orders.count()
-        average_check = total_revenue / order_count if order_count else Decimal("0.00")
-        profit_percent = (
-            (net_profit / total_revenue) * Decimal("100")
-            if total_revenue > 0
-            else Decimal("0.00")
+        # Keshdagi lug'at umumiy: o'zgartirmasdan, nusxa sifatida qayta nomlanadi.
+        overview = cached_finance_overview(chart_days=30, top_limit=10)
+        context = {f"finance_{key}": value for key, value in overview.items() if key != "total_orders"}
+        context["finance_product_profit_rows"] = finance_cache.get(
+            ("least_profitable", 10),
+            lambda: FinanceEngine().top_products(limit=10, ordering="profit"),
         )
+        return context
 
-        revenue_periods = [
-            {"label": "1 kun", "value": self._revenue_for_days(sales_items, 1)},
-            {"label": "7 kun", "value": self._revenue_for_days(sales_items, 7)},
-            {"label": "30 kun", "value": self._revenue_for_days(sales_items, 30)},
-            {"label": "90 kun", "value": self._revenue_for_days(sales_items, 90)},
-            {"label": "Barchasi", "value": total_revenue},
-        ]
-
-        product_profit_rows = self._product_profit_rows(sales_items)
-        top_products = product_profit_rows[:10]
-        daily_revenue_chart = self._daily_revenue_chart(sales_items, days=30)
-
-        return {
-            "finance_total_revenue": total_revenue,
-            "finance_total_expense": total_expense,
-            "finance_total_cost": total_cost,
-            "finance_gross_profit": gross_profit,
-            "finance_net_profit": net_profit,
-            "finance_average_check": average_check,
-            "finance_profit_percent": profit_percent,
-            "finance_revenue_periods": revenue_periods,
-            "finance_daily_revenue_chart": daily_revenue_chart,
-            "finance_product_profit_rows": product_profit_rows,
-            "finance_top_products": top_products,
-        }
-
-    def _revenue_for_days(self, sales_items, days):
-        since = timezone.now() - timedelta(days=days)
-        return _sum_or_zero(sales_items.filter(order__created_at__gte=since), REVENUE_EXPR)
-
-    def _daily_revenue_chart(self, sales_items, days=30):
-        start_day = timezone.localdate() - timedelta(days=days - 1)
-
-        daily_rows = (
-            sales_items.filter(order__created_at__date__gte=start_day)
-            .annotate(day=TruncDate("order__created_at"))
-            .values("day")
-            .annotate(revenue=Sum(REVENUE_EXPR))
-            .order_by("day")
-        )
-        daily_map = {row["day"]: _as_decimal(row["revenue"]) for row in daily_rows}
-
-        points = []
-        for offset in range(days):
-            day = start_day + timedelta(days=offset)
-            revenue = daily_map.get(day, Decimal("0.00"))
-            points.append({"label": day.strftime("%d-%m"), "revenue": revenue})
-
-        max_revenue = max((point["revenue"] for point in points), default=Decimal("0.00"))
-        for point in points:
-            if max_revenue > 0:
-                point["percent"] = float((point["revenue"] / max_revenue) * Decimal("100"))
-            else:
-                point["percent"] = 0.0
-
-        return points
-
-    def _product_profit_rows(self, sales_items):
-        rows = (
-            sales_items.values("product_id", "product__name")
-            .annotate(
-                quantity_sold=Sum("quantity"),
-                revenue=Sum(REVENUE_EXPR),
-                cost=Sum(COST_EXPR),
-            )
-            .order_by("-revenue")
-        )
 
-        product_rows = []
-        for row in rows:
-            revenue = _as_decimal(row["revenue"])
-            cost = _as_decimal(row["cost"])
-            profit = revenue - cost
-            margin_percent = (
-                (profit / revenue) * Decimal("100") if revenue > 0 else Decimal("0.00")
-            )
-            product_rows.append(
-                {
-                    "product_id": row["product_id"],
-                    "name": row["product__name"],
-                    "quantity_sold": row["quantity_sold"] or 0,
-                    "revenue": revenue,
-                    "cost": cost,
-                    "profit": profit,
-                    "margin_percent": margin_percent,
-                }
-            )
-        return product_rows
+@admin.register(DemandForecast)
+class DemandForecastAdmin(admin.ModelAdmin):
+    """Buyurtma ro'yxati: `manage.py forecast_demand` qayta hisoblaydi."""
+
+    list_display = (
+        "product",
+        "daily_demand",
+        "stock",
+        "days_of_cover",
+        "reorder_quantity",
+        "needs_reorder",
+        "method",
+        "computed_at",
+    )
+    list_filter = ("needs_reorder", "method")
+    search_fields = ("product__name",)
+    list_select_related = ("product",)
+    ordering = ("days_of_cover",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,265 @@
+import json
+import math
+import tracemalloc
+from collections import namedtuple
+from pathlib import Path
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from catalog.cache import CATALOG_VERSION, get_cache_version
+from catalog.models import CacheVersion, Product
+from users.models import Courier
+from .cart import apply_cart_batch, get_cart_for_update
+from .finance import FINANCE_VERSION, finance_cache
+from .models import Order
+
+
+BASELINE_PATH = Path(__file__).resolve().parent / "bench_baseline.json"
+BENCH_ADMIN_USERNAME = "bench-admin"
+SEARCH_TERM = "sement"
+
+BenchCase = namedtuple("BenchCase", ["name", "method", "path", "user", "data", "setup"])
+BenchResult = namedtuple("BenchResult", ["p50_ms", "p95_ms", "queries", "memory_kb"])
+
+
+class BenchmarkError(Exception):
+    """Benchmark ishga tushmadi: ma'lumot yetarli emas yoki endpoint xato qaytardi."""
+
+
+def bench_fixtures():
+    """
+    Seed qilingan bazadan benchmark ishtirokchilari: eng ko'p buyurtmali mijoz va kurer,
+    zaxirasi yetarli faol mahsulotlar va moliya uchun admin (bo'lmasa yaratiladi).
+    Kesh versiyasi qatorlari ham oldindan yaratiladi: aks holda bekor qilinadigan
+    tranzaksiyada har bir checkout ularni qayta yaratib so'rovlar sonini oshiradi.
+    """
+    customer_id = (
+        Order.objects.values("user")
+        .annotate(n=Count("pk"))
+        .order_by("-n")
+        .values_list("user", flat=True)
+        .first()
+    )
+    courier = (
+        Courier.objects.annotate(n=Count("orders")).filter(n__gt=0).order_by("-n").first()
+    )
+    products = list(
+        Product.objects.filter(is_active=True, stock__gte=100)
+        .order_by("pk")
+        .values_list("pk", flat=True)[:3]
+    )
+    if customer_id is None or courier is None or len(products) < 3:
+        raise BenchmarkError(
+            "Bazada buyurtma, kurer va zaxirali mahsulotlar yo'q: avval `seed_store` ishlating."
+        )
+
+    for name in (CATALOG_VERSION, FINANCE_VERSION):
+        get_cache_version(name)
+    User = get_user_model()
+    admin, _ = User.objects.get_or_create(
+        username=BENCH_ADMIN_USERNAME, defaults={"is_staff": True, "is_superuser": True}
+    )
+    return {
+        "customer": User.objects.get(pk=customer_id),
+        "admin": admin,
+        "courier": courier,
+        "products": products,
+    }
+
+
+def expire_catalog_cache():
+    # `bump_catalog_version` commitdan keyin ishlaydi, benchmark tranzaksiyasi esa bekor
+    # qilinadi: versiya shu tranzaksiya ichida to'g'ridan-to'g'ri oshiriladi.
+    CacheVersion.objects.filter(pk=CATALOG_VERSION).update(version=F("version") + 1)
+
+
+def bench_cases(fixtures):
+    """
+    Asosiy endpointlar. `setup` har bir o'lchovdan oldin chaqiriladi, vaqt va so'rovlar
+    hisobiga kirmaydi.
+    """
+    customer = fixtures["customer"]
+    admin = fixtures["admin"]
+    products = fixtures["products"]
+
+    def fill_cart():
+        apply_cart_batch(
+            get_cart_for_update(customer), {product_id: 1 for product_id in products}, replace=True
+        )
+
+    # `_cold` variantlar keshni har safar tozalaydi: bazaga tushadigan yo'l o'lchanadi.
+    return [
+        BenchCase("product_list", "get", reverse("product-list"), None, None, None),
+        BenchCase(
+            "product_list_cold", "get", reverse("product-list"), None, None, expire_catalog_cache
+        ),
+        BenchCase(
+            "product_search", "get", reverse("product-list"), None, {"search": SEARCH_TERM}, None
+        ),
+        BenchCase(
+            "product_search_cold",
+            "get",
+            reverse("product-list"),
+            None,
+            {"search": SEARCH_TERM},
+            expire_catalog_cache,
+        ),
+        BenchCase(
+            "cart_add",
+            "post",
+            reverse("cart-items"),
+            customer,
+            {"product": products[0], "quantity": 1},
+            None,
+        ),
+        BenchCase(
+            "checkout",
+            "post",
+            reverse("order-list"),
+            customer,
+            {"delivery_type": "pickup", "payment_method": "cash"},
+            fill_cart,
+        ),
+        BenchCase("order_list", "get", reverse("order-list"), customer, None, None),
+        BenchCase("finance_overview", "get", reverse("finance-overview"), admin, None, None),
+        BenchCase(
+            "finance_overview_cold",
+            "get",
+            reverse("finance-overview"),
+            admin,
+            None,
+            finance_cache.clear,
+        ),
+        BenchCase(
+            "courier_orders",
+            "get",
+            reverse("courier-orders", args=[fixtures["courier"].pk]),
+            admin,
+            None,
+            None,
+        ),
+    ]
+
+
+def percentile(samples, fraction):
+    """Eng yaqin rang (nearest-rank) bo'yicha persentil."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def _request(client, case):
+    # Benchmark tranzaksiyasi commit bo'lmaydi: on_commit ishlari (kesh versiyalari,
+    # geokod, dispetcher) so'rovning o'zida bajariladi va vaqt/so'rovlar hisobiga kiradi.
+    with TestCase.captureOnCommitCallbacks(execute=True):
+        if case.method == "get":
+            response = client.get(case.path, case.data)
+        else:
+            response = client.post(case.path, case.data, format="json")
+    if response.status_code >= 400:
+        raise BenchmarkError(f"{case.name}: {response.status_code} {response.content[:200]!r}")
+    return response
+
+
+def measure(case, iterations=50, warmup=3):
+    """
+    Latency - `iterations` ta o'lchovning p50/p95 (ms). So'rovlar soni va ajratilgan
+    xotira (tracemalloc cho'qqisi, KB) alohida bitta o'tishda: ular vaqtni buzmasin.
+    """
+    client = APIClient()
+    client.force_authenticate(user=case.user)
+
+    def prepare():
+        if case.setup is not None:
+            case.setup()
+
+    for _ in range(warmup):
+        prepare()
+        _request(client, case)
+
+    samples = []
+    for _ in range(iterations):
+        prepare()
+        started = perf_counter()
+        _request(client, case)
+        samples.append((perf_counter() - started) * 1000)
+
+    prepare()
+    tracemalloc.start()
+    try:
+        with CaptureQueriesContext(connection) as queries:
+            _request(client, case)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return BenchResult(
+        p50_ms=round(percentile(samples, 0.5), 2),
+        p95_ms=round(percentile(samples, 0.95), 2),
+        queries=len(queries),
+        memory_kb=round(peak / 1024, 1),
+    )
+
+
+def run_benchmarks(iterations=50, warmup=3, only=None):
+    """
+    Barcha endpointlarni o'lchaydi. Hammasi bitta tranzaksiyada bajarilib oxirida
+    bekor qilinadi: checkout va savat o'zgarishlari seed ma'lumotini buzmaydi.
+    Commitdan keyingi ishlar har bir so'rov ichida bajariladi (`_request`).
+    """
+    results = {}
+    with transaction.atomic():
+        for case in bench_cases(bench_fixtures()):
+            if only and case.name not in only:
+                continue
+            results[case.name] = measure(case, iterations=iterations, warmup=warmup)
+        transaction.set_rollback(True)
+    return results
+
+
+def load_baseline(path=BASELINE_PATH):
+    with open(path, encoding="utf-8") as baseline_file:
+        return json.load(baseline_file)
+
+
+def save_baseline(results, path=BASELINE_PATH, dataset=""):
+    data = {
+        "dataset": dataset,
+        "endpoints": {name: result._asdict() for name, result in sorted(results.items())},
+    }
+    with open(path, "w", encoding="utf-8") as baseline_file:
+        json.dump(data, baseline_file, indent=2, ensure_ascii=False)
+        baseline_file.write("\n")
+
+
+def budget_violations(
+    results, baseline, latency_tolerance=0.5, latency_slack_ms=5.0, memory_tolerance=0.5
+):
+    """
+    Bazaviy natijadan oshganlar ro'yxati. So'rovlar soni aniq byudjet (oshmasligi
+    kerak); p95 va xotira `tolerance` ulushicha oshishi mumkin - mashinalar farqi uchun.
+    Bir necha millisekundlik endpointlarda shovqin nisbiy chegaradan katta, shuning
+    uchun p95 ga kamida `latency_slack_ms` qo'shimcha ruxsat beriladi.
+    """
+    violations = []
+    endpoints = baseline.get("endpoints", {})
+    for name, result in results.items():
+        budget = endpoints.get(name)
+        if budget is None:
+            violations.append(f"{name}: bazaviy natija yo'q (--update-baseline)")
+            continue
+        if result.queries > budget["queries"]:
+            violations.append(f"{name}: SQL so'rovlar {result.queries} > {budget['queries']}")
+        limit = max(budget["p95_ms"] * (1 + latency_tolerance), budget["p95_ms"] + latency_slack_ms)
+        if result.p95_ms > limit:
+            violations.append(f"{name}: p95 {result.p95_ms} ms > {limit:.2f} ms")
+        limit = budget["memory_kb"] * (1 + memory_tolerance)
+        if result.memory_kb > limit:
+            violations.append(f"{name}: xotira {result.memory_kb} KB > {limit:.1f} KB")
+    return violations
@@ -0,0 +1,158 @@
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from catalog.models import Product
+from .models import Cart, CartItem
+
+
+ZERO = Decimal("0.00")
+
+
+def cart_totals_update(carts):
+    """
+    `Cart.item_count`/`subtotal` ni qatorlardan qayta hisoblaydi - bitta UPDATE,
+    qiymatlar subquery bilan, shuning uchun parallel o'zgarishlarda ham siljimaydi.
+    """
+    items = CartItem.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+    return carts.update(
+        item_count=Coalesce(
+            Subquery(items.annotate(total=Sum("quantity")).values("total")), Value(0)
+        ),
+        subtotal=Coalesce(
+            Subquery(
+                items.annotate(
+                    total=Sum(
+                        F("quantity") * F("product__price"),
+                        output_field=DecimalField(max_digits=14, decimal_places=2),
+                    )
+                ).values("total")
+            ),
+            Value(ZERO),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+        updated_at=timezone.now(),
+    )
+
+
+def refresh_cart_totals(cart_id):
+    cart_totals_update(Cart.objects.filter(pk=cart_id))
+
+
+def get_cart_for_update(user):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    return cart
+
+
+def load_cart(user):
+    """
+    Savat o'qish modeli: savat va barcha qatorlar mahsuloti bilan - 2 ta so'rov,
+    qatorlar soniga bog'liq emas. Jami summa savatning o'zida saqlanadi.
+    """
+    items = CartItem.objects.select_related("product").order_by("pk")
+    cart = Cart.objects.filter(user=user).prefetch_related(Prefetch("items", queryset=items)).first()
+    if cart is None:
+        cart = Cart.objects.create(user=user)
+        cart._prefetched_objects_cache = {"items": CartItem.objects.none()}
+    return cart
+
+
+def load_cart_item(cart, product_id):
+    """O'zgargan qator va yangilangan savat jami - bitta JOIN so'rov."""
+    return CartItem.objects.select_related("product", "cart").get(cart=cart, product_id=product_id)
+
+
+@transaction.atomic
+def add_item(cart, product, quantity):
+    """Qator bo'lsa soni `F()` bilan oshiriladi, bo'lmasa yaratiladi. Qaytaradi: (qator, yaratildimi)."""
+    now = timezone.now()
+    created = False
+    updated = CartItem.objects.filter(cart=cart, product=product).update(
+        quantity=F("quantity") + quantity, updated_at=now
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+            created = True
+        except IntegrityError:
+            # Parallel so'rov qatorni birinchi yaratdi: unga qo'shamiz.
+            CartItem.objects.filter(cart=cart, product=product).update(
+                quantity=F("quantity") + quantity, updated_at=now
+            )
+    refresh_cart_totals(cart.pk)
+    return load_cart_item(cart, product.pk), created
+
+
+@transaction.atomic
+def set_item_quantity(item, quantity):
+    CartItem.objects.filter(pk=item.pk).update(quantity=quantity, updated_at=timezone.now())
+    refresh_cart_totals(item.cart_id)
+    return load_cart_item(item.cart_id, item.product_id)
+
+
+@transaction.atomic
+def remove_item(item):
+    item.delete()
+    refresh_cart_totals(item.cart_id)
+
+
+@transaction.atomic
+def clear_cart(cart_id):
+    CartItem.objects.filter(cart_id=cart_id).delete()
+    Cart.objects.filter(pk=cart_id).update(item_count=0, subtotal=ZERO, updated_at=timezone.now())
+
+
+@transaction.atomic
+def apply_cart_batch(cart, quantities, remove=(), replace=False):
+    """
+    Savatni bitta tranzaksiyada sinxronlaydi: `quantities` ({product_id: soni}) qatorlari
+    `INSERT ... ON CONFLICT (cart, product) DO UPDATE` bilan yoziladi, `remove` dagilar
+    (va `replace=True` bo'lsa ro'yxatda yo'qlari) bitta DELETE bilan o'chadi.
+    """
+    keep = {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+    drop = set(remove) | {product_id for product_id, quantity in quantities.items() if quantity <= 0}
+
+    if keep:
+        CartItem.objects.bulk_create(
+            [
+                CartItem(cart=cart, product_id=product_id, quantity=quantity)
+                for product_id, quantity in keep.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["cart", "product"],
+            update_fields=["quantity", "updated_at"],
+        )
+    stale = CartItem.objects.filter(cart=cart)
+    if replace:
+        stale = stale.exclude(product_id__in=keep.keys())
+    else:
+        stale = stale.filter(product_id__in=drop)
+    if replace or drop:
+        stale.delete()
+    refresh_cart_totals(cart.pk)
+
+
+def merge_into_cart(cart, quantities):
+    """
+    Mehmon savati foydalanuvchi savatiga qo'shiladi: savatda bor mahsulot uchun kattaroq
+    son olinadi (jamlanmaydi), shuning uchun bir cookie bilan qayta birlashtirish hech
+    narsani o'zgartirmaydi. Nofaol mahsulotlar tashlanadi.
+    """
+    active = set(
+        Product.objects.filter(pk__in=quantities.keys(), is_active=True).values_list("pk", flat=True)
+    )
+    existing = dict(
+        CartItem.objects.filter(cart=cart, product_id__in=active).values_list("product_id", "quantity")
+    )
+    apply_cart_batch(
+        cart,
+        {
+            product_id: max(existing.get(product_id, 0), quantity)
+            for product_id, quantity in quantities.items()
+            if product_id in active and quantity > existing.get(product_id, 0)
+        },
+    )
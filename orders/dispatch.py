@@ -0,0 +1,142 @@
+from bisect import bisect_left, insort
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from users.models import Courier
+from .models import Order, OrderItem
+
+
+DispatchResult = namedtuple("DispatchResult", ["assignments", "unassigned"])
+
+OPEN_STATUSES = (Order.Status.CREATED, Order.Status.PAID)
+MIN_ORDER_VOLUME = Decimal("0.01")
+UPDATE_CHUNK_SIZE = 500
+
+LOAD_OUTPUT = DecimalField(max_digits=18, decimal_places=2)
+
+
+def _load(prefix=""):
+    zero = Value(Decimal("0.00"), output_field=LOAD_OUTPUT)
+    return {
+        "volume": Coalesce(
+            Sum(F(f"{prefix}quantity") * F(f"{prefix}product__volume"), output_field=LOAD_OUTPUT),
+            zero,
+        ),
+        "weight": Coalesce(
+            Sum(F(f"{prefix}quantity") * F(f"{prefix}product__weight"), output_field=LOAD_OUTPUT),
+            zero,
+        ),
+    }
+
+
+def pending_courier_orders(order_ids=None):
+    """Kurersiz ochiq courier buyurtmalar: (id, hajm, og'irlik), bitta GROUP BY so'rovda."""
+    queryset = Order.objects.filter(
+        delivery_type=Order.DeliveryType.COURIER,
+        courier__isnull=True,
+        status__in=OPEN_STATUSES,
+    )
+    if order_ids is not None:
+        queryset = queryset.filter(pk__in=order_ids)
+    return [
+        (order_id, max(volume, MIN_ORDER_VOLUME), weight)
+        for order_id, volume, weight in queryset.order_by()
+        .annotate(**_load("items__"))
+        .values_list("id", "volume", "weight")
+    ]
+
+
+def courier_free_capacity(min_volume=Decimal("0"), min_weight=Decimal("0")):
+    """
+    Faol kurerlar sig'imidan CREATED/PAID buyurtmalarga band qilingan yuk ayiriladi.
+    Mashinasiga eng kichik buyurtma ham sig'maydigan kurerlar olinmaydi, band yuk esa
+    faqat qolgan nomzodlar uchun yig'iladi (bitta buyurtmali checkout barcha ochiq
+    buyurtmalarni aylanib chiqmaydi).
+    """
+    couriers = list(
+        Courier.objects.filter(is_active=True, car_capacity__gte=min_volume)
+        .filter(Q(car_max_weight__isnull=True) | Q(car_max_weight__gte=min_weight))
+        .values_list("id", "car_capacity", "car_max_weight")
+    )
+    if not couriers:
+        return {}
+    committed = {
+        row["order__courier_id"]: row
+        for row in OrderItem.objects.filter(
+            order__courier_id__in=[courier_id for courier_id, _, _ in couriers],
+            order__status__in=OPEN_STATUSES,
+        )
+        .order_by()
+        .values("order__courier_id")
+        .annotate(**_load())
+    }
+    capacity = {}
+    for courier_id, car_capacity, car_max_weight in couriers:
+        load = committed.get(courier_id, {"volume": Decimal("0"), "weight": Decimal("0")})
+        weight = None if car_max_weight is None else car_max_weight - load["weight"]
+        capacity[courier_id] = (car_capacity - load["volume"], weight)
+    return capacity
+
+
+def pack_orders(orders, capacity):
+    """
+    Best-fit decreasing: buyurtmalar hajm bo'yicha kamayish tartibida, har biri
+    bo'sh hajmi eng kam bo'lgan va og'irligi ham sig'adigan mashinaga joylanadi.
+    Mashinalar bo'sh hajm bo'yicha saralangan ro'yxatda turadi, shuning uchun
+    mos mashina bisect bilan topiladi.
+    """
+    bins = sorted((volume, courier_id) for courier_id, (volume, _) in capacity.items())
+    free_weight = {courier_id: weight for courier_id, (_, weight) in capacity.items()}
+    assignments = defaultdict(list)
+    unassigned = []
+
+    for order_id, volume, weight in sorted(orders, key=lambda order: order[1], reverse=True):
+        index = bisect_left(bins, (volume,))
+        while index < len(bins):
+            courier_id = bins[index][1]
+            if free_weight[courier_id] is None or free_weight[courier_id] >= weight:
+                break
+            index += 1
+        else:
+            unassigned.append(order_id)
+            continue
+
+        remaining, courier_id = bins.pop(index)
+        insort(bins, (remaining - volume, courier_id))
+        if free_weight[courier_id] is not None:
+            free_weight[courier_id] -= weight
+        assignments[courier_id].append(order_id)
+
+    return DispatchResult(dict(assignments), unassigned)
+
+
+def dispatch_courier_orders(order_ids=None):
+    """
+    Kurersiz courier buyurtmalarni mashinalarga taqsimlaydi va barcha biriktirishlarni
+    bitta tranzaksiyada yozadi (har bir kurer uchun bitta UPDATE). `order_ids` berilmasa
+    barcha kutayotgan buyurtmalar olinadi.
+    """
+    with transaction.atomic():
+        orders = pending_courier_orders(order_ids)
+        if not orders:
+            return DispatchResult({}, [])
+        capacity = courier_free_capacity(
+            min_volume=min(volume for _, volume, _ in orders),
+            min_weight=min(weight for _, _, weight in orders),
+        )
+        result = pack_orders(orders, capacity)
+
+        now = timezone.now()
+        for courier_id, assigned_ids in result.assignments.items():
+            for start in range(0, len(assigned_ids), UPDATE_CHUNK_SIZE):
+                # courier__isnull sharti parallel dispetcher bilan ikki marta biriktirishdan saqlaydi.
+                Order.objects.filter(
+                    pk__in=assigned_ids[start : start + UPDATE_CHUNK_SIZE],
+                    courier__isnull=True,
+                ).update(courier_id=courier_id, updated_at=now)
+    return result
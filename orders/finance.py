@@ -0,0 +1,270 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import Case, Count, ExpressionWrapper, F, Q, Sum, Value, When
+
+from catalog.cache import bump_cache_version, get_cache_version
+from catalog.models import Product
+from .models import DailyProductSales, Expense, Order
+from .rollup import MONEY_OUTPUT, store_today
+from .timeseries import sales_series
+
+
+ZERO = Decimal("0.00")
+REVENUE_WINDOWS = ((1, "1 kun"), (7, "7 kun"), (30, "30 kun"), (90, "90 kun"))
+FINANCE_VERSION = "finance"
+
+
+def _as_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(value or 0)
+
+
+def _percent(part, whole):
+    return (part / whole) * Decimal("100") if whole > 0 else ZERO
+
+
+def product_profitability(start=None, end=None):
+    """
+    Mahsulotlar bo'yicha tushum, tannarx, foyda va marja - hammasi SQL da, kunlik rollupdan.
+    Filtr annotate dan oldin va bitta `filter()` da: ko'p qiymatli bog'lanishga alohida
+    `filter()` chaqiruvlari ikkinchi JOIN qo'shib yig'indilarni ko'paytiradi. JOIN bitta,
+    yig'indi faqat [start, end] kunlarini oladi.
+    """
+    days = {"daily_sales__isnull": False}
+    if start is not None:
+        days["daily_sales__day__gte"] = start
+    if end is not None:
+        days["daily_sales__day__lte"] = end
+    return (
+        Product.objects.filter(**days)
+        .annotate(
+            quantity_sold=Sum("daily_sales__quantity"),
+            revenue=Sum("daily_sales__revenue"),
+            cost=Sum("daily_sales__cost"),
+        )
+        .annotate(
+            profit=ExpressionWrapper(F("revenue") - F("cost"), output_field=MONEY_OUTPUT),
+            margin_percent=Case(
+                When(
+                    revenue__gt=0,
+                    then=ExpressionWrapper(
+                        (F("revenue") - F("cost")) * Value(100) / F("revenue"), output_field=MONEY_OUTPUT
+                    ),
+                ),
+                default=Value(ZERO),
+                output_field=MONEY_OUTPUT,
+            ),
+        )
+        .filter(quantity_sold__gt=0)
+    )
+
+
+class FinanceEngine:
+    """
+    Moliya ko'rsatkichlari, `FinanceOverviewAPIView` va `ExpenseAdmin` uchun umumiy.
+
+    Barcha davrlar va jami summalar kunlik rollup ustidan bitta o'tishda,
+    shartli `Sum(..., filter=Q(day__gte=...))` bilan hisoblanadi; buyurtmalar soni va
+    xarajatlar o'z jadvallarida bittadan aggregate. Grafik va top N mahsulot
+    yana bittadan so'rov - jami 5 ta so'rov, qatorlar soniga bog'liq emas. To'liq
+    mahsulotlar kesimi alohida, sahifalangan endpointda (`product_profitability`).
+    """
+
+    def __init__(self, today=None):
+        self.today = today or store_today()
+        self.sales = DailyProductSales.objects.all()
+
+    def window_start(self, days):
+        return self.today - timedelta(days=days - 1)
+
+    def totals(self):
+        windows = {
+            f"revenue_{days}": Sum(
+                "revenue", filter=Q(day__gte=self.window_start(days)), default=ZERO
+            )
+            for days, _ in REVENUE_WINDOWS
+        }
+        # Alias maydon nomi bilan bir xil bo'lmasligi kerak, aks holda keyingi Sum("revenue")
+        # maydonga emas, shu aggregatga ishora qiladi.
+        totals = self.sales.aggregate(
+            total_revenue=Sum("revenue", default=ZERO),
+            total_cost=Sum("cost", default=ZERO),
+            **windows,
+        )
+        totals["orders"] = Order.objects.aggregate(
+            count=Count("pk", filter=~Q(status=Order.Status.CANCELED))
+        )["count"]
+        totals["expense"] = Expense.objects.aggregate(total=Sum("amount", default=ZERO))["total"]
+        return {
+            key: value if key == "orders" else _as_decimal(value) for key, value in totals.items()
+        }
+
+    def daily_revenue_chart(self, days=30):
+        series = sales_series("day", self.window_start(days), self.today)
+        revenues = series["revenue"]
+        max_revenue = max(revenues, default=ZERO)
+        return [
+            {
+                "date": date,
+                "label": f"{date[8:10]}-{date[5:7]}",
+                "revenue": revenue,
+                "percent": float(_percent(revenue, max_revenue)),
+            }
+            for date, revenue in zip(series["dates"], revenues)
+        ]
+
+    def top_products(self, limit=10, ordering="-revenue"):
+        rows = (
+            product_profitability()
+            .order_by(ordering, "pk")
+            .values("name", "quantity_sold", "revenue", "cost", "profit", "margin_percent")
+            .annotate(product_id=F("pk"))
+        )
+        return list(rows[:limit])
+
+    def overview(self, chart_days=30, top_limit=10):
+        totals = self.totals()
+        gross_profit = totals["total_revenue"] - totals["total_cost"]
+        net_profit = gross_profit - totals["expense"]
+        order_count = totals["orders"]
+
+        return {
+            "total_revenue": totals["total_revenue"],
+            "total_expense": totals["expense"],
+            "total_cost": totals["total_cost"],
+            "gross_profit": gross_profit,
+            "net_profit": net_profit,
+            "average_check": totals["total_revenue"] / order_count if order_count else ZERO,
+            "profit_percent": _percent(net_profit, totals["total_revenue"]),
+            "total_orders": order_count,
+            "revenue_periods": [
+                {"label": label, "value": totals[f"revenue_{days}"]}
+                for days, label in REVENUE_WINDOWS
+            ]
+            + [{"label": "Barchasi", "value": totals["total_revenue"]}],
+            "daily_revenue_chart": self.daily_revenue_chart(days=chart_days),
+            "top_products": self.top_products(limit=top_limit),
+        }
+
+
+def get_finance_version():
+    return get_cache_version(FINANCE_VERSION)
+
+
+def invalidate_finance_cache():
+    # Versiya bazada (catalog.CacheVersion): boshqa workerlarning yozuvlari ham eskiradi.
+    bump_cache_version(FINANCE_VERSION)
+
+
+CacheEntry = namedtuple("CacheEntry", ["value", "version", "computed_at"])
+
+
+class SingleFlightCache:
+    """
+    Jarayon ichidagi TTL kesh:
+
+    * bir xil kalit bo'yicha parallel so'rovlar bitta hisobni kutadi (single-flight);
+    * FINANCE_CACHE_TTL o'tgach yana FINANCE_CACHE_STALE davomida eski qiymat
+      qaytariladi va fonda yangilanadi (stale-while-revalidate);
+    * `get_finance_version()` o'zgarsa (Expense/Order yozildi) yozuv yaroqsiz;
+    * yozuvlar soni FINANCE_CACHE_MAX_ENTRIES bilan cheklangan (LRU), yangi yozuv
+      qo'shilganda eskirgan va eski versiyadagilari o'chiriladi - `cached_sales_series`
+      kalitida foydalanuvchi sanalari bor.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get(self, key, compute):
+        version = get_finance_version()
+        stale = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(key)
+                age = time.monotonic() - entry.computed_at
+                if age < settings.FINANCE_CACHE_TTL:
+                    return entry.value
+                stale = age < settings.FINANCE_CACHE_TTL + settings.FINANCE_CACHE_STALE
+
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if stale:
+            if leader:
+                self._schedule_refresh(key, compute, version)
+            return entry.value
+
+        if not leader:
+            event.wait(timeout=settings.FINANCE_CACHE_WAIT)
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is not None and entry.version == version:
+                return entry.value
+            return compute()
+
+        return self._compute(key, compute, version)
+
+    def _compute(self, key, compute, version):
+        try:
+            value = compute()
+            with self._lock:
+                self._store(key, CacheEntry(value, version, time.monotonic()))
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key).set()
+
+    def _store(self, key, entry):
+        # Lock ostida chaqiriladi.
+        horizon = settings.FINANCE_CACHE_TTL + settings.FINANCE_CACHE_STALE
+        for old_key, old in list(self._entries.items()):
+            if old.version < entry.version or entry.computed_at - old.computed_at >= horizon:
+                del self._entries[old_key]
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > settings.FINANCE_CACHE_MAX_ENTRIES:
+            self._entries.popitem(last=False)
+
+    def _schedule_refresh(self, key, compute, version):
+        if not settings.FINANCE_REFRESH_IN_BACKGROUND:
+            self._compute(key, compute, version)
+            return
+
+        def refresh():
+            close_old_connections()
+            try:
+                self._compute(key, compute, version)
+            finally:
+                connection.close()
+
+        threading.Thread(target=refresh, name="finance-refresh", daemon=True).start()
+
+
+finance_cache = SingleFlightCache()
+
+
+def cached_sales_series(granularity, start, end):
+    return finance_cache.get(
+        ("series", granularity, start, end), lambda: sales_series(granularity, start, end)
+    )
+
+
+def cached_finance_overview(chart_days=30, top_limit=10):
+    return finance_cache.get(
+        ("overview", chart_days, top_limit),
+        lambda: FinanceEngine().overview(chart_days=chart_days, top_limit=top_limit),
+    )
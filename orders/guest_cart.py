@@ -0,0 +1,97 @@
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import signing
+
+from catalog.models import Product
+from .cart import get_cart_for_update, merge_into_cart
+
+
+SALT = "orders.guest_cart"
+ZERO = Decimal("0.00")
+
+
+def read_guest_cart(request):
+    """Cookie dagi mehmon savati: {product_id: soni}. Buzilgan/eskirgan cookie - bo'sh savat."""
+    raw = request.COOKIES.get(settings.GUEST_CART_COOKIE_NAME)
+    if not raw:
+        return {}
+    try:
+        pairs = signing.loads(raw, salt=SALT, max_age=settings.GUEST_CART_MAX_AGE)
+        quantities = {int(product_id): int(quantity) for product_id, quantity in pairs}
+    except (signing.BadSignature, TypeError, ValueError):
+        return {}
+    return {product_id: quantity for product_id, quantity in quantities.items() if quantity > 0}
+
+
+def write_guest_cart(response, quantities):
+    """Savat cookie ga `[[product_id, soni], ...]` ko'rinishida, imzolangan va siqilgan holda yoziladi."""
+    if not quantities:
+        forget_guest_cart(response)
+        return
+    response.set_cookie(
+        settings.GUEST_CART_COOKIE_NAME,
+        signing.dumps(sorted(quantities.items()), salt=SALT, compress=True),
+        max_age=settings.GUEST_CART_MAX_AGE,
+        httponly=True,
+        samesite="Lax",
+        secure=settings.SESSION_COOKIE_SECURE,
+    )
+
+
+def forget_guest_cart(response):
+    response.delete_cookie(settings.GUEST_CART_COOKIE_NAME, samesite="Lax")
+
+
+def apply_guest_batch(quantities, items, remove=(), replace=False):
+    """`CartBatchSerializer` bilan bir xil ma'no, lekin xotirada: bazaga yozilmaydi."""
+    result = {} if replace else dict(quantities)
+    for product_id in remove:
+        result.pop(product_id, None)
+    for product_id, quantity in items.items():
+        if quantity > 0:
+            result[product_id] = quantity
+        else:
+            result.pop(product_id, None)
+    return result
+
+
+def guest_cart_data(quantities):
+    """`CartSerializer` shaklidagi javob: narxlar bitta so'rov bilan, nofaol mahsulotlarsiz."""
+    products = Product.objects.filter(pk__in=quantities.keys(), is_active=True).only("name", "price")
+    items = []
+    subtotal = ZERO
+    for product in sorted(products, key=lambda product: product.pk):
+        quantity = quantities[product.pk]
+        line_total = product.price * quantity
+        subtotal += line_total
+        items.append(
+            {
+                "id": None,
+                "product": product.pk,
+                "product_name": product.name,
+                "price": product.price,
+                "quantity": quantity,
+                "line_total": line_total,
+            }
+        )
+    return {
+        "id": None,
+        "guest": True,
+        "items": items,
+        "item_count": sum(item["quantity"] for item in items),
+        "subtotal": subtotal,
+        "total_price": subtotal,
+    }
+
+
+def merge_guest_cart(request, user):
+    """
+    Kirish yoki checkout da mehmon savati foydalanuvchi `Cart` iga qo'shiladi (bitta
+    bulk upsert, `merge_into_cart` - takrorlansa ham natija bir xil). Qaytaradi: cookie
+    da savat bormidi - bor bo'lsa javobda o'chirish kerak.
+    """
+    quantities = read_guest_cart(request)
+    if quantities:
+        merge_into_cart(get_cart_for_update(user), quantities)
+    return settings.GUEST_CART_COOKIE_NAME in request.COOKIES
@@ -0,0 +1,148 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+MAX_POLL_INTERVAL = 0.5
+
+
+def request_fingerprint(request):
+    """Bir kalit bilan boshqa so'rov yuborilganini aniqlash uchun: usul, yo'l va tana xeshi."""
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method}:{request.path}:{body}".encode()).hexdigest()
+
+
+def expired_keys(now=None):
+    now = now or timezone.now()
+    return IdempotencyKey.objects.filter(
+        created_at__lt=now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+    )
+
+
+def purge_expired_keys():
+    deleted, _ = expired_keys().delete()
+    return deleted
+
+
+def _replay(record):
+    return Response(
+        record.response, status=record.status_code, headers={REPLAYED_HEADER: "true"}
+    )
+
+
+def _error(detail, status_code, headers=None):
+    return Response({"detail": detail}, status=status_code, headers=headers)
+
+
+def claim_key(user, key, fingerprint):
+    """
+    Kalitni egallaydi. Qaytaradi: (yozuv, None) - so'rovni bajarish kerak, yoki
+    (None, javob) - saqlangan javob yoki xato.
+
+    Yozuv alohida tranzaksiyada yaratiladi, shuning uchun boshqa jarayonlar ham uni
+    darhol ko'radi: (user, key) unique cheklovi qulf vazifasini bajaradi. Bajarilayotgan
+    urinishni takroriy so'rov `IDEMPOTENCY_WAIT` gacha kutadi, checkout ni qayta boshlamaydi.
+    """
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    delay = POLL_INTERVAL
+    while True:
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, key=key, fingerprint=fingerprint), None
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            # Birinchi urinish muvaffaqiyatsiz tugab kalitni bo'shatdi.
+            continue
+
+        now = timezone.now()
+        if record.status_code is not None:
+            if record.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL):
+                IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+                continue
+            if record.fingerprint != fingerprint:
+                return None, _error(
+                    "Bu Idempotency-Key boshqa so'rov bilan ishlatilgan.",
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+            return None, _replay(record)
+
+        if record.fingerprint != fingerprint:
+            return None, _error(
+                "Bu Idempotency-Key boshqa so'rov bilan ishlatilmoqda.",
+                status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        if record.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            # Egasi javob yozmasdan to'xtagan: kalitni bitta so'rov qayta egallaydi.
+            taken = IdempotencyKey.objects.filter(
+                pk=record.pk, status_code__isnull=True, created_at=record.created_at
+            ).update(created_at=now)
+            if taken:
+                record.created_at = now
+                return record, None
+            continue
+        if time.monotonic() >= deadline:
+            return None, _error(
+                "Shu kalit bilan so'rov hali bajarilmoqda, birozdan keyin qayta urinib ko'ring.",
+                status.HTTP_409_CONFLICT,
+                headers={"Retry-After": str(max(1, int(settings.IDEMPOTENCY_WAIT)))},
+            )
+        time.sleep(delay)
+        delay = min(delay * 2, MAX_POLL_INTERVAL)
+
+
+def store_response(record, response):
+    """Muvaffaqiyatli javob saqlanadi; xato bo'lsa kalit bo'shatiladi - mijoz shu kalit bilan qayta urinadi."""
+    if not status.is_success(response.status_code):
+        release_key(record)
+        return
+    IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).update(
+        status_code=response.status_code,
+        response=json.loads(JSONRenderer().render(response.data)),
+    )
+
+
+def release_key(record):
+    IdempotencyKey.objects.filter(pk=record.pk, created_at=record.created_at).delete()
+
+
+def run_idempotent(request, handler):
+    """
+    `handler()` ni `Idempotency-Key` bo'yicha bir marta bajaradi. Sarlavha bo'lmasa
+    oddiy so'rov; bo'lsa (user, key) uchun birinchi muvaffaqiyatli javob qaytariladi.
+    """
+    key = request.headers.get(HEADER)
+    if not key:
+        return handler()
+    if len(key) > MAX_KEY_LENGTH:
+        return _error(
+            f"Idempotency-Key {MAX_KEY_LENGTH} belgidan oshmasligi kerak.",
+            status.HTTP_400_BAD_REQUEST,
+        )
+
+    record, response = claim_key(request.user, key, request_fingerprint(request))
+    if response is not None:
+        return response
+    try:
+        response = handler()
+    except BaseException:
+        release_key(record)
+        raise
+    store_response(record, response)
+    return response
@@ -0,0 +1,72 @@
+import threading
+from time import perf_counter
+from types import SimpleNamespace
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connection
+
+from catalog.models import Category, Product
+from orders.serializers import OrderCreateSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Bitta 'issiq' mahsulotga parallel checkout o'tkazib, sekundiga buyurtmalar sonini "
+        "o'lchaydi. Haqiqiy raqobat uchun PostgreSQL'da ishga tushiring."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--orders", type=int, default=50, help="Har bir worker uchun")
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        per_worker = options["orders"]
+        user, _ = get_user_model().objects.get_or_create(username="bench-checkout")
+        category, _ = Category.objects.get_or_create(
+            slug="bench-checkout", defaults={"name": "Bench checkout"}
+        )
+        product, _ = Product.objects.get_or_create(
+            name="Bench hot SKU",
+            category=category,
+            defaults={"price": 100, "stock": 0},
+        )
+        Product.objects.filter(pk=product.pk).update(stock=workers * per_worker)
+
+        results = {"ok": 0, "failed": 0}
+        lock = threading.Lock()
+
+        def worker():
+            request = SimpleNamespace(user=user)
+            try:
+                for _ in range(per_worker):
+                    serializer = OrderCreateSerializer(
+                        data={"items": [{"product": product.pk, "quantity": 1}]},
+                        context={"request": request},
+                    )
+                    try:
+                        serializer.is_valid(raise_exception=True)
+                        serializer.save()
+                        outcome = "ok"
+                    except DatabaseError:
+                        outcome = "failed"
+                    with lock:
+                        results[outcome] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(workers)]
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - started
+
+        product.refresh_from_db()
+        self.stdout.write(
+            f"{workers} worker x {per_worker}: {results['ok']} ta buyurtma, "
+            f"{results['failed']} ta xato, {elapsed:.2f} s, "
+            f"{results['ok'] / elapsed:.1f} buyurtma/s, qolgan stock: {product.stock}"
+        )
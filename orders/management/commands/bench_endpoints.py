@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.benchmarks import (
+    BASELINE_PATH,
+    BenchmarkError,
+    budget_violations,
+    load_baseline,
+    run_benchmarks,
+    save_baseline,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Asosiy endpointlarni (katalog, qidiruv, savat, checkout, buyurtmalar, moliya, kurer) "
+        "seed qilingan bazada o'lchaydi: p50/p95, SQL so'rovlar soni, xotira. Natija bazaviy "
+        "JSON bilan solishtiriladi, byudjetdan oshsa buyruq xato bilan tugaydi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--only", nargs="*", help="Faqat shu endpointlar (masalan, checkout).")
+        parser.add_argument("--baseline", default=str(BASELINE_PATH))
+        parser.add_argument(
+            "--update-baseline", action="store_true", help="Joriy natijani bazaviy sifatida yozadi."
+        )
+        parser.add_argument(
+            "--dataset", default="", help="Bazaviy JSON uchun izoh (seed parametrlari)."
+        )
+        parser.add_argument("--latency-tolerance", type=float, default=0.5)
+        parser.add_argument("--latency-slack-ms", type=float, default=5.0)
+        parser.add_argument("--memory-tolerance", type=float, default=0.5)
+
+    def handle(self, *args, **options):
+        try:
+            results = run_benchmarks(
+                iterations=options["iterations"], warmup=options["warmup"], only=options["only"]
+            )
+        except BenchmarkError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(
+            f"{'endpoint':<22} {'p50 ms':>9} {'p95 ms':>9} {'SQL':>5} {'xotira KB':>10}"
+        )
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<22} {result.p50_ms:>9.2f} {result.p95_ms:>9.2f} "
+                f"{result.queries:>5} {result.memory_kb:>10.1f}"
+            )
+
+        if options["update_baseline"]:
+            save_baseline(results, options["baseline"], dataset=options["dataset"])
+            self.stdout.write(self.style.SUCCESS(f"Bazaviy natija yozildi: {options['baseline']}"))
+            return
+
+        try:
+            baseline = load_baseline(options["baseline"])
+        except FileNotFoundError:
+            raise CommandError(
+                f"Bazaviy JSON topilmadi: {options['baseline']} (--update-baseline)"
+            )
+        violations = budget_violations(
+            results,
+            baseline,
+            latency_tolerance=options["latency_tolerance"],
+            latency_slack_ms=options["latency_slack_ms"],
+            memory_tolerance=options["memory_tolerance"],
+        )
+        if violations:
+            raise CommandError("Byudjetdan oshdi:\n" + "\n".join(violations))
+        self.stdout.write(self.style.SUCCESS("Barcha endpointlar byudjet ichida."))
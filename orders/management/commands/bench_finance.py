@@ -0,0 +1,92 @@
+import statistics
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from orders.finance import FinanceEngine
+from orders.models import Expense, Order, OrderItem
+
+
+MONEY_OUTPUT = DecimalField(max_digits=18, decimal_places=2)
+REVENUE_EXPR = ExpressionWrapper(F("price") * F("quantity"), output_field=MONEY_OUTPUT)
+COST_EXPR = ExpressionWrapper(F("cost_price") * F("quantity"), output_field=MONEY_OUTPUT)
+
+
+def _total(queryset, expression):
+    return queryset.aggregate(total=Sum(expression))["total"]
+
+
+def legacy_overview(chart_days=30):
+    """Oldingi hisob: har bir davr, jami va kesim uchun `orders_orderitem` ni alohida skanerlash."""
+    sales_items = OrderItem.objects.exclude(order__status=Order.Status.CANCELED)
+    result = {
+        "total_revenue": _total(sales_items, REVENUE_EXPR),
+        "total_cost": _total(sales_items, COST_EXPR),
+        "total_expense": Expense.objects.aggregate(total=Sum("amount"))["total"],
+        "total_orders": Order.objects.exclude(status=Order.Status.CANCELED).count(),
+    }
+    for days in (1, 7, 30, 90):
+        since = timezone.now() - timedelta(days=days)
+        result[f"revenue_{days}"] = _total(
+            sales_items.filter(order__created_at__gte=since), REVENUE_EXPR
+        )
+    start_day = timezone.localdate() - timedelta(days=chart_days - 1)
+    result["chart"] = list(
+        sales_items.filter(order__created_at__date__gte=start_day)
+        .annotate(day=TruncDate("order__created_at"))
+        .values("day")
+        .annotate(revenue=Sum(REVENUE_EXPR))
+    )
+    result["products"] = list(
+        sales_items.values("product_id", "product__name")
+        .annotate(revenue=Sum(REVENUE_EXPR), cost=Sum(COST_EXPR))
+        .order_by("-revenue")
+    )
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        "Moliya hisobotini eski (har davrga alohida skan) va FinanceEngine (rollup, bitta o'tish) "
+        "usullarida so'rovlar soni va kechikish bo'yicha solishtiradi. Natija ma'noli bo'lishi "
+        "uchun ko'p qatorli bazada ishga tushiring (masalan, `seed_store --orders 2000000` - "
+        "~5M buyurtma qatori)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--skip-legacy", action="store_true")
+
+    def handle(self, *args, **options):
+        lines = OrderItem.objects.count()
+        self.stdout.write(f"Buyurtma qatorlari: {lines}")
+
+        runs = [("engine", lambda: FinanceEngine().overview())]
+        if not options["skip_legacy"]:
+            runs.insert(0, ("legacy", legacy_overview))
+
+        results = {}
+        for label, run in runs:
+            timings = []
+            for _ in range(options["repeat"]):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    results[label] = run()
+                    timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f"{label:>6}: {len(queries)} ta so'rov, median {statistics.median(timings):.1f} ms, "
+                f"max {max(timings):.1f} ms"
+            )
+
+        if "legacy" in results:
+            legacy = results["legacy"]["total_revenue"] or Decimal("0.00")
+            engine = results["engine"]["total_revenue"]
+            status = "mos" if legacy == engine else "FARQ BOR"
+            self.stdout.write(f"Jami tushum: legacy={legacy}, engine={engine} ({status})")
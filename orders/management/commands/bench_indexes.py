@@ -0,0 +1,207 @@
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from catalog.models import Product
+from orders.dispatch import OPEN_STATUSES
+from orders.models import Expense, Order, OrderItem
+
+
+# Ushbu buyruq o'lchaydigan indekslar (catalog 0009, orders 0013 va 0014 migratsiyalari).
+INDEX_PACK = (
+    (Product, "catalog_product_active_cat"),
+    (Product, "catalog_product_active_price"),
+    (Order, "orders_order_user_created"),
+    (Order, "orders_order_status_created"),
+    (Order, "orders_order_courier_status"),
+    (Order, "orders_order_awaiting_courier"),
+    (Expense, "orders_expense_date"),
+    (OrderItem, "orders_item_order_cover"),
+)
+
+
+def _pack_indexes():
+    return [
+        (model, next(index for index in model._meta.indexes if index.name == name))
+        for model, name in INDEX_PACK
+    ]
+
+
+def _existing_index_names():
+    with connection.cursor() as cursor:
+        return {
+            name
+            for model in {model for model, _ in INDEX_PACK}
+            for name in connection.introspection.get_constraints(cursor, model._meta.db_table)
+        }
+
+
+def _analyze(models):
+    """Qayta qurilgan indekslar statistikasi: busiz planner eski indeksni tanlashi mumkin."""
+    if connection.vendor not in ("sqlite", "postgresql"):
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+
+def _most_common(queryset, field):
+    return (
+        queryset.values(field)
+        .annotate(n=Count("pk"))
+        .order_by("-n")
+        .values_list(field, flat=True)
+        .first()
+    )
+
+
+def hot_queries():
+    """
+    Issiq so'rov shakllari: (nom, queryset, bajarish). Parametrlar bazadagi eng ko'p
+    qatorli kategoriya/foydalanuvchi/kurer va oxirgi 30 kundan olinadi. Agregatlar uchun
+    EXPLAIN filtrlangan queryset dan olinadi: o'qish yo'li bir xil.
+
+    Sotuv qatorlari shakli: buyurtmalar (status, created_at) indeksidan, qatorlar
+    `orders_item_order_cover` dan jadvalga qaytmasdan olinadi. Mahsulot bo'yicha
+    GROUP BY qilingan butun davr yig'indilari bu yerda emas - ular rollup jadvallaridan
+    o'qiladi.
+    """
+    active = Product.objects.filter(is_active=True)
+    category_id = _most_common(active, "category")
+    high = active.filter(category=category_id).aggregate(high=Max("price"))["high"] or 0
+    user_id = _most_common(Order.objects.all(), "user")
+    courier_id = _most_common(Order.objects.filter(courier__isnull=False), "courier")
+    latest = Order.objects.aggregate(latest=Max("created_at"))["latest"] or timezone.now()
+    since = latest - timedelta(days=30)
+    expense_latest = (
+        Expense.objects.aggregate(latest=Max("expense_date"))["latest"] or timezone.localdate()
+    )
+
+    return [
+        (
+            "katalog: kategoriya + narx oralig'i",
+            active.filter(category=category_id, price__gte=high / 4, price__lte=high / 2)
+            .order_by("price", "pk")[:20],
+            list,
+        ),
+        ("katalog: narx bo'yicha saralash", active.order_by("price", "pk")[:20], list),
+        (
+            "foydalanuvchi buyurtmalari (yangi birinchi)",
+            Order.objects.filter(user=user_id).order_by("-created_at", "-pk")[:20],
+            list,
+        ),
+        (
+            "holat + davr (to'langan, 30 kun)",
+            Order.objects.filter(status=Order.Status.PAID, created_at__gte=since),
+            lambda queryset: queryset.aggregate(total=Sum("total_price")),
+        ),
+        (
+            "sotuv qatorlari: order__status + created_at",
+            OrderItem.objects.filter(
+                order__status__in=[Order.Status.PAID, Order.Status.SHIPPED],
+                order__created_at__gte=since,
+            ).values("quantity"),
+            lambda queryset: queryset.aggregate(quantity=Sum("quantity")),
+        ),
+        (
+            "kurerning ochiq buyurtmalari",
+            Order.objects.filter(courier=courier_id, status__in=OPEN_STATUSES).order_by("id"),
+            list,
+        ),
+        (
+            "kurer kutayotgan buyurtmalar",
+            Order.objects.filter(
+                delivery_type=Order.DeliveryType.COURIER,
+                courier__isnull=True,
+                status__in=OPEN_STATUSES,
+            ).order_by(),
+            lambda queryset: list(queryset.values_list("id", flat=True)),
+        ),
+        (
+            "xarajatlar (oxirgi 30 kun)",
+            Expense.objects.filter(expense_date__gte=expense_latest - timedelta(days=30))[:20],
+            list,
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Issiq so'rovlarning EXPLAIN rejasi va vaqtini ko'rsatadi. --drop-indexes bilan "
+        "indekslar to'plami vaqtincha o'chirilib, indekssiz holat bilan solishtiriladi - "
+        "faqat DEBUG yoki BENCH_DATABASE=True bo'lgan, ko'p qatorli (`seed_store`) bazada."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--drop-indexes",
+            action="store_true",
+            help="Indekslarni o'chirib indekssiz holatni ham o'lchash (keyin qayta quriladi).",
+        )
+
+    def handle(self, *args, **options):
+        if options["drop_indexes"] and not (settings.DEBUG or settings.BENCH_DATABASE):
+            raise CommandError(
+                "--drop-indexes ishlayotgan bazadagi indekslarni o'chiradi: faqat DEBUG=True "
+                "yoki BENCH_DATABASE=True bo'lganda ruxsat."
+            )
+        queries = hot_queries()
+        repeat = options["repeat"]
+
+        existing = _existing_index_names()
+        indexes = [(model, index) for model, index in _pack_indexes() if index.name in existing]
+        missing = sorted({name for _, name in INDEX_PACK} - existing)
+        if missing:
+            self.stdout.write(f"Bazada yo'q indekslar (migrate qiling): {', '.join(missing)}")
+
+        before = {}
+        if options["drop_indexes"] and indexes:
+            with connection.schema_editor() as editor:
+                for model, index in indexes:
+                    editor.remove_index(model, index)
+            try:
+                before = self._measure(queries, repeat)
+            finally:
+                started = time.perf_counter()
+                with connection.schema_editor() as editor:
+                    for model, index in indexes:
+                        editor.add_index(model, index)
+                _analyze({model for model, _ in indexes})
+                self.stdout.write(
+                    f"{len(indexes)} ta indeks qayta qurildi: {time.perf_counter() - started:.1f} s"
+                )
+        after = self._measure(queries, repeat)
+
+        for label, _, _ in queries:
+            self.stdout.write("")
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            if label in before:
+                plan, ms = before[label]
+                self.stdout.write(f"  indekssiz: {ms:.2f} ms")
+                self.stdout.write(self._indent(plan))
+            plan, ms = after[label]
+            speedup = f" (x{before[label][1] / ms:.1f})" if label in before and ms else ""
+            self.stdout.write(f"  indeks bilan: {ms:.2f} ms{speedup}")
+            self.stdout.write(self._indent(plan))
+
+    def _measure(self, queries, repeat):
+        results = {}
+        for label, queryset, run in queries:
+            plan = queryset.explain()
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                run(queryset.all())
+                timings.append((time.perf_counter() - started) * 1000)
+            results[label] = (plan, statistics.median(timings))
+        return results
+
+    def _indent(self, plan):
+        return "\n".join(f"    {line}" for line in plan.splitlines())
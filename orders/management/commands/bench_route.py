@@ -0,0 +1,92 @@
+import math
+import random
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.routing import EARTH_RADIUS_KM, plan_route
+
+
+def python_haversine_matrix(points):
+    radians = [(math.radians(lat), math.radians(lon)) for lat, lon in points]
+    matrix = []
+    for lat1, lon1 in radians:
+        row = []
+        for lat2, lon2 in radians:
+            a = (
+                math.sin((lat2 - lat1) / 2) ** 2
+                + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+            )
+            row.append(2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(a, 1.0))))
+        matrix.append(row)
+    return matrix
+
+
+def python_plan_route(points, max_passes=50):
+    """Taqqoslash uchun sof Python: xuddi shu nearest neighbour + ochiq yo'l 2-opt."""
+    matrix = python_haversine_matrix(points)
+    size = len(points)
+    unvisited = set(range(1, size))
+    route = [0]
+    while unvisited:
+        current = route[-1]
+        nearest = min(unvisited, key=lambda index: matrix[current][index])
+        unvisited.remove(nearest)
+        route.append(nearest)
+
+    def distance(a, b):
+        if a == size or b == size:
+            return 0.0
+        return matrix[a][b]
+
+    route.append(size)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, size - 1):
+            a, b = route[i - 1], route[i]
+            best_gain, best_j = -1e-9, None
+            for j in range(i + 1, size):
+                c, d = route[j], route[j + 1]
+                gain = distance(a, c) + distance(b, d) - distance(a, b) - distance(c, d)
+                if gain < best_gain:
+                    best_gain, best_j = gain, j
+            if best_j is not None:
+                route[i : best_j + 1] = reversed(route[i : best_j + 1])
+                improved = True
+        if not improved:
+            break
+    route.pop()
+    return route, sum(matrix[a][b] for a, b in zip(route, route[1:]))
+
+
+class Command(BaseCommand):
+    help = "Marshrut rejalashtirishni NumPy va sof Python versiyalarida solishtiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--stops", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        # Toshkent atrofida ~30 x 30 km hudud
+        points = [
+            (41.2 + rng.random() * 0.27, 69.1 + rng.random() * 0.36)
+            for _ in range(options["stops"])
+        ]
+
+        for label, planner in (("numpy", self._numpy), ("python", python_plan_route)):
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                _, distance = planner(points)
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            self.stdout.write(
+                f"{label:>6}: {options['stops']} nuqta, masofa {distance:.2f} km, "
+                f"median {timings[len(timings) // 2]:.1f} ms, min {timings[0]:.1f} ms"
+            )
+
+    def _numpy(self, points):
+        order, legs = plan_route(points)
+        return order, sum(legs)
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.dispatch import dispatch_courier_orders
+
+
+class Command(BaseCommand):
+    help = "Kurersiz courier buyurtmalarni mashinalar sig'imi bo'yicha bitta tranzaksiyada taqsimlaydi."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = dispatch_courier_orders()
+        elapsed = (time.perf_counter() - started) * 1000
+
+        assigned = sum(len(order_ids) for order_ids in result.assignments.values())
+        self.stdout.write(
+            f"{assigned} ta buyurtma {len(result.assignments)} ta kurerga biriktirildi, "
+            f"{len(result.unassigned)} ta joy topilmadi ({elapsed:.0f} ms)."
+        )
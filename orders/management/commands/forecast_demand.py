@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from orders.forecast import rebuild_demand_forecast
+from orders.models import DemandForecast
+
+
+class Command(BaseCommand):
+    help = "Kunlik savdodan talab prognozini hisoblaydi va buyurtma ro'yxatini yangilaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--method",
+            choices=DemandForecast.Method.values,
+            default=None,
+            help="ma - sirpanuvchi o'rtacha, ses - eksponensial tekislash (FORECAST_METHOD).",
+        )
+        parser.add_argument("--history-days", type=int, default=None)
+        parser.add_argument("--window", type=int, default=None, help="ma uchun oyna (kun).")
+        parser.add_argument("--alpha", type=float, default=None, help="ses koeffitsienti.")
+
+    def handle(self, *args, **options):
+        stats = rebuild_demand_forecast(
+            method=options["method"],
+            history_days=options["history_days"],
+            window=options["window"],
+            alpha=options["alpha"],
+        )
+        self.stdout.write(
+            f"{stats['products']} ta mahsulot, {stats['reorder']} tasiga buyurtma kerak. "
+            f"Prognoz: {stats['forecast_seconds']} s, jami: {stats['total_seconds']} s."
+        )
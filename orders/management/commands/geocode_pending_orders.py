@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from orders.models import Order
+from orders.tasks import resolve_order_address
+
+
+class Command(BaseCommand):
+    help = "Manzili hali aniqlanmagan courier buyurtmalar uchun geocoderni qayta chaqiradi."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=500)
+
+    def handle(self, *args, **options):
+        order_ids = list(
+            Order.objects.filter(delivery_address_pending=True)
+            .order_by("id")
+            .values_list("id", flat=True)[: options["limit"]]
+        )
+        resolved = sum(resolve_order_address(order_id) for order_id in order_ids)
+        self.stdout.write(f"{resolved}/{len(order_ids)} ta buyurtma manzili aniqlandi.")
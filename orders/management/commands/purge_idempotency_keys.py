@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from orders.idempotency import purge_expired_keys
+
+
+class Command(BaseCommand):
+    help = "Muddati (IDEMPOTENCY_KEY_TTL) o'tgan Idempotency-Key yozuvlarini o'chiradi."
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_keys()
+        self.stdout.write(f"{deleted} ta eskirgan kalit o'chirildi.")
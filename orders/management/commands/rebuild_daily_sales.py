@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.rollup import rebuild_daily_sales
+
+
+class Command(BaseCommand):
+    help = "Kunlik savdo (kun, mahsulot) jadvalini buyurtma qatorlaridan qayta hisoblaydi."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Faqat oxirgi N kunni qayta hisoblash (berilmasa hammasi).",
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["days"]:
+            since = timezone.localdate() - timedelta(days=options["days"] - 1)
+        created = rebuild_daily_sales(since=since)
+        self.stdout.write(f"{created} ta kunlik savdo yozuvi yaratildi.")
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from orders.seed import StoreSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Yuklama va benchmark uchun sintetik do'kon: kategoriya, mahsulot, foydalanuvchi, "
+        "kurer, savat, buyurtma va xarajatlar. Bir xil --seed bir xil ma'lumot beradi; "
+        "~385 000 buyurtma taxminan 1M buyurtma qatori."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--days", type=int, default=365, help="Buyurtmalar tarixi (kun).")
+        parser.add_argument("--categories", type=int, default=16)
+        parser.add_argument("--products", type=int, default=10000)
+        parser.add_argument("--users", type=int, default=5000)
+        parser.add_argument("--couriers", type=int, default=50)
+        parser.add_argument("--carts", type=int, default=1000)
+        parser.add_argument("--orders", type=int, default=100000)
+        parser.add_argument("--expenses", type=int, default=1000)
+        parser.add_argument(
+            "--skip-rollups", action="store_true", help="Kunlik/soatlik savdo jadvallari qurilmaydi."
+        )
+
+    def handle(self, *args, **options):
+        seeder = StoreSeeder(seed=options["seed"], days=options["days"], log=self.stdout.write)
+        try:
+            counts = seeder.run(
+                categories=options["categories"],
+                products=options["products"],
+                users=options["users"],
+                couriers=options["couriers"],
+                carts=options["carts"],
+                orders=options["orders"],
+                expenses=options["expenses"],
+                rollups=not options["skip_rollups"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(
+            self.style.SUCCESS(", ".join(f"{key}: {value}" for key, value in counts.items()))
+        )
@@ -0,0 +1,53 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders.models import GeocodeCache, Order
+from orders.services import CachedGeocoder
+
+
+class Command(BaseCommand):
+    help = (
+        "Courier buyurtmalar koordinatalari bo'yicha geocode keshini oldindan to'ldiradi "
+        "va muddati o'tgan yozuvlarni o'chiradi."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=1000, help="Ko'pi bilan nechta katak.")
+        parser.add_argument(
+            "--days", type=int, default=90, help="Oxirgi necha kunlik buyurtmalar olinadi."
+        )
+
+    def handle(self, *args, **options):
+        geocoder = CachedGeocoder()
+        expired, _ = GeocodeCache.objects.filter(
+            resolved_at__lte=timezone.now() - geocoder.ttl
+        ).delete()
+
+        fresh = set(GeocodeCache.objects.values_list("cell", flat=True))
+        locations = (
+            Order.objects.filter(
+                delivery_type=Order.DeliveryType.COURIER,
+                delivery_latitude__isnull=False,
+                delivery_longitude__isnull=False,
+                created_at__gte=timezone.now() - timedelta(days=options["days"]),
+            )
+            .order_by("-created_at")
+            .values_list("delivery_latitude", "delivery_longitude")
+            .iterator()
+        )
+
+        # Bir katakka bitta so'rov: Nominatim chegarasi (1 so'rov/s) shu bilan tejaladi.
+        pending = {}
+        for latitude, longitude in locations:
+            cell = geocoder.cell(latitude, longitude)
+            if cell not in fresh and cell not in pending:
+                pending[cell] = (latitude, longitude)
+                if len(pending) >= options["limit"]:
+                    break
+
+        resolved = sum(1 for location in pending.values() if geocoder.reverse(*location))
+        self.stdout.write(
+            f"{resolved}/{len(pending)} ta katak keshlandi, {expired} ta eskirgan yozuv o'chirildi."
+        )
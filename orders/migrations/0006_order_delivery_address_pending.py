@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 12:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_courier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='delivery_address_pending',
+            field=models.BooleanField(default=False),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-17 13:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_order_delivery_address_pending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell', models.CharField(max_length=12, unique=True)),
+                ('address', models.CharField(max_length=255)),
+                ('resolved_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Geocode kesh',
+                'verbose_name_plural': 'Geocode kesh',
+            },
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 6.0 on 2026-10-17 14:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_daily_sales(apps, schema_editor):
+    OrderItem = apps.get_model("orders", "OrderItem")
+    DailyProductSales = apps.get_model("orders", "DailyProductSales")
+    money = DecimalField(max_digits=18, decimal_places=2)
+    rows = (
+        OrderItem.objects.exclude(order__status="canceled")
+        .annotate(day=TruncDate("order__created_at"))
+        .values("day", "product_id")
+        .annotate(
+            revenue=Sum(ExpressionWrapper(F("price") * F("quantity"), output_field=money)),
+            cost=Sum(ExpressionWrapper(F("cost_price") * F("quantity"), output_field=money)),
+            quantity_sold=Sum("quantity"),
+        )
+        .order_by()
+    )
+    DailyProductSales.objects.bulk_create(
+        (
+            DailyProductSales(
+                day=row["day"],
+                product_id=row["product_id"],
+                revenue=row["revenue"],
+                cost=row["cost"],
+                quantity=row["quantity_sold"],
+            )
+            for row in rows.iterator(chunk_size=2000)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_category_updated_at_product_updated_at'),
+        ('orders', '0007_geocodecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyProductSales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('quantity', models.IntegerField(default=0)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='catalog.product')),
+            ],
+            options={
+                'verbose_name': 'Kunlik savdo',
+                'verbose_name_plural': 'Kunlik savdo',
+                'constraints': [models.UniqueConstraint(fields=('day', 'product'), name='orders_daily_sales_day_product')],
+            },
+        ),
+        migrations.RunPython(populate_daily_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 6.0 on 2026-10-17 16:10
+
+from collections import defaultdict
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+
+
+def populate_hourly_sales(apps, schema_editor):
+    Order = apps.get_model("orders", "Order")
+    OrderItem = apps.get_model("orders", "OrderItem")
+    HourlySales = apps.get_model("orders", "HourlySales")
+    tz = ZoneInfo(settings.STORE_TIME_ZONE)
+    money = DecimalField(max_digits=18, decimal_places=2)
+
+    hourly = defaultdict(lambda: [0, 0, 0, 0])
+    items = (
+        OrderItem.objects.exclude(order__status="canceled")
+        .annotate(
+            day=TruncDate("order__created_at", tzinfo=tz),
+            hour=ExtractHour("order__created_at", tzinfo=tz),
+        )
+        .values("day", "hour")
+        .annotate(
+            revenue=Sum(ExpressionWrapper(F("price") * F("quantity"), output_field=money)),
+            cost=Sum(ExpressionWrapper(F("cost_price") * F("quantity"), output_field=money)),
+            quantity_sold=Sum("quantity"),
+        )
+        .order_by()
+    )
+    for row in items:
+        hourly[(row["day"], row["hour"])][:3] = [row["revenue"], row["cost"], row["quantity_sold"]]
+    orders = (
+        Order.objects.exclude(status="canceled")
+        .annotate(day=TruncDate("created_at", tzinfo=tz), hour=ExtractHour("created_at", tzinfo=tz))
+        .values("day", "hour")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    for row in orders:
+        hourly[(row["day"], row["hour"])][3] = row["count"]
+
+    HourlySales.objects.bulk_create(
+        [
+            HourlySales(
+                day=day,
+                hour=hour,
+                revenue=values[0],
+                cost=values[1],
+                quantity=values[2],
+                orders=values[3],
+            )
+            for (day, hour), values in hourly.items()
+        ],
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_dailyproductsales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('hour', models.PositiveSmallIntegerField()),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('quantity', models.IntegerField(default=0)),
+                ('orders', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Soatlik savdo',
+                'verbose_name_plural': 'Soatlik savdo',
+                'constraints': [models.UniqueConstraint(fields=('day', 'hour'), name='orders_hourly_sales_day_hour')],
+            },
+        ),
+        migrations.RunPython(populate_hourly_sales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0 on 2026-10-17 17:40
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_stock_ledger'),
+        ('orders', '0009_hourlysales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('method', models.CharField(choices=[('ma', "Sirpanuvchi o'rtacha"), ('ses', 'Eksponensial tekislash')], max_length=10)),
+                ('daily_demand', models.FloatField(verbose_name='Kunlik talab')),
+                ('stock', models.IntegerField()),
+                ('days_of_cover', models.FloatField(verbose_name='Necha kunga yetadi')),
+                ('reorder_quantity', models.PositiveIntegerField(default=0, verbose_name='Buyurtma miqdori')),
+                ('needs_reorder', models.BooleanField(default=False)),
+                ('computed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecast', to='catalog.product')),
+            ],
+            options={
+                'verbose_name': 'Talab prognozi',
+                'verbose_name_plural': 'Talab prognozlari',
+                'indexes': [models.Index(fields=['needs_reorder', 'days_of_cover'], name='orders_forecast_reorder')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-17 18:20
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, F, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_cart_totals(apps, schema_editor):
+    Cart = apps.get_model("orders", "Cart")
+    CartItem = apps.get_model("orders", "CartItem")
+    money = DecimalField(max_digits=14, decimal_places=2)
+    items = CartItem.objects.filter(cart=OuterRef("pk")).order_by().values("cart")
+    Cart.objects.update(
+        item_count=Coalesce(Subquery(items.annotate(total=Sum("quantity")).values("total")), Value(0)),
+        subtotal=Coalesce(
+            Subquery(
+                items.annotate(
+                    total=Sum(F("quantity") * F("product__price"), output_field=money)
+                ).values("total")
+            ),
+            Value(Decimal("0.00")),
+            output_field=money,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_demandforecast'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14),
+        ),
+        migrations.RunPython(populate_cart_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-17 19:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0012_idempotencykey'),
+        ('users', '0003_courier_car_max_weight'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['-expense_date', '-created_at'], name='orders_expense_date'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', 'created_at'], name='orders_order_user_created'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['status', 'created_at'], name='orders_order_status_created'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('courier__isnull', False)), fields=['courier', 'status'], name='orders_order_courier_status'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('courier__isnull', True), ('delivery_type', 'courier')), fields=['status'], name='orders_order_awaiting_courier'),
+        ),
+    ]
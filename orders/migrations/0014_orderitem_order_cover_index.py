@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-17 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0013_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='orderitem',
+            index=models.Index(fields=['order', 'product', 'quantity', 'price', 'cost_price'], name='orders_item_order_cover'),
+        ),
+    ]
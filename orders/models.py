@@ -39,6 +39,8 @@ class Order(models.Model):
         max_length=20, choices=PaymentMethod.choices, default=PaymentMethod.CASH
     )
     delivery_address = models.CharField(max_length=255, blank=True)
+    # True bo'lsa manzil hali koordinatadan aniqlanmagan (fon vazifasi kutilmoqda).
+    delivery_address_pending = models.BooleanField(default=False)
     delivery_latitude = models.DecimalField(
         max_digits=9, decimal_places=6, null=True, blank=True
     )
@@ -49,12 +51,46 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Foydalanuvchi buyurtmalari tarixi.
+            models.Index(fields=["user", "created_at"], name="orders_order_user_created"),
+            # Holat va davr bo'yicha hisobotlar (moliya, kunlik savdo).
+            models.Index(fields=["status", "created_at"], name="orders_order_status_created"),
+            # Kurerning ochiq buyurtmalari (marshrut, sig'im); kurersizlar indeksga kirmaydi.
+            models.Index(
+                fields=["courier", "status"],
+                condition=models.Q(courier__isnull=False),
+                name="orders_order_courier_status",
+            ),
+            # Kurer kutayotgan yetkazib berishlar (dispatch).
+            models.Index(
+                fields=["status"],
+                condition=models.Q(courier__isnull=True, delivery_type="courier"),
+                name="orders_order_awaiting_courier",
+            ),
+        ]
+
+    def clean(self):
+        # Bekor qilish qaytarib olinsa mahsulotlar yana ombordan chiqadi: qoldiq yetmasa
+        # admin formasi xato ko'rsatadi (signaldagi shartli UPDATE oxirgi himoya).
+        if self.pk is None or self.status == self.Status.CANCELED:
+            return
+        previous = Order.objects.filter(pk=self.pk).values_list("status", flat=True).first()
+        if previous != self.Status.CANCELED:
+            return
+        from catalog.stock import order_quantities, shortage_error, stock_shortages
+
+        shortages = stock_shortages(order_quantities(self))
+        if shortages:
+            raise shortage_error(shortages)
+
     def recalc_total(self):
         total = Decimal("0.00")
         for item in self.items.all():
             total += item.price * item.quantity
         self.total_price = total
-        self.save(update_fields=["total_price"])
+        self.save(update_fields=["total_price", "updated_at"])
 
     def __str__(self):
         return f"Order #{self.pk} ({self.user})"
@@ -64,15 +100,15 @@ class Cart(models.Model):
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL, related_name="cart", on_delete=models.CASCADE
     )
+    # Qatorlardan hisoblanadigan jami (orders.cart yangilab boradi): o'qishda yig'ish kerak emas.
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal("0.00"))
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     @property
     def total_price(self):
-        total = Decimal("0.00")
-        for item in self.items.select_related("product"):
-            total += item.product.price * item.quantity
-        return total
+        return self.subtotal
 
     def __str__(self):
         return f"Cart of {self.user}"
@@ -108,6 +144,16 @@ class OrderItem(models.Model):
     cost_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Holat + sana bo'yicha topilgan buyurtmalar qatorlari jadvalga qaytmasdan
+            # (covering) o'qiladi: sotuv/tushum/tannarx yig'indilari uchun.
+            models.Index(
+                fields=["order", "product", "quantity", "price", "cost_price"],
+                name="orders_item_order_cover",
+            )
+        ]
+
     @property
     def line_revenue(self):
         return self.price * self.quantity
@@ -133,8 +179,124 @@ class Expense(models.Model):
 
     class Meta:
         ordering = ("-expense_date", "-created_at")
+        indexes = [
+            models.Index(fields=["-expense_date", "-created_at"], name="orders_expense_date")
+        ]
         verbose_name = "Xarajat"
         verbose_name_plural = "Moliya bo'limi"
 
     def __str__(self):
         return f"{self.title} - {self.amount}"
+
+
+class DailyProductSales(models.Model):
+    """Bekor qilinmagan buyurtmalar bo'yicha (kun, mahsulot) yig'indisi; orders.rollup yangilab boradi."""
+
+    day = models.DateField()
+    product = models.ForeignKey(
+        "catalog.Product", related_name="daily_sales", on_delete=models.CASCADE
+    )
+    revenue = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    quantity = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "product"], name="orders_daily_sales_day_product")
+        ]
+        verbose_name = "Kunlik savdo"
+        verbose_name_plural = "Kunlik savdo"
+
+    def __str__(self):
+        return f"{self.day} {self.product_id}: {self.revenue}"
+
+
+class HourlySales(models.Model):
+    """Do'kon mahalliy vaqti bo'yicha (kun, soat) savdo yig'indisi; vaqt qatorlari shundan olinadi."""
+
+    day = models.DateField()
+    hour = models.PositiveSmallIntegerField()
+    revenue = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    cost = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    quantity = models.IntegerField(default=0)
+    orders = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "hour"], name="orders_hourly_sales_day_hour")
+        ]
+        verbose_name = "Soatlik savdo"
+        verbose_name_plural = "Soatlik savdo"
+
+    def __str__(self):
+        return f"{self.day} {self.hour:02d}:00: {self.revenue}"
+
+
+class DemandForecast(models.Model):
+    """Mahsulot bo'yicha kunlik talab prognozi va buyurtma tavsiyasi; orders.forecast qayta yozadi."""
+
+    class Method(models.TextChoices):
+        MOVING_AVERAGE = "ma", "Sirpanuvchi o'rtacha"
+        EXPONENTIAL = "ses", "Eksponensial tekislash"
+
+    product = models.OneToOneField(
+        "catalog.Product", related_name="demand_forecast", on_delete=models.CASCADE
+    )
+    method = models.CharField(max_length=10, choices=Method.choices)
+    daily_demand = models.FloatField(verbose_name="Kunlik talab")
+    stock = models.IntegerField()
+    days_of_cover = models.FloatField(verbose_name="Necha kunga yetadi")
+    reorder_quantity = models.PositiveIntegerField(default=0, verbose_name="Buyurtma miqdori")
+    needs_reorder = models.BooleanField(default=False)
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["needs_reorder", "days_of_cover"], name="orders_forecast_reorder")
+        ]
+        verbose_name = "Talab prognozi"
+        verbose_name_plural = "Talab prognozlari"
+
+    def __str__(self):
+        return f"{self.product_id}: {self.daily_demand:.2f}/kun, {self.days_of_cover:.1f} kun"
+
+
+class IdempotencyKey(models.Model):
+    """
+    `Idempotency-Key` sarlavhasi bo'yicha saqlangan javob: takroriy POST checkout ni
+    qayta bajarmaydi. `status_code` bo'sh - birinchi urinish hali bajarilmoqda.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="idempotency_keys", on_delete=models.CASCADE
+    )
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="orders_idempotency_user_key")
+        ]
+        verbose_name = "Idempotency kalit"
+        verbose_name_plural = "Idempotency kalitlar"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.key}"
+
+
+class GeocodeCache(models.Model):
+    """Yaxlitlangan koordinata (geohash katak) bo'yicha saqlangan manzil."""
+
+    cell = models.CharField(max_length=12, unique=True)
+    address = models.CharField(max_length=255)
+    resolved_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Geocode kesh"
+        verbose_name_plural = "Geocode kesh"
+
+    def __str__(self):
+        return f"{self.cell}: {self.address}"
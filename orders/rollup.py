@@ -0,0 +1,213 @@
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+from django.db.models.functions import ExtractHour, TruncDate
+from django.utils import timezone
+
+from .models import DailyProductSales, HourlySales, Order, OrderItem
+
+
+MONEY_OUTPUT = DecimalField(max_digits=18, decimal_places=2)
+UPSERT_CHUNK_SIZE = 500
+BULK_BATCH_SIZE = 2000
+
+
+def store_timezone():
+    return ZoneInfo(settings.STORE_TIME_ZONE)
+
+
+def store_today():
+    return timezone.localdate(timezone=store_timezone())
+
+
+def order_bucket(order):
+    """Buyurtma tushadigan do'kon mahalliy vaqtidagi (kun, soat)."""
+    local = timezone.localtime(order.created_at, store_timezone())
+    return local.date(), local.hour
+
+
+def order_day(order):
+    return order_bucket(order)[0]
+
+
+def sales_rows(order, items, sign=1):
+    """Buyurtma qatorlarini (kun, mahsulot) bo'yicha yig'adi: {(day, product_id): [revenue, cost, qty]}."""
+    day = order_day(order)
+    rows = defaultdict(lambda: [Decimal("0.00"), Decimal("0.00"), 0])
+    for product_id, quantity, price, cost_price in items:
+        quantity = int(quantity)
+        row = rows[(day, product_id)]
+        row[0] += sign * Decimal(str(price)) * quantity
+        row[1] += sign * Decimal(str(cost_price)) * quantity
+        row[2] += sign * quantity
+    return rows
+
+
+def _upsert(model, key_fields, value_fields, rows):
+    """
+    Qiymatlarni `INSERT ... ON CONFLICT (kalit) DO UPDATE SET x = x + excluded.x` bilan
+    qo'shadi: har bir jadvalga bitta so'rov (SQLite 3.24+ va PostgreSQL).
+    """
+    if not rows:
+        return
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    columns = [model._meta.get_field(name).column for name in (*key_fields, *value_fields)]
+    keys = ", ".join(quote(model._meta.get_field(name).column) for name in key_fields)
+    updates = ", ".join(
+        f"{quote(column)} = {table}.{quote(column)} + excluded.{quote(column)}"
+        for column in columns[len(key_fields) :]
+    )
+    row_sql = "(" + ", ".join(["%s"] * len(columns)) + ")"
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), UPSERT_CHUNK_SIZE):
+            chunk = rows[start : start + UPSERT_CHUNK_SIZE]
+            cursor.execute(
+                f"INSERT INTO {table} ({', '.join(quote(column) for column in columns)}) "
+                f"VALUES {', '.join([row_sql] * len(chunk))} "
+                f"ON CONFLICT ({keys}) DO UPDATE SET {updates}",
+                [
+                    str(value) if isinstance(value, Decimal) else value
+                    for row in chunk
+                    for value in row
+                ],
+            )
+
+
+def apply_sales(order, rows, orders=0):
+    """
+    (kun, mahsulot) yig'indilarini kunlik jadvalga, ularning jamini esa buyurtmaning
+    (kun, soat) qatoriga qo'shadi. `orders` - buyurtmalar soniga qo'shiladigan o'zgarish.
+    """
+    if not rows and not orders:
+        return
+    _upsert(
+        DailyProductSales,
+        ("day", "product"),
+        ("revenue", "cost", "quantity"),
+        [(day, product_id, *values) for (day, product_id), values in rows.items()],
+    )
+    day, hour = order_bucket(order)
+    totals = [sum(values[index] for values in rows.values()) for index in range(3)]
+    _upsert(
+        HourlySales,
+        ("day", "hour"),
+        ("revenue", "cost", "quantity", "orders"),
+        [(day, hour, Decimal(totals[0]), Decimal(totals[1]), int(totals[2]), orders)],
+    )
+
+
+def record_order_items(order, order_items, sign=1):
+    """Checkout: xotiradagi `OrderItem` lar bo'yicha, bazadan qayta o'qimasdan."""
+    apply_sales(
+        order,
+        sales_rows(
+            order,
+            [(item.product_id, item.quantity, item.price, item.cost_price) for item in order_items],
+            sign,
+        ),
+    )
+
+
+def record_order(order, sign=1):
+    """Buyurtmani (qatorlari va soni bilan) qo'shadi, sign=-1 bo'lsa ayiradi."""
+    items = order.items.values_list("product_id", "quantity", "price", "cost_price")
+    apply_sales(order, sales_rows(order, items, sign), orders=sign)
+
+
+def _bulk_create(model, objects):
+    created = 0
+    batch = []
+    for obj in objects:
+        batch.append(obj)
+        if len(batch) >= BULK_BATCH_SIZE:
+            model.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    model.objects.bulk_create(batch)
+    return created + len(batch)
+
+
+def rebuild_daily_sales(since=None):
+    """
+    Kunlik (kun, mahsulot) va soatlik (kun, soat) jadvallarni buyurtmalardan qayta
+    hisoblaydi (`since` berilsa faqat shu kundan boshlab). Qaytaradi: yaratilgan kunlik yozuvlar.
+    """
+    tz = store_timezone()
+    orders = Order.objects.exclude(status=Order.Status.CANCELED)
+    items = OrderItem.objects.exclude(order__status=Order.Status.CANCELED)
+    daily_existing = DailyProductSales.objects.all()
+    hourly_existing = HourlySales.objects.all()
+    if since is not None:
+        start = datetime.combine(since, time.min, tzinfo=tz)
+        orders = orders.filter(created_at__gte=start)
+        items = items.filter(order__created_at__gte=start)
+        daily_existing = daily_existing.filter(day__gte=since)
+        hourly_existing = hourly_existing.filter(day__gte=since)
+
+    revenue = Sum(ExpressionWrapper(F("price") * F("quantity"), output_field=MONEY_OUTPUT))
+    cost = Sum(ExpressionWrapper(F("cost_price") * F("quantity"), output_field=MONEY_OUTPUT))
+    daily_rows = (
+        items.annotate(day=TruncDate("order__created_at", tzinfo=tz))
+        .values("day", "product_id")
+        .annotate(revenue=revenue, cost=cost, quantity_sold=Sum("quantity"))
+        .order_by()
+    )
+    hourly = defaultdict(lambda: [Decimal("0.00"), Decimal("0.00"), 0, 0])
+    for row in (
+        items.annotate(
+            day=TruncDate("order__created_at", tzinfo=tz),
+            hour=ExtractHour("order__created_at", tzinfo=tz),
+        )
+        .values("day", "hour")
+        .annotate(revenue=revenue, cost=cost, quantity_sold=Sum("quantity"))
+        .order_by()
+    ):
+        bucket = hourly[(row["day"], row["hour"])]
+        bucket[:3] = [row["revenue"], row["cost"], row["quantity_sold"]]
+    for row in (
+        orders.annotate(
+            day=TruncDate("created_at", tzinfo=tz), hour=ExtractHour("created_at", tzinfo=tz)
+        )
+        .values("day", "hour")
+        .annotate(count=Count("pk"))
+        .order_by()
+    ):
+        hourly[(row["day"], row["hour"])][3] = row["count"]
+
+    with transaction.atomic():
+        daily_existing.delete()
+        hourly_existing.delete()
+        created = _bulk_create(
+            DailyProductSales,
+            (
+                DailyProductSales(
+                    day=row["day"],
+                    product_id=row["product_id"],
+                    revenue=row["revenue"],
+                    cost=row["cost"],
+                    quantity=row["quantity_sold"],
+                )
+                for row in daily_rows.iterator(chunk_size=BULK_BATCH_SIZE)
+            ),
+        )
+        _bulk_create(
+            HourlySales,
+            (
+                HourlySales(
+                    day=day,
+                    hour=hour,
+                    revenue=values[0],
+                    cost=values[1],
+                    quantity=values[2],
+                    orders=values[3],
+                )
+                for (day, hour), values in hourly.items()
+            ),
+        )
+    return created
@@ -0,0 +1,142 @@
+import math
+
+import numpy as np
+from django.conf import settings
+
+from .dispatch import OPEN_STATUSES
+from .models import Order
+
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_matrix(latitudes, longitudes):
+    """Barcha nuqtalar juftligi orasidagi masofa (km), (n, n) matritsa."""
+    lat = np.radians(np.asarray(latitudes, dtype=float))
+    lon = np.radians(np.asarray(longitudes, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbour(matrix, start=0):
+    size = len(matrix)
+    visited = np.zeros(size, dtype=bool)
+    tour = np.empty(size, dtype=np.intp)
+    tour[0] = start
+    visited[start] = True
+    current = start
+    for position in range(1, size):
+        distances = np.where(visited, np.inf, matrix[current])
+        current = int(np.argmin(distances))
+        tour[position] = current
+        visited[current] = True
+    return tour
+
+
+def two_opt(matrix, tour, max_passes=50):
+    """
+    Ochiq yo'l uchun 2-opt: boshlang'ich nuqta joyida qoladi, oxirgi manzildan qaytish
+    hisoblanmaydi. Buning uchun hamma nuqtaga masofasi 0 bo'lgan soxta tugun qo'shiladi
+    va yo'l shu tugunda yopiladi. Har bir `i` uchun barcha `j` bo'yicha foyda bitta
+    vektor amalida hisoblanadi.
+    """
+    size = len(tour)
+    if size < 4:
+        return tour
+    padded = np.zeros((size + 1, size + 1))
+    padded[:size, :size] = matrix
+    route = np.append(tour, size)
+
+    for _ in range(max_passes):
+        improved = False
+        for i in range(1, size - 1):
+            a, b = route[i - 1], route[i]
+            c = route[i + 1 : size]
+            d = route[i + 2 : size + 1]
+            gain = padded[a, c] + padded[b, d] - padded[a, b] - padded[c, d]
+            best = int(np.argmin(gain))
+            if gain[best] < -1e-9:
+                j = i + 1 + best
+                route[i : j + 1] = route[i : j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return route[:size]
+
+
+def route_length(matrix, tour):
+    return float(matrix[tour[:-1], tour[1:]].sum())
+
+
+def plan_route(points, start=None):
+    """
+    `points` - (lat, lon) ro'yxati. `start` berilsa yo'l o'sha nuqtadan (ombordan)
+    boshlanadi. Natija: tashrif tartibidagi `points` indekslari va har bir oraliq masofasi.
+    """
+    if not points:
+        return [], []
+    coordinates = ([start] if start is not None else []) + list(points)
+    latitudes, longitudes = zip(*coordinates)
+    matrix = haversine_matrix(latitudes, longitudes)
+    tour = two_opt(matrix, nearest_neighbour(matrix))
+
+    legs = [0.0] + matrix[tour[:-1], tour[1:]].tolist()
+    if start is not None:
+        return [int(index) - 1 for index in tour[1:]], legs[1:]
+    return [int(index) for index in tour], legs
+
+
+def parse_location(latitude, longitude):
+    """
+    (kenglik, uzunlik) float juftligi. Son bo'lmasa, NaN/inf yoki -90..90 / -180..180 dan
+    tashqarida bo'lsa ValueError: NaN masofa matritsasi va 2-opt orqali javobgacha yetadi.
+    """
+    latitude, longitude = float(latitude), float(longitude)
+    if not (math.isfinite(latitude) and math.isfinite(longitude)):
+        raise ValueError("Koordinata chekli son bo'lishi kerak.")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("Koordinata diapazondan tashqarida.")
+    return latitude, longitude
+
+
+def depot_location():
+    if settings.DELIVERY_DEPOT_LATITUDE is None or settings.DELIVERY_DEPOT_LONGITUDE is None:
+        return None
+    return parse_location(settings.DELIVERY_DEPOT_LATITUDE, settings.DELIVERY_DEPOT_LONGITUDE)
+
+
+def courier_route(courier, start=None):
+    """Kurerga biriktirilgan ochiq buyurtmalarning tashrif tartibi."""
+    orders = list(
+        Order.objects.filter(
+            courier=courier,
+            status__in=OPEN_STATUSES,
+            delivery_latitude__isnull=False,
+            delivery_longitude__isnull=False,
+        )
+        .order_by("id")
+        .values("id", "delivery_address", "delivery_latitude", "delivery_longitude")
+    )
+    start = start or depot_location()
+    order_indexes, legs = plan_route(
+        [(order["delivery_latitude"], order["delivery_longitude"]) for order in orders],
+        start=start,
+    )
+    stops = [
+        {
+            "order": orders[index]["id"],
+            "delivery_address": orders[index]["delivery_address"],
+            "delivery_latitude": orders[index]["delivery_latitude"],
+            "delivery_longitude": orders[index]["delivery_longitude"],
+            "leg_km": round(leg, 3),
+        }
+        for index, leg in zip(order_indexes, legs)
+    ]
+    return {
+        "courier": courier.pk,
+        "start": {"latitude": start[0], "longitude": start[1]} if start else None,
+        "distance_km": round(sum(legs), 3),
+        "stops": stops,
+    }
@@ -0,0 +1,454 @@
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from catalog.cache import bump_catalog_version
+from catalog.models import Category, Product, StockMovement
+from catalog.search import get_search_backend
+from catalog.stock import record_movements
+from users.models import Courier
+from .cart import cart_totals_update
+from .dispatch import OPEN_STATUSES
+from .models import Cart, CartItem, Expense, Order, OrderItem
+from .rollup import rebuild_daily_sales
+
+
+BULK_BATCH_SIZE = 2000
+ORDER_CHUNK_SIZE = 10000
+
+# Buyurtmadagi qatorlar soni (1..8) ehtimoli: ko'pi 1-3 qator, o'rtacha ~2.6.
+LINES_PER_ORDER = (1, 2, 3, 4, 5, 6, 7, 8)
+LINES_PER_ORDER_WEIGHTS = (30, 24, 16, 11, 8, 5, 4, 2)
+QUANTITIES = (1, 2, 3, 4, 5, 6, 7, 8)
+QUANTITY_WEIGHTS = (60, 20, 8, 5, 3, 2, 1, 1)
+# Mahsulot mashhurligi Zipf taqsimotiga yaqin: bir nechta mahsulot savdoning katta qismi.
+POPULARITY_EXPONENT = 0.8
+RECENT_DAYS = 7
+CENTS = Decimal("0.01")
+ZERO = Decimal("0.00")
+ORDER_COLUMNS = (
+    "id",
+    "user",
+    "courier",
+    "status",
+    "delivery_type",
+    "delivery_address",
+    "delivery_latitude",
+    "delivery_longitude",
+    "payment_method",
+    "delivery_address_pending",
+    "total_price",
+    "created_at",
+    "updated_at",
+)
+ORDER_ITEM_COLUMNS = ("id", "order", "product", "quantity", "price", "cost_price", "created_at")
+MOVEMENT_COLUMNS = ("product", "kind", "quantity", "order", "note", "created_at")
+SEED_NOTE = "seed_store"
+
+CATEGORY_NAMES = (
+    "Sement", "Armatura", "G'isht", "Bo'yoq", "Asbob", "Elektr", "Santexnika", "Yog'och",
+    "Plitka", "Tom yopish", "Issiqlik", "Mahkamlagich", "Bog'", "Yoritish", "Eshik", "Deraza",
+)
+EXPENSE_TITLES = ("Ijara", "Maosh", "Elektr energiya", "Transport", "Reklama", "Soliq", "Ta'mir")
+STREETS = ("Amir Temur", "Navoiy", "Bobur", "Mustaqillik", "Chilonzor", "Yunusobod", "Sergeli")
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """`bulk_create` da `auto_now`/`auto_now_add` o'rniga berilgan vaqtlar yoziladi."""
+    fields = [
+        field
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _insert_rows(model, fields, rows):
+    """Tayyor qiymatlar (`fields` tartibida) bitta `executemany` bilan yoziladi."""
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(model._meta.get_field(name).column) for name in fields)
+    placeholders = ", ".join(["%s"] * len(fields))
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {quote(model._meta.db_table)} ({columns}) VALUES ({placeholders})", rows
+        )
+
+
+def _reset_sequences(*models):
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+
+
+def _money(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+class StoreSeeder:
+    """
+    Sintetik do'kon: kategoriya, mahsulot, foydalanuvchi, kurer, savat, buyurtma va
+    xarajatlar. Hammasi `bulk_create` bilan bo'laklab yoziladi, signallar ishlamaydi:
+    sotuv harakatlari buyurtmalar bilan birga, kirimlar, qidiruv indeksi va rollup oxirida
+    bir marta yoziladi. Bir xil `seed` -
+    bir xil ma'lumot (vaqtlar `now` ga nisbatan).
+    """
+
+    def __init__(self, seed=42, days=365, log=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.days = days
+        self.now = timezone.now().replace(microsecond=0)
+        self.start = self.now - timedelta(days=days)
+        self.prefix = f"seed{seed}"
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    def run(
+        self,
+        categories=16,
+        products=10000,
+        users=5000,
+        couriers=50,
+        carts=1000,
+        orders=100000,
+        expenses=1000,
+        rollups=True,
+    ):
+        User = get_user_model()
+        if User.objects.filter(username__startswith=f"{self.prefix}_").exists():
+            raise ValueError(
+                f"'{self.prefix}' ma'lumotlari allaqachon bor: boshqa --seed tanlang."
+            )
+
+        started = perf_counter()
+        with explicit_timestamps(Category, Product, Courier, Cart, CartItem, Expense):
+            with transaction.atomic():
+                self.create_categories(categories)
+                self.create_products(products)
+                self.create_users(users)
+                self.create_couriers(couriers)
+                self.create_carts(carts)
+                self.create_expenses(expenses)
+            self.create_orders(orders)
+        self.step("ombor hisobi", self.record_stock_in)
+
+        self.step("qidiruv indeksi", get_search_backend().rebuild)
+        if rollups:
+            self.step("kunlik savdo", rebuild_daily_sales)
+        bump_catalog_version()
+        self.counts["seconds"] = round(perf_counter() - started, 1)
+        return self.counts
+
+    def step(self, label, func):
+        started = perf_counter()
+        result = func()
+        self.log(f"{label}: {perf_counter() - started:.1f} s")
+        return result
+
+    def moment(self):
+        """`days` kunlik oraliqdagi tasodifiy vaqt."""
+        return self.start + timedelta(seconds=self.rng.randrange(self.days * 86400))
+
+    def create_categories(self, count):
+        self.categories = Category.objects.bulk_create(
+            Category(
+                name=f"{CATEGORY_NAMES[index % len(CATEGORY_NAMES)]} {self.prefix}-{index}",
+                slug=f"{self.prefix}-{index}",
+                updated_at=self.now,
+            )
+            for index in range(count)
+        )
+        self.counts["categories"] = count
+
+    def create_products(self, count):
+        rng = self.rng
+        category_ids = [category.pk for category in self.categories]
+        self.product_ids, self.product_prices, self.product_costs = [], [], []
+        self.product_stocks = []
+        for offset in range(0, count, ORDER_CHUNK_SIZE):
+            batch = []
+            for index in range(offset, min(offset + ORDER_CHUNK_SIZE, count)):
+                # Narx so'mda, 100 ga yaxlitlangan; mediana ~100 000.
+                price = Decimal(int(rng.lognormvariate(11.5, 1.1)) // 100 * 100 + 1000)
+                price = price.quantize(CENTS)
+                stock = rng.randrange(0, 500)
+                batch.append(
+                    Product(
+                        name=f"Mahsulot {self.prefix}-{index}",
+                        description=f"{rng.choice(CATEGORY_NAMES)} uchun sintetik mahsulot",
+                        price=price,
+                        cost_price=(price * rng.randrange(55, 86) / 100).quantize(CENTS),
+                        stock=stock,
+                        total_stock_in=stock,
+                        is_active=rng.random() < 0.95,
+                        category_id=rng.choice(category_ids),
+                        weight=_money(rng.randrange(10, 5000)),
+                        volume=_money(rng.randrange(1, 50)),
+                        updated_at=self.now,
+                    )
+                )
+            for product in Product.objects.bulk_create(batch, batch_size=BULK_BATCH_SIZE):
+                self.product_ids.append(product.pk)
+                self.product_prices.append(product.price)
+                self.product_costs.append(product.cost_price)
+                self.product_stocks.append(product.stock)
+        weights = [1 / (rank + 1) ** POPULARITY_EXPONENT for rank in range(count)]
+        rng.shuffle(weights)
+        self.product_weights = list(accumulate(weights))
+        self.product_range = range(count)
+        self.counts["products"] = count
+
+    def create_users(self, count):
+        User = get_user_model()
+        password = make_password(None)
+        self.user_ids = [
+            user.pk
+            for user in User.objects.bulk_create(
+                (
+                    User(
+                        username=f"{self.prefix}_user_{index}",
+                        email=f"{self.prefix}_user_{index}@example.com",
+                        password=password,
+                        date_joined=self.moment(),
+                    )
+                    for index in range(count)
+                ),
+                batch_size=BULK_BATCH_SIZE,
+            )
+        ]
+        self.counts["users"] = count
+
+    def create_couriers(self, count):
+        User = get_user_model()
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            User(
+                username=f"{self.prefix}_courier_{index}",
+                password=password,
+                date_joined=self.start,
+            )
+            for index in range(count)
+        )
+        self.courier_ids = [
+            courier.pk
+            for courier in Courier.objects.bulk_create(
+                Courier(
+                    user=user,
+                    phone=f"+998{self.seed % 100:02d}{index:07d}",
+                    first_name=f"Kurer{index}",
+                    last_name=self.prefix,
+                    car_number=f"{self.prefix.upper()}-{index:05d}",
+                    car_name=self.rng.choice(("Damas", "Labo", "Gazel", "Isuzu")),
+                    car_capacity=_money(self.rng.randrange(300, 2000)),
+                    car_max_weight=_money(self.rng.randrange(50000, 300000)),
+                    created_at=self.start,
+                    updated_at=self.start,
+                )
+                for index, user in enumerate(users)
+            )
+        ]
+        self.counts["couriers"] = count
+
+    def create_carts(self, count):
+        rng = self.rng
+        carts = Cart.objects.bulk_create(
+            Cart(user_id=user_id, created_at=self.now, updated_at=self.now)
+            for user_id in self.user_ids[:count]
+        )
+        items = []
+        for cart in carts:
+            for index in set(self.sample_products(rng.randint(1, 5))):
+                items.append(
+                    CartItem(
+                        cart=cart,
+                        product_id=self.product_ids[index],
+                        quantity=rng.randint(1, 3),
+                        created_at=self.now,
+                        updated_at=self.now,
+                    )
+                )
+        CartItem.objects.bulk_create(items, batch_size=BULK_BATCH_SIZE)
+        cart_ids = [cart.pk for cart in carts]
+        for offset in range(0, len(cart_ids), BULK_BATCH_SIZE):
+            chunk = cart_ids[offset : offset + BULK_BATCH_SIZE]
+            cart_totals_update(Cart.objects.filter(pk__in=chunk))
+        self.counts["carts"] = len(carts)
+
+    def create_expenses(self, count):
+        rng = self.rng
+        Expense.objects.bulk_create(
+            (
+                Expense(
+                    title=rng.choice(EXPENSE_TITLES),
+                    amount=_money(rng.randrange(10000, 5000000) * 100),
+                    expense_date=self.moment().date(),
+                    created_at=self.now,
+                )
+                for _ in range(count)
+            ),
+            batch_size=BULK_BATCH_SIZE,
+        )
+        self.counts["expenses"] = count
+
+    def sample_products(self, count):
+        """Mashhurlik bo'yicha `count` ta mahsulot indeksi (`product_ids` dagi o'rni)."""
+        return self.rng.choices(self.product_range, cum_weights=self.product_weights, k=count)
+
+    def order_status(self, created_at):
+        roll = self.rng.random()
+        if self.now - created_at > timedelta(days=RECENT_DAYS):
+            if roll < 0.85:
+                return Order.Status.SHIPPED.value
+            return (Order.Status.CANCELED if roll < 0.97 else Order.Status.PAID).value
+        if roll < 0.4:
+            return Order.Status.CREATED.value
+        if roll < 0.7:
+            return Order.Status.PAID.value
+        return (Order.Status.SHIPPED if roll < 0.9 else Order.Status.CANCELED).value
+
+    def create_orders(self, count):
+        """
+        Buyurtma va qatorlar ORM ni chetlab `executemany` bilan yoziladi: `bulk_create`
+        har bir qiymatni alohida kompilyatsiya qiladi va SQLite da bitta INSERT ga ~140
+        qator sig'adi, bu 1M qatorda daqiqalar degani. Id lar oldindan beriladi (bazada
+        boshqa yozuvchi yo'q deb hisoblanadi), oxirida ketma-ketliklar tiklanadi.
+
+        Har bir qator checkout dagidek jurnalga sotuv bo'lib tushadi, bekor qilinganlar
+        qaytadi ham; bekor qilinmaganlar `self.sold` ga yig'iladi (`record_stock_in`).
+        """
+        rng = self.rng
+        adapt_datetime = connection.ops.adapt_datetimefield_value
+        open_statuses = {status.value for status in OPEN_STATUSES}
+        payment_methods = Order.PaymentMethod.values
+        order_id = (Order.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        item_id = (OrderItem.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        sale, cancel = StockMovement.Kind.SALE.value, StockMovement.Kind.CANCEL.value
+        canceled = Order.Status.CANCELED.value
+        self.sold = [0] * len(self.product_ids)
+        lines_total = 0
+        started = perf_counter()
+        for offset in range(0, count, ORDER_CHUNK_SIZE):
+            size = min(ORDER_CHUNK_SIZE, count - offset)
+            orders, items, movements = [], [], []
+            for _ in range(size):
+                created_at = self.moment()
+                stamp = adapt_datetime(created_at)
+                status = self.order_status(created_at)
+                delivery = (Order.DeliveryType.PICKUP.value, "", None, None)
+                courier_id = None
+                if rng.random() < 0.4:
+                    delivery = (
+                        Order.DeliveryType.COURIER.value,
+                        f"Toshkent, {rng.choice(STREETS)} ko'chasi, {rng.randint(1, 150)}",
+                        Decimal(rng.randrange(41200000, 41400000)).scaleb(-6),
+                        Decimal(rng.randrange(69100000, 69400000)).scaleb(-6),
+                    )
+                    if self.courier_ids and (status not in open_statuses or rng.random() < 0.5):
+                        courier_id = rng.choice(self.courier_ids)
+
+                lines = {}
+                line_count = rng.choices(LINES_PER_ORDER, LINES_PER_ORDER_WEIGHTS)[0]
+                for index in self.sample_products(line_count):
+                    quantity = rng.choices(QUANTITIES, QUANTITY_WEIGHTS)[0]
+                    lines[index] = lines.get(index, 0) + quantity
+                total = ZERO
+                for index, quantity in lines.items():
+                    price = self.product_prices[index]
+                    product_id = self.product_ids[index]
+                    total += price * quantity
+                    items.append(
+                        (
+                            item_id,
+                            order_id,
+                            product_id,
+                            quantity,
+                            price,
+                            self.product_costs[index],
+                            stamp,
+                        )
+                    )
+                    item_id += 1
+                    movements.append((product_id, sale, -quantity, order_id, SEED_NOTE, stamp))
+                    if status == canceled:
+                        movements.append((product_id, cancel, quantity, order_id, SEED_NOTE, stamp))
+                    else:
+                        self.sold[index] += quantity
+                orders.append(
+                    (
+                        order_id,
+                        rng.choice(self.user_ids),
+                        courier_id,
+                        status,
+                        *delivery,
+                        rng.choice(payment_methods),
+                        False,
+                        total,
+                        stamp,
+                        stamp,
+                    )
+                )
+                order_id += 1
+
+            with transaction.atomic():
+                _insert_rows(Order, ORDER_COLUMNS, orders)
+                _insert_rows(OrderItem, ORDER_ITEM_COLUMNS, items)
+                _insert_rows(StockMovement, MOVEMENT_COLUMNS, movements)
+            lines_total += len(items)
+            self.log(
+                f"buyurtmalar: {offset + size}/{count}, qatorlar: {lines_total} "
+                f"({perf_counter() - started:.1f} s)"
+            )
+        _reset_sequences(Order, OrderItem)
+        self.counts["orders"] = count
+        self.counts["order_lines"] = lines_total
+
+    @transaction.atomic
+    def record_stock_in(self):
+        """
+        Sotilgan mahsulot avval omborga kirgan bo'lishi kerak: boshlang'ich kirim (seed
+        boshida) = qoldiq + sotilgan. `Product.stock` yakuniy qoldiq bo'lib qoladi, jurnal
+        yig'indisi unga teng, hisoblagichlar bitta `executemany` UPDATE bilan oshiriladi.
+        """
+        quote = connection.ops.quote_name
+        table = quote(Product._meta.db_table)
+        stock_in, stock_out = quote("total_stock_in"), quote("total_stock_out")
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"UPDATE {table} SET {stock_in} = {stock_in} + %s, "
+                f"{stock_out} = {stock_out} + %s WHERE {quote('id')} = %s",
+                [
+                    (sold, sold, product_id)
+                    for product_id, sold in zip(self.product_ids, self.sold)
+                    if sold
+                ],
+            )
+        record_movements(
+            StockMovement(
+                product_id=product_id,
+                kind=StockMovement.Kind.RECEIPT,
+                quantity=stock + sold,
+                note=SEED_NOTE,
+                created_at=self.start,
+            )
+            for product_id, stock, sold in zip(self.product_ids, self.product_stocks, self.sold)
+            if stock + sold
+        )
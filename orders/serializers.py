@@ -1,11 +1,21 @@
 from decimal import Decimal
 
 from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.utils import timezone
 from rest_framework import serializers
 
+from catalog.cache import bump_catalog_version
 from catalog.models import Product
-from .models import Cart, CartItem, Expense, Order, OrderItem
-from .services import reverse_geocode_address
+from catalog.stock import record_sale
+from config.serializers import DynamicFieldsMixin
+from users.serializers import CourierSerializer
+from .cart import clear_cart
+from .models import Cart, CartItem, DemandForecast, Expense, Order, OrderItem
+from .rollup import record_order_items, store_today
+from .services import placeholder_address
+from .tasks import schedule_address_lookup
+from .timeseries import GRANULARITIES, MAX_SPAN_DAYS, default_range
 
 
 class CartItemSerializer(serializers.ModelSerializer):
@@ -40,17 +50,41 @@ class CartItemSerializer(serializers.ModelSerializer):
         return obj.total_price
 
 
-class CartSerializer(serializers.ModelSerializer):
-    items = CartItemSerializer(many=True, read_only=True)
-    total_price = serializers.SerializerMethodField()
+class CartSummarySerializer(serializers.ModelSerializer):
+    total_price = serializers.DecimalField(
+        source="subtotal", max_digits=14, decimal_places=2, read_only=True
+    )
 
     class Meta:
         model = Cart
-        fields = ["id", "user", "created_at", "updated_at", "items", "total_price"]
+        fields = ["id", "item_count", "subtotal", "total_price", "updated_at"]
         read_only_fields = fields
 
-    def get_total_price(self, obj):
-        return obj.total_price
+
+class CartSerializer(CartSummarySerializer):
+    """`orders.cart.load_cart` dan: qatorlar oldindan yuklangan, jami savatda saqlangan."""
+
+    items = CartItemSerializer(many=True, read_only=True)
+
+    class Meta(CartSummarySerializer.Meta):
+        fields = [
+            "id",
+            "user",
+            "created_at",
+            "updated_at",
+            "items",
+            "item_count",
+            "subtotal",
+            "total_price",
+        ]
+        read_only_fields = fields
+
+
+class CartMutationSerializer(serializers.Serializer):
+    """Savatni o'zgartirgan so'rov javobi: o'zgargan qator va savat jami, butun savat emas."""
+
+    item = CartItemSerializer(read_only=True, allow_null=True)
+    cart = CartSummarySerializer(read_only=True)
 
 
 class CartItemCreateSerializer(serializers.Serializer):
@@ -60,6 +94,49 @@ class CartItemCreateSerializer(serializers.Serializer):
     quantity = serializers.IntegerField(min_value=1, default=1)
 
 
+class CartBatchItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """
+    Savatni bitta so'rovda sinxronlash: `items` - mahsulotning yangi soni (0 - o'chirish),
+    `remove` - o'chiriladigan mahsulotlar, `replace` - ro'yxatda yo'q qatorlarni o'chirish.
+    """
+
+    items = CartBatchItemSerializer(many=True, required=False, default=list)
+    remove = serializers.ListField(child=serializers.IntegerField(), required=False, default=list)
+    replace = serializers.BooleanField(required=False, default=False)
+
+    def validate(self, attrs):
+        quantities = {}
+        for item in attrs["items"]:
+            if item["product"] in quantities:
+                raise serializers.ValidationError(
+                    {"items": f"Mahsulot takrorlangan: {item['product']}"}
+                )
+            quantities[item["product"]] = item["quantity"]
+        both = quantities.keys() & set(attrs["remove"])
+        if both:
+            raise serializers.ValidationError(
+                {"remove": f"items va remove da bir vaqtda: {sorted(both)}"}
+            )
+
+        # Barcha mahsulotlar bitta so'rov bilan tekshiriladi.
+        wanted = [product_id for product_id, quantity in quantities.items() if quantity > 0]
+        available = set(
+            Product.objects.filter(pk__in=wanted, is_active=True).values_list("pk", flat=True)
+        )
+        missing = sorted(set(wanted) - available)
+        if missing:
+            raise serializers.ValidationError(
+                {"items": f"Mahsulot topilmadi yoki nofaol: {missing}"}
+            )
+        attrs["items"] = quantities
+        return attrs
+
+
 class CartItemUpdateSerializer(serializers.ModelSerializer):
     quantity = serializers.IntegerField(min_value=1)
 
@@ -89,6 +166,7 @@ class OrderSerializer(serializers.ModelSerializer):
             "delivery_type",
             "payment_method",
             "delivery_address",
+            "delivery_address_pending",
             "delivery_latitude",
             "delivery_longitude",
             "total_price",
@@ -105,10 +183,41 @@ class OrderSerializer(serializers.ModelSerializer):
         return None
 
 
+class OrderListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """
+    Ro'yxat uchun ixcham buyurtma: qatorlarsiz, kurer faqat id va ism. `item_count`
+    va kurer bitta JOIN li so'rovdan (`OrderViewSet.get_queryset`). `?expand=items,courier`
+    to'liq ko'rinishni qaytaradi, `?fields=` - kerakli maydonlar.
+    """
+
+    item_count = serializers.IntegerField(read_only=True)
+    courier_name = serializers.CharField(source="courier.full_name", read_only=True, default=None)
+
+    class Meta:
+        model = Order
+        fields = [
+            "id",
+            "status",
+            "delivery_type",
+            "payment_method",
+            "delivery_address",
+            "total_price",
+            "created_at",
+            "updated_at",
+            "item_count",
+            "courier",
+            "courier_name",
+        ]
+        expandable_fields = {
+            "items": (OrderItemSerializer, {"many": True}),
+            "courier": (CourierSerializer, {}),
+        }
+
+
 class OrderCreateItemSerializer(serializers.Serializer):
-    product = serializers.PrimaryKeyRelatedField(
-        queryset=Product.objects.filter(is_active=True)
-    )
+    # Har bir qator uchun alohida SELECT bo'lmasligi uchun faqat id; mavjudligi va
+    # faolligi `OrderCreateSerializer.create` ichida bitta so'rovda tekshiriladi.
+    product = serializers.IntegerField(min_value=1)
     quantity = serializers.IntegerField(min_value=1)
 
 
@@ -124,6 +233,7 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             "delivery_type",
             "payment_method",
             "delivery_address",
+            "delivery_address_pending",
             "delivery_latitude",
             "delivery_longitude",
             "total_price",
@@ -134,6 +244,7 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             "id",
             "status",
             "delivery_address",
+            "delivery_address_pending",
             "total_price",
             "created_at",
             "updated_at",
@@ -169,20 +280,60 @@ class OrderCreateSerializer(serializers.ModelSerializer):
                 {"items": "Order yaratish uchun items yuboring yoki cartga mahsulot qo'shing."}
             )
 
-        cart_items = list(cart.items.select_related("product"))
+        cart_items = list(cart.items.values_list("product_id", "quantity"))
         if not cart_items:
             raise serializers.ValidationError(
                 {"items": "Order yaratish uchun items yuboring yoki cartga mahsulot qo'shing."}
             )
 
-        return [(item.product, item.quantity) for item in cart_items], cart
+        return cart_items, cart
 
     def _aggregate_items(self, items_for_order):
         aggregated = {}
-        for product, quantity in items_for_order:
-            aggregated[product.id] = aggregated.get(product.id, 0) + quantity
+        for product_id, quantity in items_for_order:
+            aggregated[product_id] = aggregated.get(product_id, 0) + quantity
         return aggregated
 
+    def _reserve_stock(self, products, aggregated_items):
+        """
+        Barcha mahsulotlar uchun bitta shartli UPDATE:
+        `stock = stock - CASE id ... END WHERE id IN (...) AND stock >= CASE id ... END`.
+        Qatorlar faqat shu UPDATE davomida band bo'ladi, oldindan SELECT FOR UPDATE kerak emas.
+        """
+        quantities = Case(
+            *[
+                When(pk=product_id, then=Value(quantity))
+                for product_id, quantity in aggregated_items.items()
+            ],
+            output_field=PositiveIntegerField(),
+        )
+        reserved = Product.objects.filter(
+            pk__in=aggregated_items.keys(), is_active=True, stock__gte=quantities
+        ).update(
+            stock=F("stock") - quantities,
+            total_stock_out=F("total_stock_out") + quantities,
+            updated_at=timezone.now(),
+        )
+        if reserved != len(aggregated_items):
+            # Boshqa checkout oldinroq ulgurgan: tranzaksiya bekor qilinadi.
+            in_stock = dict(
+                Product.objects.filter(pk__in=aggregated_items.keys()).values_list("pk", "stock")
+            )
+            raise serializers.ValidationError(
+                {
+                    "items": {
+                        products[product_id].name: (
+                            f"stock yetarli emas. Omborda: {in_stock.get(product_id)}, "
+                            f"so'ralgan: {quantity}"
+                        )
+                        for product_id, quantity in aggregated_items.items()
+                        if in_stock.get(product_id, 0) < quantity
+                    }
+                }
+            )
+        # update() signal yubormaydi: katalog keshini qo'lda eskirtiramiz.
+        bump_catalog_version()
+
     def create(self, validated_data):
         items_data = validated_data.pop("items", None)
         user = self.context["request"].user
@@ -191,19 +342,19 @@ class OrderCreateSerializer(serializers.ModelSerializer):
 
         delivery_type = validated_data.get("delivery_type", Order.DeliveryType.PICKUP)
         if delivery_type == Order.DeliveryType.COURIER:
-            latitude = validated_data.get("delivery_latitude")
-            longitude = validated_data.get("delivery_longitude")
-            address = reverse_geocode_address(latitude, longitude)
-            validated_data["delivery_address"] = (
-                address or f"Lat {latitude}, Lon {longitude}"
+            # Haqiqiy manzil commitdan keyin fonda aniqlanadi (orders.tasks).
+            validated_data["delivery_address"] = placeholder_address(
+                validated_data.get("delivery_latitude"),
+                validated_data.get("delivery_longitude"),
             )
+            validated_data["delivery_address_pending"] = True
         else:
             validated_data["delivery_address"] = ""
 
         with transaction.atomic():
             products = {
                 product.id: product
-                for product in Product.objects.select_for_update().filter(
+                for product in Product.objects.filter(
                     id__in=aggregated_items.keys(), is_active=True
                 )
             }
@@ -228,32 +379,35 @@ class OrderCreateSerializer(serializers.ModelSerializer):
             if stock_errors:
                 raise serializers.ValidationError({"items": stock_errors})
 
-            order = Order.objects.create(user=user, **validated_data)
-            total = Decimal("0.00")
-            for product_id, quantity in aggregated_items.items():
-                product = products[product_id]
-                price = product.price
-                OrderItem.objects.create(
-                    order=order,
-                    product=product,
+            self._reserve_stock(products, aggregated_items)
+
+            order_items = [
+                OrderItem(
+                    product=products[product_id],
                     quantity=quantity,
-                    price=price,
-                    cost_price=product.cost_price,
+                    price=products[product_id].price,
+                    cost_price=products[product_id].cost_price,
                 )
-                total += price * quantity
-                product.stock -= quantity
-                product.total_stock_out += quantity
-                product.save(update_fields=["stock", "total_stock_out"])
-            order.total_price = total
-            order.save(update_fields=["total_price", "delivery_address"])
-            
+                for product_id, quantity in aggregated_items.items()
+            ]
+            total = sum((item.price * item.quantity for item in order_items), Decimal("0.00"))
+
+            order = Order.objects.create(user=user, total_price=total, **validated_data)
+            for item in order_items:
+                item.order = order
+            OrderItem.objects.bulk_create(order_items)
+            # bulk_create signal yubormaydi: kunlik savdo jadvaliga shu yerda qo'shiladi.
+            record_order_items(order, order_items)
+            record_sale(order, aggregated_items)
+
             # Avtomatik kurer tanlash (agar courier delivery bo'lsa)
             if delivery_type == Order.DeliveryType.COURIER:
                 from .services import assign_courier_to_order
                 assign_courier_to_order(order)
+                schedule_address_lookup(order.id)
             
             if source_cart is not None:
-                source_cart.items.all().delete()
+                clear_cart(source_cart.pk)
         return order
 
 
@@ -262,3 +416,63 @@ class ExpenseSerializer(serializers.ModelSerializer):
         model = Expense
         fields = ["id", "title", "amount", "expense_date", "note", "created_at"]
         read_only_fields = ["id", "created_at"]
+
+
+class SalesTimeSeriesQuerySerializer(serializers.Serializer):
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default="day")
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        granularity = attrs["granularity"]
+        default_start, default_end = default_range(granularity, store_today())
+        end = attrs.get("end") or default_end
+        start = attrs.get("start") or min(default_start, end)
+        if start > end:
+            raise serializers.ValidationError({"start": "start end dan keyin bo'lishi mumkin emas."})
+        if (end - start).days + 1 > MAX_SPAN_DAYS[granularity]:
+            raise serializers.ValidationError(
+                {"start": f"'{granularity}' uchun eng ko'pi {MAX_SPAN_DAYS[granularity]} kun."}
+            )
+        attrs["start"], attrs["end"] = start, end
+        return attrs
+
+
+class ProductProfitabilityQuerySerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start, end = attrs.get("start"), attrs.get("end")
+        if start and end and start > end:
+            raise serializers.ValidationError({"start": "start end dan keyin bo'lishi mumkin emas."})
+        return attrs
+
+
+class ProductProfitabilitySerializer(serializers.Serializer):
+    product_id = serializers.IntegerField(source="pk", read_only=True)
+    name = serializers.CharField(read_only=True)
+    quantity_sold = serializers.IntegerField(read_only=True)
+    revenue = serializers.DecimalField(max_digits=18, decimal_places=2, read_only=True)
+    cost = serializers.DecimalField(max_digits=18, decimal_places=2, read_only=True)
+    profit = serializers.DecimalField(max_digits=18, decimal_places=2, read_only=True)
+    margin_percent = serializers.DecimalField(max_digits=18, decimal_places=2, read_only=True)
+
+
+class DemandForecastSerializer(serializers.ModelSerializer):
+    product_name = serializers.CharField(source="product.name", read_only=True)
+
+    class Meta:
+        model = DemandForecast
+        fields = [
+            "id",
+            "product",
+            "product_name",
+            "method",
+            "daily_demand",
+            "stock",
+            "days_of_cover",
+            "reorder_quantity",
+            "needs_reorder",
+            "computed_at",
+        ]
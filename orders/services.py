@@ -1,68 +1,200 @@
 import json
-from decimal import Decimal
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
+from django.conf import settings
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
 
 NOMINATIM_REVERSE_URL = "https://nominatim.openstreetmap.org/reverse"
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+class NominatimGeocoder:
+    # Nominatim foydalanish qoidasi: jarayon bo'yicha sekundiga ko'pi bilan 1 so'rov.
+    min_interval = 1.0
+    _lock = threading.Lock()
+    _last_request = 0.0
+
+    def _throttle(self):
+        with NominatimGeocoder._lock:
+            wait = NominatimGeocoder._last_request + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            NominatimGeocoder._last_request = time.monotonic()
+
+    def reverse(self, latitude, longitude):
+        self._throttle()
+        params = urlencode(
+            {
+                "format": "jsonv2",
+                "lat": latitude,
+                "lon": longitude,
+                "zoom": 18,
+                "addressdetails": 1,
+            }
+        )
+        request = Request(
+            f"{NOMINATIM_REVERSE_URL}?{params}",
+            headers={"User-Agent": "akk-order-service/1.0"},
+        )
+        try:
+            with urlopen(request, timeout=5) as response:
+                payload = json.loads(response.read().decode("utf-8"))
+                return payload.get("display_name", "").strip()
+        except Exception:
+            return ""
+
+
+class StubGeocoder:
+    """Tarmoqsiz ishlash va testlar uchun: koordinatadan barqaror manzil yasaydi."""
+
+    def reverse(self, latitude, longitude):
+        return f"Stub manzil ({latitude}, {longitude})"
+
+
+def geohash(latitude, longitude, precision):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    latitude, longitude = float(latitude), float(longitude)
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        interval, coordinate = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+class LRUCache:
+    """Jarayon ichidagi kichik LRU; geocode fon oqimlaridan ham chaqiriladi."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class CachedGeocoder:
+    """
+    Geocoder oldidagi ikki qavatli kesh: jarayon ichidagi LRU, keyin `GeocodeCache`
+    jadvali. Kalit - GEOCODE_CACHE_PRECISION uzunlikdagi geohash katak, yozuvlar
+    GEOCODE_CACHE_TTL dan keyin eskiradi.
+    """
+
+    memory = LRUCache(maxsize=getattr(settings, "GEOCODE_CACHE_MEMORY_SIZE", 4096))
+
+    def __init__(self, backend=None):
+        self.backend = backend or import_string(settings.GEOCODER)()
+        self.precision = settings.GEOCODE_CACHE_PRECISION
+        self.ttl = timedelta(seconds=settings.GEOCODE_CACHE_TTL)
+
+    def cell(self, latitude, longitude):
+        return geohash(latitude, longitude, self.precision)
+
+    def reverse(self, latitude, longitude):
+        from .models import GeocodeCache
+
+        cell = self.cell(latitude, longitude)
+        address = self.memory.get(cell)
+        if address is not None:
+            return address
+
+        cached = (
+            GeocodeCache.objects.filter(cell=cell, resolved_at__gt=timezone.now() - self.ttl)
+            .values_list("address", "resolved_at")
+            .first()
+        )
+        if cached is not None:
+            address, resolved_at = cached
+            self._remember(cell, address, resolved_at)
+            return address
+
+        address = self.backend.reverse(latitude, longitude)
+        if address:
+            resolved_at = timezone.now()
+            GeocodeCache.objects.update_or_create(
+                cell=cell, defaults={"address": address, "resolved_at": resolved_at}
+            )
+            self._remember(cell, address, resolved_at)
+        return address
+
+    def _remember(self, cell, address, resolved_at):
+        remaining = (resolved_at + self.ttl - timezone.now()).total_seconds()
+        if remaining > 0:
+            self.memory.set(cell, address, remaining)
+
+
+def get_geocoder():
+    return CachedGeocoder()
 
 
 def reverse_geocode_address(latitude, longitude):
-    params = urlencode(
-        {
-            "format": "jsonv2",
-            "lat": latitude,
-            "lon": longitude,
-            "zoom": 18,
-            "addressdetails": 1,
-        }
-    )
-    request = Request(
-        f"{NOMINATIM_REVERSE_URL}?{params}",
-        headers={"User-Agent": "akk-order-service/1.0"},
-    )
-    try:
-        with urlopen(request, timeout=5) as response:
-            payload = json.loads(response.read().decode("utf-8"))
-            return payload.get("display_name", "").strip()
-    except Exception:
-        return ""
+    return get_geocoder().reverse(latitude, longitude)
+
+
+def placeholder_address(latitude, longitude):
+    return f"Lat {latitude}, Lon {longitude}"
 
 
 def assign_courier_to_order(order):
     """
     Buyurtma uchun mos kurer tanlash.
-    Kurer mashinasining sig'imi buyurtma hajmiga mos kelishi kerak.
+    Kurer mashinasida allaqachon band qilingan yukdan tashqari bo'sh joy buyurtma
+    hajmi va og'irligiga yetishi kerak (orders.dispatch).
     """
-    from users.models import Courier
-    
+    from .dispatch import dispatch_courier_orders
+    from .models import Order
+
     # Faqat courier delivery uchun kurer tanlash
     if order.delivery_type != Order.DeliveryType.COURIER:
         return None
-    
-    # Buyurtma hajmini hisoblash
-    order_volume = Decimal("0.00")
-    for item in order.items.select_related('product'):
-        # Har bir mahsulotning hajmini miqdoriga ko'paytirish
-        product_volume = item.product.volume or Decimal("0.00")
-        order_volume += product_volume * Decimal(str(item.quantity))
-    
-    # Agar hajm 0 bo'lsa, minimal hajm sifatida 0.01 kub metr deb olamiz
-    if order_volume == 0:
-        order_volume = Decimal("0.01")
-    
-    # Faol kurerlarni topish va sig'imiga qarab saralash
-    available_couriers = Courier.objects.filter(
-        is_active=True,
-        car_capacity__gte=order_volume
-    ).order_by('car_capacity')  # Eng kichik mos keladigan mashinani tanlash
-    
-    if available_couriers.exists():
-        # Eng kichik mos keladigan kurer tanlash
-        courier = available_couriers.first()
-        order.courier = courier
-        order.save(update_fields=['courier'])
-        return courier
-    
-    # Agar mos kurer topilmasa, None qaytariladi
-    return None
+
+    assignments = dispatch_courier_orders(order_ids=[order.pk]).assignments
+    if not assignments:
+        # Agar mos kurer topilmasa, None qaytariladi
+        return None
+
+    order.courier_id = next(iter(assignments))
+    return order.courier
@@ -0,0 +1,111 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from catalog.models import Product
+from catalog.stock import restock_order
+from .cart import cart_totals_update
+from .finance import invalidate_finance_cache
+from .models import Cart, Expense, Order, OrderItem
+from .rollup import apply_sales, record_order, sales_rows
+
+
+def _counts(status):
+    return status != Order.Status.CANCELED
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_status(sender, instance, update_fields=None, **kwargs):
+    instance._previous_status = None
+    if instance.pk and (update_fields is None or "status" in update_fields):
+        instance._previous_status = (
+            Order.objects.filter(pk=instance.pk).values_list("status", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Order)
+def update_sales_on_status_change(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_status", None)
+    if created:
+        if _counts(instance.status):
+            apply_sales(instance, {}, orders=1)
+        return
+    if previous is None:
+        return
+    if _counts(previous) != _counts(instance.status):
+        sign = 1 if _counts(instance.status) else -1
+        record_order(instance, sign=sign)
+        # Bekor qilingan buyurtma mahsulotlari omborga qaytadi (va aksincha).
+        restock_order(instance, sign=-sign)
+
+
+@receiver(post_delete, sender=Order)
+def update_sales_on_order_delete(sender, instance, **kwargs):
+    # Qatorlar kaskad bilan avvalroq o'chib, o'zlarini ayirib bo'lgan; faqat son qoladi.
+    if _counts(instance.status):
+        apply_sales(instance, {}, orders=-1)
+
+
+@receiver(pre_save, sender=OrderItem)
+def remember_order_item(sender, instance, **kwargs):
+    instance._previous_line = None
+    if instance.pk:
+        instance._previous_line = (
+            OrderItem.objects.filter(pk=instance.pk)
+            .values_list("product_id", "quantity", "price", "cost_price")
+            .first()
+        )
+
+
+@receiver(post_save, sender=OrderItem)
+def update_sales_on_item_save(sender, instance, **kwargs):
+    order = instance.order
+    if not _counts(order.status):
+        return
+    rows = sales_rows(
+        order, [(instance.product_id, instance.quantity, instance.price, instance.cost_price)]
+    )
+    previous = getattr(instance, "_previous_line", None)
+    if previous is not None:
+        for key, values in sales_rows(order, [previous], sign=-1).items():
+            row = rows[key]
+            for index, value in enumerate(values):
+                row[index] += value
+    apply_sales(order, rows)
+
+
+@receiver(post_delete, sender=OrderItem)
+def update_sales_on_item_delete(sender, instance, **kwargs):
+    order = Order.objects.filter(pk=instance.order_id).only("status", "created_at").first()
+    if order is None or not _counts(order.status):
+        return
+    apply_sales(
+        order,
+        sales_rows(
+            order,
+            [(instance.product_id, instance.quantity, instance.price, instance.cost_price)],
+            sign=-1,
+        ),
+    )
+
+
+@receiver(post_save, sender=Product)
+def refresh_carts_on_price_change(sender, instance, created, update_fields=None, **kwargs):
+    # Savat jami joriy narxda saqlanadi: narx o'zgarsa shu mahsulotli savatlar qayta hisoblanadi.
+    if created or (update_fields is not None and "price" not in update_fields):
+        return
+    loaded_price = getattr(instance, "_loaded_price", None)
+    if loaded_price is not None and loaded_price == instance.price:
+        return
+    cart_totals_update(Cart.objects.filter(items__product=instance))
+    instance._loaded_price = instance.price
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_delete, sender=Expense)
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def invalidate_finance_on_write(sender, **kwargs):
+    # Har bir qator uchun chaqiriladi, lekin bump tranzaksiyada bir marta (commitdan keyin).
+    invalidate_finance_cache()
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import Order
+from .services import reverse_geocode_address
+
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.GEOCODE_WORKERS, thread_name_prefix="geocode"
+        )
+    return _executor
+
+
+def resolve_order_address(order_id):
+    """Buyurtmaning vaqtinchalik (koordinata) manzilini haqiqiy manzil bilan almashtiradi."""
+    location = (
+        Order.objects.filter(pk=order_id, delivery_address_pending=True)
+        .values_list("delivery_latitude", "delivery_longitude")
+        .first()
+    )
+    if location is None:
+        return False
+
+    address = reverse_geocode_address(*location)
+    if not address:
+        # Geocoder javob bermadi: `geocode_pending_orders` keyinroq qayta urinadi.
+        return False
+
+    return bool(
+        Order.objects.filter(pk=order_id, delivery_address_pending=True).update(
+            delivery_address=address,
+            delivery_address_pending=False,
+            updated_at=timezone.now(),
+        )
+    )
+
+
+def _run_in_background(order_id):
+    close_old_connections()
+    try:
+        resolve_order_address(order_id)
+    finally:
+        connection.close()
+
+
+def schedule_address_lookup(order_id):
+    """Commitdan keyin manzilni fonda aniqlaydi; so'rov oqimi geocoderni kutmaydi."""
+
+    def submit():
+        if settings.GEOCODE_IN_BACKGROUND:
+            _get_executor().submit(_run_in_background, order_id)
+        else:
+            resolve_order_address(order_id)
+
+    transaction.on_commit(submit)
@@ -1,14 +1,57 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import F, Max, Sum
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIRequestFactory, APITestCase
 
-from catalog.models import Category, Product
-from orders.models import Expense, Order, OrderItem
+from catalog.cache import _flush_cache_versions
+from catalog.models import CacheVersion, Category, Product, StockMovement
+from catalog.stock import stock_levels
+from users.models import Courier
+from orders.benchmarks import load_baseline, run_benchmarks
+from orders.dispatch import courier_free_capacity, dispatch_courier_orders
+from orders.finance import (
+    FINANCE_VERSION,
+    FinanceEngine,
+    finance_cache,
+    get_finance_version,
+    product_profitability,
+)
+from orders.forecast import forecast_demand, rebuild_demand_forecast
+from orders.guest_cart import merge_guest_cart
+from orders.models import (
+    Cart,
+    CartItem,
+    DailyProductSales,
+    DemandForecast,
+    Expense,
+    GeocodeCache,
+    HourlySales,
+    IdempotencyKey,
+    Order,
+    OrderItem,
+)
+from orders.rollup import store_today
+from orders.serializers import OrderCreateSerializer
+from orders.services import CachedGeocoder, geohash
 
 User = get_user_model()
 
@@ -51,46 +94,134 @@ class OrderFlowTests(APITestCase):
         self.assertEqual(order.delivery_type, "pickup")
         self.assertEqual(order.payment_method, "cash")
         self.assertEqual(self.user.cart.items.count(), 0)
+        self.assertEqual(Cart.objects.get(user=self.user).item_count, 0)
         self.product.refresh_from_db()
         self.assertEqual(self.product.stock, 48)
         self.assertEqual(self.product.total_stock_out, 2)
         self.assertEqual(str(order.items.first().cost_price), "70000.00")
 
-    def test_courier_requires_coordinates(self):
-        create_order_url = reverse("order-list")
+    def test_cancel_returns_stock_to_ledger(self):
         response = self.client.post(
-            create_order_url,
+            reverse("order-list"),
             {
-                "delivery_type": "courier",
-                "payment_method": "card",
-                "items": [{"product": self.product.id, "quantity": 1}],
+                "delivery_type": "pickup",
+                "payment_method": "cash",
+                "items": [{"product": self.product.id, "quantity": 3}],
             },
             format="json",
         )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        order = Order.objects.get(pk=response.data["id"])
+        self.assertEqual(
+            list(order.stock_movements.values_list("kind", "quantity")),
+            [(StockMovement.Kind.SALE, -3)],
+        )
 
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
-        self.assertIn("delivery_location", response.data)
+        order.status = Order.Status.CANCELED
+        order.save()
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 50)
+        self.assertEqual(self.product.total_stock_out, 0)
+        self.assertEqual(stock_levels([self.product.id]), {self.product.id: 50})
+
+    def test_uncancel_after_stock_sold_elsewhere_is_rejected(self):
+        response = self.client.post(
+            reverse("order-list"),
+            {"items": [{"product": self.product.id, "quantity": 30}]},
+            format="json",
+        )
+        order = Order.objects.get(pk=response.data["id"])
+        order.status = Order.Status.CANCELED
+        order.save()
+        Product.objects.filter(pk=self.product.pk).update(stock=10)
+
+        order.status = Order.Status.PAID
+        with self.assertRaises(DjangoValidationError):
+            order.full_clean()
+        with self.assertRaises(DjangoValidationError), transaction.atomic():
+            order.save()
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.total_stock_out), (10, 0))
+        self.assertEqual(Order.objects.get(pk=order.pk).status, Order.Status.CANCELED)
+
+    def test_cancel_of_order_created_outside_checkout_keeps_counters_valid(self):
+        order = Order.objects.create(user=self.user)
+        OrderItem.objects.create(order=order, product=self.product, quantity=4, price="100000.00")
 
-    @patch("orders.serializers.reverse_geocode_address", return_value="Tashkent, Yunusobod")
-    def test_courier_order_saves_address(self, _mock_reverse):
+        order.status = Order.Status.CANCELED
+        order.save()
+
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.total_stock_out), (54, 0))
+
+    def test_courier_requires_coordinates(self):
         create_order_url = reverse("order-list")
         response = self.client.post(
             create_order_url,
             {
                 "delivery_type": "courier",
                 "payment_method": "card",
-                "delivery_latitude": "41.311081",
-                "delivery_longitude": "69.240562",
                 "items": [{"product": self.product.id, "quantity": 1}],
             },
             format="json",
         )
 
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("delivery_location", response.data)
+
+    @override_settings(GEOCODE_IN_BACKGROUND=False)
+    @patch("orders.tasks.reverse_geocode_address", return_value="Tashkent, Yunusobod")
+    def test_courier_order_saves_address(self, mock_reverse):
+        create_order_url = reverse("order-list")
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                create_order_url,
+                {
+                    "delivery_type": "courier",
+                    "payment_method": "card",
+                    "delivery_latitude": "41.311081",
+                    "delivery_longitude": "69.240562",
+                    "items": [{"product": self.product.id, "quantity": 1}],
+                },
+                format="json",
+            )
+
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        # Javob geocoderni kutmaydi: vaqtinchalik koordinata manzili qaytadi.
+        self.assertEqual(response.data["delivery_address"], "Lat 41.311081, Lon 69.240562")
+        self.assertTrue(response.data["delivery_address_pending"])
+
         order = Order.objects.get(pk=response.data["id"])
         self.assertEqual(order.delivery_address, "Tashkent, Yunusobod")
+        self.assertFalse(order.delivery_address_pending)
         self.assertEqual(str(order.delivery_latitude), "41.311081")
         self.assertEqual(str(order.delivery_longitude), "69.240562")
+        mock_reverse.assert_called_once()
+
+    @override_settings(GEOCODE_IN_BACKGROUND=False, GEOCODER="orders.services.StubGeocoder")
+    def test_pending_address_is_retried_by_command(self):
+        with patch("orders.tasks.reverse_geocode_address", return_value=""):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    reverse("order-list"),
+                    {
+                        "delivery_type": "courier",
+                        "delivery_latitude": "41.311081",
+                        "delivery_longitude": "69.240562",
+                        "items": [{"product": self.product.id, "quantity": 1}],
+                    },
+                    format="json",
+                )
+        order = Order.objects.get(pk=response.data["id"])
+        self.assertTrue(order.delivery_address_pending)
+
+        call_command("geocode_pending_orders", stdout=StringIO())
+
+        order.refresh_from_db()
+        self.assertFalse(order.delivery_address_pending)
+        self.assertEqual(order.delivery_address, "Stub manzil (41.311081, 69.240562)")
 
     def test_create_order_rejects_if_stock_is_not_enough(self):
         create_order_url = reverse("order-list")
@@ -106,6 +237,337 @@ class OrderFlowTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("items", response.data)
 
+    def test_checkout_query_count_does_not_grow_with_lines(self):
+        products = [
+            Product.objects.create(
+                name=f"Bolt {index}",
+                price="10.00",
+                cost_price="6.00",
+                stock=100,
+                category=self.category,
+            )
+            for index in range(50)
+        ]
+
+        def checkout(lines):
+            return self.client.post(
+                reverse("order-list"),
+                {"items": [{"product": product.id, "quantity": 2} for product in lines]},
+                format="json",
+            )
+
+        with CaptureQueriesContext(connection) as single:
+            checkout(products[:1])
+        with CaptureQueriesContext(connection) as bulk:
+            response = checkout(products[1:])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(bulk.captured_queries), len(single.captured_queries))
+        order = Order.objects.get(pk=response.data["id"])
+        self.assertEqual(order.items.count(), 49)
+        self.assertEqual(order.total_price, Decimal("980.00"))
+        self.assertEqual(Product.objects.get(pk=products[-1].pk).stock, 98)
+
+    def test_create_order_rejects_unknown_product(self):
+        response = self.client.post(
+            reverse("order-list"),
+            {"items": [{"product": self.product.id + 999, "quantity": 1}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("items", response.data)
+
+    def test_stock_reservation_is_conditional(self):
+        # Boshqa checkout snapshotdan keyin zaxirani kamaytirib ulgurgan holat.
+        stale = {self.product.id: self.product}
+        Product.objects.filter(pk=self.product.pk).update(stock=1)
+
+        with self.assertRaises(ValidationError):
+            OrderCreateSerializer()._reserve_stock(stale, {self.product.id: 2})
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 1)
+        self.assertEqual(self.product.total_stock_out, 0)
+
+
+class OrderConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="testpass123")
+        self.other = User.objects.create_user(username="other", password="testpass123")
+        self.order = Order.objects.create(user=self.user, status=Order.Status.PAID)
+        self.client.force_authenticate(user=self.user)
+
+    def test_unchanged_order_list_returns_304(self):
+        first = self.client.get(reverse("order-list"))
+        self.assertIn("ETag", first)
+        self.assertIn("Last-Modified", first)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("order-list"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(
+            reverse("order-list"), HTTP_IF_MODIFIED_SINCE=first["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_order_change_invalidates_etag(self):
+        first = self.client.get(reverse("order-detail", args=[self.order.id]))
+        self.order.status = Order.Status.SHIPPED
+        self.order.save()
+
+        response = self.client.get(
+            reverse("order-detail", args=[self.order.id]), HTTP_IF_NONE_MATCH=first["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], Order.Status.SHIPPED)
+
+    def test_etag_is_per_user(self):
+        mine = self.client.get(reverse("order-list"))
+        self.client.force_authenticate(user=self.other)
+        response = self.client.get(reverse("order-list"), HTTP_IF_NONE_MATCH=mine["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class OrderListRepresentationTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="testpass123")
+        category = Category.objects.create(name="Boxes", slug="boxes")
+        self.product = Product.objects.create(
+            name="Box", price="10.00", stock=1000, category=category
+        )
+        courier_user = User.objects.create_user(username="kurer", password="testpass123")
+        self.courier = Courier.objects.create(
+            user=courier_user,
+            phone="+998901112233",
+            first_name="Ali",
+            last_name="Valiyev",
+            car_number="01A111AA",
+            car_name="Damas",
+            car_capacity="4.00",
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def create_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(user=self.user, courier=self.courier)
+            OrderItem.objects.bulk_create(
+                [
+                    OrderItem(order=order, product=self.product, quantity=2, price="10.00"),
+                    OrderItem(order=order, product=self.product, quantity=3, price="10.00"),
+                ]
+            )
+
+    def test_list_is_compact_and_query_count_does_not_grow(self):
+        self.create_orders(2)
+        # ETag aggregati + sahifa (kurer JOIN, qatorlar soni subquery).
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("order-list"))
+        self.create_orders(8)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("order-list"))
+
+        row = response.data["results"][0]
+        self.assertNotIn("items", row)
+        self.assertEqual(row["item_count"], 5)
+        self.assertEqual((row["courier"], row["courier_name"]), (self.courier.id, "Ali Valiyev"))
+
+    def test_expand_and_sparse_fields(self):
+        self.create_orders(3)
+        # + qatorlar va mahsulotlar prefetch.
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("order-list"), {"expand": "items,courier"})
+        row = response.data["results"][0]
+        self.assertEqual(len(row["items"]), 2)
+        self.assertEqual(row["courier"]["user"]["username"], "kurer")
+
+        response = self.client.get(reverse("order-list"), {"fields": "id,item_count"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "item_count"})
+
+    def test_retrieve_keeps_full_representation(self):
+        self.create_orders(1)
+        order = Order.objects.get()
+
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("order-detail", args=[order.id]))
+
+        self.assertEqual(len(response.data["items"]), 2)
+        self.assertEqual(response.data["courier"]["full_name"], "Ali Valiyev")
+
+
+class CourierDispatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="testpass123")
+        category = Category.objects.create(name="Boxes", slug="boxes")
+        # 1 dona = 1 m3, 10 kg
+        self.product = Product.objects.create(
+            name="Box",
+            price="10.00",
+            cost_price="5.00",
+            stock=10000,
+            volume="1.00",
+            weight="10.00",
+            category=category,
+        )
+
+    def create_courier(self, name, capacity, max_weight=None):
+        user = User.objects.create_user(username=name, password="testpass123")
+        return Courier.objects.create(
+            user=user,
+            phone=f"+998{name}",
+            first_name=name,
+            last_name="Kurer",
+            car_number=name.upper(),
+            car_name="Damas",
+            car_capacity=capacity,
+            car_max_weight=max_weight,
+        )
+
+    def create_order(self, quantity, courier=None, status=Order.Status.CREATED):
+        order = Order.objects.create(
+            user=self.user,
+            delivery_type=Order.DeliveryType.COURIER,
+            delivery_latitude="41.311081",
+            delivery_longitude="69.240562",
+            courier=courier,
+            status=status,
+        )
+        OrderItem.objects.create(
+            order=order, product=self.product, quantity=quantity, price="10.00", cost_price="5.00"
+        )
+        return order
+
+    def test_orders_are_packed_into_free_capacity(self):
+        small = self.create_courier("small", "4.00")
+        large = self.create_courier("large", "10.00")
+        orders = [self.create_order(quantity) for quantity in (6, 4, 3, 1)]
+
+        result = dispatch_courier_orders()
+
+        self.assertEqual(result.unassigned, [])
+        self.assertCountEqual(result.assignments[small.id], [orders[1].id])
+        self.assertCountEqual(result.assignments[large.id], [orders[0].id, orders[2].id, orders[3].id])
+        self.assertEqual(Order.objects.filter(courier=large).count(), 3)
+
+    def test_committed_open_orders_reduce_capacity(self):
+        courier = self.create_courier("busy", "5.00")
+        self.create_order(4, courier=courier, status=Order.Status.PAID)
+        self.create_order(4, courier=courier, status=Order.Status.SHIPPED)
+        fits = self.create_order(1)
+        too_big = self.create_order(2)
+
+        result = dispatch_courier_orders()
+
+        self.assertEqual(result.assignments, {courier.id: [fits.id]})
+        self.assertEqual(result.unassigned, [too_big.id])
+
+    def test_weight_limit_is_respected(self):
+        light = self.create_courier("light", "100.00", max_weight="30.00")
+        heavy = self.create_courier("heavy", "200.00")
+        order = self.create_order(5)
+
+        result = dispatch_courier_orders()
+
+        self.assertEqual(result.assignments, {heavy.id: [order.id]})
+        self.assertNotIn(light.id, result.assignments)
+
+    def test_single_order_only_loads_candidate_couriers(self):
+        small = self.create_courier("small", "2.00")
+        self.create_order(1, courier=small, status=Order.Status.PAID)
+        large = self.create_courier("large", "10.00")
+        self.create_order(3, courier=large, status=Order.Status.PAID)
+        order = self.create_order(5)
+
+        self.assertEqual(
+            courier_free_capacity(min_volume=Decimal("5"), min_weight=Decimal("50")),
+            {large.id: (Decimal("7.00"), None)},
+        )
+        result = dispatch_courier_orders(order_ids=[order.id])
+
+        self.assertEqual(result.assignments, {large.id: [order.id]})
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self.create_courier("one", "1000.00")
+        self.create_order(1)
+        with CaptureQueriesContext(connection) as single:
+            dispatch_courier_orders()
+
+        for _ in range(30):
+            self.create_order(1)
+        with CaptureQueriesContext(connection) as many:
+            dispatch_courier_orders()
+
+        self.assertEqual(len(single), len(many))
+
+
+class CountingGeocoder:
+    def __init__(self):
+        self.calls = 0
+
+    def reverse(self, latitude, longitude):
+        self.calls += 1
+        return f"Manzil {self.calls}"
+
+
+@override_settings(GEOCODE_CACHE_PRECISION=7, GEOCODE_CACHE_TTL=3600)
+class GeocodeCacheTests(APITestCase):
+    def setUp(self):
+        CachedGeocoder.memory.clear()
+        self.backend = CountingGeocoder()
+        self.geocoder = CachedGeocoder(backend=self.backend)
+
+    def test_geohash_matches_reference(self):
+        self.assertEqual(geohash(57.64911, 10.40744, 11), "u4pruydqqvj")
+
+    def test_nearby_points_share_one_lookup(self):
+        first = self.geocoder.reverse(Decimal("41.311081"), Decimal("69.240562"))
+        second = self.geocoder.reverse(Decimal("41.311090"), Decimal("69.240570"))
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.backend.calls, 1)
+        self.assertEqual(GeocodeCache.objects.count(), 1)
+
+    def test_memory_hit_skips_database(self):
+        self.geocoder.reverse(41.311081, 69.240562)
+        with self.assertNumQueries(0):
+            self.geocoder.reverse(41.311081, 69.240562)
+
+    def test_persistent_cache_survives_process_cache_loss(self):
+        self.geocoder.reverse(41.311081, 69.240562)
+        CachedGeocoder.memory.clear()
+
+        self.assertEqual(self.geocoder.reverse(41.311081, 69.240562), "Manzil 1")
+        self.assertEqual(self.backend.calls, 1)
+
+    def test_expired_entry_is_refreshed(self):
+        self.geocoder.reverse(41.311081, 69.240562)
+        CachedGeocoder.memory.clear()
+        GeocodeCache.objects.update(resolved_at=timezone.now() - timedelta(hours=2))
+
+        self.assertEqual(self.geocoder.reverse(41.311081, 69.240562), "Manzil 2")
+        self.assertEqual(GeocodeCache.objects.get().address, "Manzil 2")
+
+    def test_warm_command_fills_cache_once_per_cell(self):
+        user = User.objects.create_user(username="warm", password="testpass123")
+        for latitude in ("41.311081", "41.311090", "41.350000"):
+            Order.objects.create(
+                user=user,
+                delivery_type=Order.DeliveryType.COURIER,
+                delivery_latitude=latitude,
+                delivery_longitude="69.240562",
+            )
+        GeocodeCache.objects.create(
+            cell="stale00", address="Eski", resolved_at=timezone.now() - timedelta(days=1)
+        )
+
+        out = StringIO()
+        with patch("orders.services.import_string", return_value=CountingGeocoder):
+            call_command("warm_geocode_cache", stdout=out)
+
+        self.assertIn("2/2", out.getvalue())
+        self.assertEqual(GeocodeCache.objects.count(), 2)
+        self.assertFalse(GeocodeCache.objects.filter(cell="stale00").exists())
+
 
 class FinanceApiTests(APITestCase):
     def setUp(self):
@@ -197,6 +659,56 @@ class FinanceApiTests(APITestCase):
         response = self.client.get(reverse("finance-overview"))
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_product_profitability_is_sorted_and_paginated(self):
+        self.client.force_authenticate(user=self.staff)
+        response = self.client.get(
+            reverse("finance-products"), {"ordering": "-profit", "page_size": 1}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first = response.data["results"][0]
+        self.assertEqual(first["product_id"], self.product2.id)
+        self.assertEqual(first["quantity_sold"], 2)
+        self.assertEqual(Decimal(first["profit"]), Decimal("80.00"))
+        self.assertEqual(Decimal(first["margin_percent"]), Decimal("40.00"))
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([row["name"] for row in response.data["results"]], ["Drill"])
+        self.assertIsNone(response.data["next"])
+
+    def test_product_profitability_respects_date_range(self):
+        self.client.force_authenticate(user=self.staff)
+        tomorrow = (timezone.localdate() + timedelta(days=1)).isoformat()
+        response = self.client.get(reverse("finance-products"), {"start": tomorrow})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+    def test_product_profitability_sums_only_days_between_start_and_end(self):
+        category = Category.objects.create(name="Paint", slug="paint")
+        brush = Product.objects.create(name="Brush", price="100.00", stock=10, category=category)
+        first_day = timezone.localdate() - timedelta(days=10)
+        DailyProductSales.objects.bulk_create(
+            DailyProductSales(
+                day=first_day + timedelta(days=offset),
+                product=brush,
+                quantity=1,
+                revenue="100.00",
+                cost="40.00",
+            )
+            for offset in range(5)
+        )
+
+        rows = {
+            row.pk: row
+            for row in product_profitability(
+                start=first_day + timedelta(days=1), end=first_day + timedelta(days=3)
+            )
+        }
+        self.assertEqual(rows[brush.pk].quantity_sold, 3)
+        self.assertEqual(rows[brush.pk].revenue, Decimal("300.00"))
+        self.assertEqual(rows[brush.pk].profit, Decimal("180.00"))
+
     def test_staff_can_crud_expense_api(self):
         self.client.force_authenticate(user=self.staff)
 
@@ -215,7 +727,7 @@ class FinanceApiTests(APITestCase):
         expense_id = create_response.data["id"]
         list_response = self.client.get(reverse("expense-list"))
         self.assertEqual(list_response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(list_response.data), 2)
+        self.assertGreaterEqual(len(list_response.data["results"]), 2)
 
         update_response = self.client.patch(
             reverse("expense-detail", args=[expense_id]),
@@ -237,3 +749,824 @@ class FinanceApiTests(APITestCase):
             format="json",
         )
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class DailySalesRollupTests(APITestCase):
+    def setUp(self):
+        # Fixture yozuvlari "commit" bo'ladi: kesh versiyasi bump lari shu yerda bajariladi.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username="buyer", password="testpass123")
+            self.client.force_authenticate(user=self.user)
+            category = Category.objects.create(name="Tools", slug="tools")
+            self.drill = Product.objects.create(
+                name="Drill", price="200.00", cost_price="130.00", stock=100, category=category
+            )
+            self.saw = Product.objects.create(
+                name="Saw", price="100.00", cost_price="60.00", stock=100, category=category
+            )
+
+    def checkout(self, *lines):
+        response = self.client.post(
+            reverse("order-list"),
+            {"items": [{"product": product.id, "quantity": quantity} for product, quantity in lines]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Order.objects.get(pk=response.data["id"])
+
+    def rollup(self):
+        return {
+            row.product_id: (row.revenue, row.cost, row.quantity)
+            for row in DailyProductSales.objects.filter(day=timezone.localdate())
+        }
+
+    def test_checkout_updates_rollup(self):
+        self.checkout((self.drill, 1), (self.saw, 2))
+        self.checkout((self.drill, 2))
+
+        self.assertEqual(
+            self.rollup(),
+            {
+                self.drill.id: (Decimal("600.00"), Decimal("390.00"), 3),
+                self.saw.id: (Decimal("200.00"), Decimal("120.00"), 2),
+            },
+        )
+
+    def test_status_change_moves_order_in_and_out_of_rollup(self):
+        order = self.checkout((self.drill, 1))
+
+        order.status = Order.Status.CANCELED
+        order.save()
+        self.assertEqual(self.rollup()[self.drill.id][2], 0)
+
+        order.status = Order.Status.PAID
+        order.save()
+        self.assertEqual(self.rollup()[self.drill.id], (Decimal("200.00"), Decimal("130.00"), 1))
+
+    def test_item_edit_and_delete_adjust_rollup(self):
+        order = self.checkout((self.drill, 1), (self.saw, 1))
+        item = order.items.get(product=self.drill)
+        item.quantity = 4
+        item.save()
+        order.items.get(product=self.saw).delete()
+
+        rollup = self.rollup()
+        self.assertEqual(rollup[self.drill.id], (Decimal("800.00"), Decimal("520.00"), 4))
+        self.assertEqual(rollup[self.saw.id][2], 0)
+
+    def test_rebuild_command_matches_incremental_rollup(self):
+        self.checkout((self.drill, 1), (self.saw, 2))
+        canceled = self.checkout((self.saw, 5))
+        canceled.status = Order.Status.CANCELED
+        canceled.save()
+        incremental = self.rollup()
+
+        out = StringIO()
+        call_command("rebuild_daily_sales", stdout=out)
+
+        rebuilt = self.rollup()
+        self.assertEqual(rebuilt, {key: value for key, value in incremental.items() if value[2]})
+        self.assertIn("2 ta", out.getvalue())
+
+    def test_finance_overview_query_count_does_not_grow_with_lines(self):
+        staff = User.objects.create_superuser(username="admin", password="adminpass123")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.checkout((self.drill, 1))
+        self.client.force_authenticate(user=staff)
+        with CaptureQueriesContext(connection) as few:
+            self.client.get(reverse("finance-overview"))
+
+        self.client.force_authenticate(user=self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            for _ in range(20):
+                self.checkout((self.drill, 1), (self.saw, 1))
+        self.client.force_authenticate(user=staff)
+        with CaptureQueriesContext(connection) as many:
+            response = self.client.get(reverse("finance-overview"))
+
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(Decimal(response.data["total_revenue"]), Decimal("6200.00"))
+
+
+@override_settings(FINANCE_CACHE_TTL=60, FINANCE_CACHE_STALE=300, FINANCE_REFRESH_IN_BACKGROUND=False)
+class FinanceCacheTests(APITestCase):
+    def setUp(self):
+        finance_cache.clear()
+        self.staff = User.objects.create_superuser(username="admin", password="adminpass123")
+        self.client.force_authenticate(user=self.staff)
+
+    def counter(self, delay=0):
+        calls = []
+
+        def compute():
+            time.sleep(delay)
+            calls.append(1)
+            return len(calls)
+
+        return compute, calls
+
+    def test_repeated_overview_is_served_from_cache(self):
+        self.client.get(reverse("finance-overview"))
+        # Faqat versiya qatori o'qiladi.
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse("finance-overview"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_expense_write_invalidates_overview(self):
+        self.client.get(reverse("finance-overview"))
+        with self.captureOnCommitCallbacks(execute=True):
+            Expense.objects.create(title="Rent", amount="75.00", expense_date=timezone.localdate())
+
+        response = self.client.get(reverse("finance-overview"))
+        self.assertEqual(Decimal(response.data["total_expense"]), Decimal("75.00"))
+
+    def test_version_bumped_by_another_process_invalidates_overview(self):
+        self.client.get(reverse("finance-overview"))
+        Expense.objects.bulk_create(
+            [Expense(title="Rent", amount="75.00", expense_date=timezone.localdate())]
+        )
+        # bulk_create signal yubormaydi: bump boshqa jarayondan kelgandek bazada.
+        CacheVersion.objects.filter(pk=FINANCE_VERSION).update(version=F("version") + 1)
+
+        response = self.client.get(reverse("finance-overview"))
+        self.assertEqual(Decimal(response.data["total_expense"]), Decimal("75.00"))
+
+    @override_settings(FINANCE_CACHE_MAX_ENTRIES=3)
+    def test_entries_are_bounded_and_expired_ones_pruned(self):
+        for day in range(5):
+            finance_cache.get(("series", day), lambda: day)
+        self.assertEqual(
+            list(finance_cache._entries), [("series", 2), ("series", 3), ("series", 4)]
+        )
+
+        with override_settings(FINANCE_CACHE_TTL=0, FINANCE_CACHE_STALE=0):
+            finance_cache.get("fresh", lambda: 1)
+        self.assertEqual(list(finance_cache._entries), ["fresh"])
+
+    def test_writes_in_one_transaction_bump_version_once(self):
+        with self.captureOnCommitCallbacks() as callbacks, transaction.atomic():
+            order = Order.objects.create(user=self.staff)
+            category = Category.objects.create(name="Tools", slug="tools")
+            product = Product.objects.create(name="Saw", price="10.00", stock=10, category=category)
+            for _ in range(3):
+                OrderItem.objects.create(order=order, product=product, quantity=1, price="10.00")
+            Expense.objects.create(title="Rent", amount="75.00", expense_date=timezone.localdate())
+        self.assertEqual(len(callbacks), 1)
+
+        version = get_finance_version()
+        callbacks[0]()
+        self.assertEqual(get_finance_version(), version + 1)
+
+    @patch("orders.finance.get_finance_version", return_value=1)
+    def test_concurrent_requests_share_one_computation(self, version):
+        # Oqimlar test tranzaksiyasidagi versiya qatorini ko'rmaydi.
+        compute, calls = self.counter(delay=0.2)
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(finance_cache.get("flight", compute)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [1] * 5)
+
+    @override_settings(FINANCE_CACHE_TTL=0)
+    def test_expired_entry_is_served_stale_and_refreshed(self):
+        compute, calls = self.counter()
+        self.assertEqual(finance_cache.get("swr", compute), 1)
+
+        # Eski qiymat darhol qaytadi, yangilanish undan keyin bajariladi.
+        self.assertEqual(finance_cache.get("swr", compute), 1)
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(finance_cache.get("swr", compute), 2)
+
+    @override_settings(FINANCE_CACHE_TTL=0, FINANCE_REFRESH_IN_BACKGROUND=True)
+    def test_stale_refresh_runs_in_background(self):
+        compute, calls = self.counter(delay=0.1)
+        finance_cache.get("background", compute)
+
+        started = time.monotonic()
+        self.assertEqual(finance_cache.get("background", compute), 1)
+        self.assertLess(time.monotonic() - started, 0.1)
+
+        deadline = time.monotonic() + 2
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(len(calls), 2)
+
+    @override_settings(FINANCE_CACHE_STALE=0)
+    def test_entry_past_stale_window_is_recomputed_synchronously(self):
+        compute, calls = self.counter()
+        finance_cache.get("hard", compute)
+        with override_settings(FINANCE_CACHE_TTL=0):
+            self.assertEqual(finance_cache.get("hard", compute), 2)
+
+
+@override_settings(STORE_TIME_ZONE="Asia/Tashkent")
+class SalesTimeSeriesTests(APITestCase):
+    def setUp(self):
+        finance_cache.clear()
+        self.staff = User.objects.create_superuser(username="admin", password="adminpass123")
+        self.client.force_authenticate(user=self.staff)
+        category = Category.objects.create(name="Tools", slug="tools")
+        self.product = Product.objects.create(
+            name="Drill", price="200.00", cost_price="130.00", stock=100, category=category
+        )
+
+    def create_order(self, created_at, quantity=1):
+        order = Order.objects.create(user=self.staff, status=Order.Status.PAID)
+        OrderItem.objects.create(
+            order=order, product=self.product, quantity=quantity, price="200.00", cost_price="130.00"
+        )
+        Order.objects.filter(pk=order.pk).update(created_at=created_at)
+        return order
+
+    def series(self, **params):
+        response = self.client.get(reverse("finance-timeseries"), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_buckets_use_store_timezone_and_fill_gaps(self):
+        # 21:30 UTC = Toshkentda ertasi kuni 02:30 (dushanba).
+        self.create_order(datetime(2026, 1, 4, 21, 30, tzinfo=dt_timezone.utc), quantity=2)
+        self.create_order(datetime(2026, 2, 10, 9, 0, tzinfo=dt_timezone.utc))
+        call_command("rebuild_daily_sales", stdout=StringIO())
+
+        daily = self.series(granularity="day", start="2026-01-03", end="2026-01-06")
+        self.assertEqual(daily["dates"], ["2026-01-03", "2026-01-04", "2026-01-05", "2026-01-06"])
+        self.assertEqual(daily["revenue"], [0.0, 0.0, 400.0, 0.0])
+        self.assertEqual(daily["orders"], [0, 0, 1, 0])
+
+        hourly = self.series(granularity="hour", start="2026-01-05", end="2026-01-05")
+        self.assertEqual(len(hourly["dates"]), 24)
+        self.assertEqual(hourly["dates"][2], "2026-01-05T02:00")
+        self.assertEqual(hourly["quantity"][2], 2)
+
+        weekly = self.series(granularity="week", start="2026-01-03", end="2026-01-11")
+        self.assertEqual(weekly["dates"], ["2025-12-29", "2026-01-05"])
+        self.assertEqual(weekly["revenue"], [0.0, 400.0])
+
+        monthly = self.series(granularity="month", start="2025-12-01", end="2026-03-31")
+        self.assertEqual(monthly["dates"], ["2025-12", "2026-01", "2026-02", "2026-03"])
+        self.assertEqual(monthly["revenue"], [0.0, 400.0, 200.0, 0.0])
+        self.assertEqual(monthly["cost"], [0.0, 260.0, 130.0, 0.0])
+
+    def test_series_totals_match_finance_totals(self):
+        for day in range(1, 11):
+            for hour in range(3):
+                order = self.create_order(datetime(2026, 3, day, hour + 8, tzinfo=dt_timezone.utc))
+                OrderItem.objects.create(
+                    order=order, product=self.product, quantity=3, price="0.10", cost_price="0.07"
+                )
+        call_command("rebuild_daily_sales", stdout=StringIO())
+
+        totals = FinanceEngine(today=date(2026, 3, 31)).totals()
+        for granularity in ("hour", "day", "week", "month"):
+            data = self.series(granularity=granularity, start="2026-03-01", end="2026-03-31")
+            self.assertEqual(sum(data["revenue"]), totals["total_revenue"])
+            self.assertEqual(sum(data["cost"]), totals["total_cost"])
+
+    def test_checkout_updates_hourly_buckets(self):
+        self.client.post(
+            reverse("order-list"),
+            {"items": [{"product": self.product.id, "quantity": 3}]},
+            format="json",
+        )
+        bucket = HourlySales.objects.get()
+        self.assertEqual((bucket.orders, bucket.quantity, bucket.revenue), (1, 3, Decimal("600.00")))
+
+        data = self.series()
+        self.assertEqual(data["granularity"], "day")
+        self.assertEqual(len(data["dates"]), 30)
+        self.assertEqual(data["revenue"][-1], 600.0)
+
+    def test_invalid_parameters_are_rejected(self):
+        response = self.client.get(reverse("finance-timeseries"), {"granularity": "minute"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(
+            reverse("finance-timeseries"),
+            {"granularity": "hour", "start": "2025-01-01", "end": "2026-01-01"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class DemandForecastTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_superuser(username="admin", password="adminpass123")
+        category = Category.objects.create(name="Qurilish", slug="qurilish")
+        self.cement = Product.objects.create(
+            name="Sement", price="85000.00", stock=5, category=category
+        )
+        self.rebar = Product.objects.create(
+            name="Armatura", price="12000.00", stock=1000, category=category
+        )
+        today = store_today()
+        DailyProductSales.objects.bulk_create(
+            DailyProductSales(
+                day=today - timedelta(days=offset), product=product, quantity=quantity
+            )
+            for offset in range(1, 29)
+            for product, quantity in ((self.cement, 2), (self.rebar, 1))
+        )
+
+    def test_moving_average_builds_reorder_list(self):
+        stats = rebuild_demand_forecast(method="ma", window=28)
+
+        self.assertEqual((stats["products"], stats["reorder"]), (2, 1))
+        cement = DemandForecast.objects.get(product=self.cement)
+        self.assertAlmostEqual(cement.daily_demand, 2.0)
+        self.assertAlmostEqual(cement.days_of_cover, 2.5)
+        # (7 kun yetkazish + 30 kun zaxira) * 2 - 5
+        self.assertEqual(cement.reorder_quantity, 69)
+        self.assertFalse(DemandForecast.objects.get(product=self.rebar).needs_reorder)
+
+    def test_exponential_smoothing_weights_recent_days(self):
+        ids, demand = forecast_demand(method="ses", alpha=0.5, history_days=2)
+
+        # Faqat kecha va undan oldingi kun: 0.5 * x_kecha + 0.25 * x_oldingi.
+        self.assertEqual(ids.tolist(), [self.cement.id, self.rebar.id])
+        self.assertEqual(demand.tolist(), [1.5, 0.75])
+
+    def test_reorder_endpoint_lists_products_running_out(self):
+        rebuild_demand_forecast(method="ma", window=28)
+        self.client.force_authenticate(user=self.staff)
+
+        response = self.client.get(reverse("finance-reorder"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["product_name"] for row in response.data["results"]], ["Sement"])
+
+        response = self.client.get(reverse("finance-reorder"), {"all": "true"})
+        self.assertEqual(
+            [row["product_name"] for row in response.data["results"]], ["Sement", "Armatura"]
+        )
+
+
+class CartReadModelTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        category = Category.objects.create(name="Qurilish", slug="qurilish")
+        self.products = [
+            Product.objects.create(
+                name=f"Mahsulot {index}", price=f"{10 * (index + 1)}.00", stock=100, category=category
+            )
+            for index in range(5)
+        ]
+
+    def add(self, product, quantity=1):
+        return self.client.post(
+            reverse("cart-items"), {"product": product.id, "quantity": quantity}, format="json"
+        )
+
+    def test_cart_is_read_with_constant_queries(self):
+        self.add(self.products[0])
+        with self.assertNumQueries(2):
+            small = self.client.get(reverse("cart-detail"))
+
+        for product in self.products[1:]:
+            self.add(product, quantity=2)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("cart-detail"))
+
+        self.assertEqual(len(small.data["items"]), 1)
+        self.assertEqual(len(response.data["items"]), 5)
+        self.assertEqual(response.data["item_count"], 9)
+        # 10 + 2 * (20 + 30 + 40 + 50)
+        self.assertEqual(Decimal(response.data["subtotal"]), Decimal("290.00"))
+        self.assertEqual(response.data["total_price"], response.data["subtotal"])
+
+    def test_mutations_keep_totals_in_sync(self):
+        first = self.add(self.products[0], quantity=2)
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data["item"]["quantity"], 2)
+        self.assertEqual(first.data["cart"]["item_count"], 2)
+
+        again = self.add(self.products[0], quantity=3)
+        self.assertEqual(again.status_code, status.HTTP_200_OK)
+        self.assertEqual(again.data["cart"]["item_count"], 5)
+        self.assertEqual(Decimal(again.data["cart"]["subtotal"]), Decimal("50.00"))
+
+        item_id = again.data["item"]["id"]
+        self.add(self.products[1])
+        patched = self.client.patch(
+            reverse("cart-item-detail", args=[item_id]), {"quantity": 1}, format="json"
+        )
+        self.assertEqual(patched.data["cart"]["item_count"], 2)
+        self.assertEqual(Decimal(patched.data["cart"]["subtotal"]), Decimal("30.00"))
+
+        deleted = self.client.delete(reverse("cart-item-detail", args=[item_id]))
+        self.assertIsNone(deleted.data["item"])
+        self.assertEqual(Decimal(deleted.data["cart"]["subtotal"]), Decimal("20.00"))
+
+        cleared = self.client.delete(reverse("cart-clear"))
+        self.assertEqual(cleared.data["cart"]["item_count"], 0)
+        self.assertEqual(Decimal(cleared.data["cart"]["subtotal"]), Decimal("0.00"))
+
+    def test_price_change_refreshes_subtotal(self):
+        self.add(self.products[0], quantity=3)
+        product = Product.objects.get(pk=self.products[0].pk)
+        product.price = Decimal("15.00")
+        product.save()
+
+        cart = Cart.objects.get(user=self.user)
+        self.assertEqual((cart.item_count, cart.subtotal), (3, Decimal("45.00")))
+
+
+class CartBatchTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        category = Category.objects.create(name="Qurilish", slug="qurilish")
+        self.products = Product.objects.bulk_create(
+            Product(name=f"Mahsulot {index}", price="10.00", stock=100, category=category)
+            for index in range(50)
+        )
+
+    def sync(self, payload):
+        return self.client.post(reverse("cart-items-batch"), payload, format="json")
+
+    def test_batch_sync_query_count_does_not_grow_with_lines(self):
+        self.sync({"items": []})
+        with CaptureQueriesContext(connection) as small:
+            self.sync({"items": [{"product": p.id, "quantity": 1} for p in self.products[:5]]})
+        with CaptureQueriesContext(connection) as large:
+            response = self.sync({"items": [{"product": p.id, "quantity": 2} for p in self.products]})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len(response.data["items"]), 50)
+        self.assertEqual(response.data["item_count"], 100)
+        self.assertEqual(Decimal(response.data["subtotal"]), Decimal("1000.00"))
+
+    def test_upsert_remove_and_replace(self):
+        first, second, third = self.products[:3]
+        self.sync({"items": [{"product": first.id, "quantity": 1}, {"product": second.id, "quantity": 1}]})
+
+        response = self.sync(
+            {"items": [{"product": first.id, "quantity": 4}], "remove": [second.id]}
+        )
+        self.assertEqual(
+            [(row["product"], row["quantity"]) for row in response.data["items"]], [(first.id, 4)]
+        )
+
+        response = self.sync({"items": [{"product": third.id, "quantity": 2}], "replace": True})
+        self.assertEqual(
+            [(row["product"], row["quantity"]) for row in response.data["items"]], [(third.id, 2)]
+        )
+        self.assertEqual(response.data["item_count"], 2)
+
+    def test_invalid_product_rejects_whole_batch(self):
+        Product.objects.filter(pk=self.products[1].pk).update(is_active=False)
+        response = self.sync(
+            {
+                "items": [
+                    {"product": self.products[0].id, "quantity": 1},
+                    {"product": self.products[1].id, "quantity": 1},
+                ]
+            }
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CartItem.objects.filter(cart__user=self.user).exists())
+
+
+class GuestCartTests(APITestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Qurilish", slug="qurilish")
+        self.cement = Product.objects.create(
+            name="Sement", price="50.00", stock=100, category=category
+        )
+        self.rebar = Product.objects.create(
+            name="Armatura", price="20.00", stock=100, category=category
+        )
+        self.user = User.objects.create_user(username="buyer", password="testpass123")
+
+    def add_as_guest(self, *lines):
+        return self.client.post(
+            reverse("guest-cart"),
+            {"items": [{"product": product.id, "quantity": quantity} for product, quantity in lines]},
+            format="json",
+        )
+
+    def test_guest_cart_lives_in_signed_cookie_without_db_writes(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.add_as_guest((self.cement, 2), (self.rebar, 1))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["item_count"], 3)
+        self.assertEqual(Decimal(response.data["subtotal"]), Decimal("120.00"))
+        self.assertFalse([q for q in queries if not q["sql"].startswith("SELECT")])
+        self.assertFalse(Cart.objects.exists())
+        self.assertIn(settings.GUEST_CART_COOKIE_NAME, response.cookies)
+
+        response = self.client.get(reverse("guest-cart"))
+        self.assertEqual([row["product"] for row in response.data["items"]], [self.cement.id, self.rebar.id])
+
+    def test_tampered_cookie_is_ignored(self):
+        self.add_as_guest((self.cement, 2))
+        self.client.cookies[settings.GUEST_CART_COOKIE_NAME] = "buzilgan:qiymat"
+
+        response = self.client.get(reverse("guest-cart"))
+        self.assertEqual(response.data["items"], [])
+
+    def test_login_merges_guest_cart_and_clears_cookie(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.cement, quantity=1)
+        self.add_as_guest((self.cement, 2), (self.rebar, 3))
+
+        response = self.client.post(
+            reverse("login"), {"username": "buyer", "password": "testpass123"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn("access", response.data)
+        self.assertEqual(response.cookies[settings.GUEST_CART_COOKIE_NAME].value, "")
+        cart.refresh_from_db()
+        self.assertEqual(
+            dict(cart.items.values_list("product_id", "quantity")),
+            {self.cement.id: 2, self.rebar.id: 3},
+        )
+        self.assertEqual((cart.item_count, cart.subtotal), (5, Decimal("160.00")))
+
+    def test_repeated_merge_with_same_cookie_changes_nothing(self):
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.cement, quantity=5)
+        self.add_as_guest((self.cement, 2), (self.rebar, 3))
+        request = APIRequestFactory().get("/")
+        request.COOKIES.update({key: morsel.value for key, morsel in self.client.cookies.items()})
+
+        merge_guest_cart(request, self.user)
+        merge_guest_cart(request, self.user)
+
+        self.assertEqual(
+            dict(cart.items.values_list("product_id", "quantity")),
+            {self.cement.id: 5, self.rebar.id: 3},
+        )
+
+    def test_checkout_uses_guest_cart(self):
+        self.add_as_guest((self.rebar, 4))
+        self.client.force_authenticate(user=self.user)
+
+        response = self.client.post(
+            reverse("order-list"), {"delivery_type": "pickup", "payment_method": "cash"}, format="json"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Decimal(response.data["total_price"]), Decimal("80.00"))
+        self.assertEqual(response.cookies[settings.GUEST_CART_COOKIE_NAME].value, "")
+
+    def test_failed_checkout_rolls_back_guest_merge(self):
+        self.add_as_guest((self.rebar, 4))
+        self.client.force_authenticate(user=self.user)
+        Product.objects.filter(pk=self.rebar.pk).update(stock=3)
+        payload = {"delivery_type": "pickup", "payment_method": "cash"}
+
+        for _ in range(2):
+            response = self.client.post(reverse("order-list"), payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(CartItem.objects.filter(cart__user=self.user).exists())
+
+        Product.objects.filter(pk=self.rebar.pk).update(stock=100)
+        response = self.client.post(reverse("order-list"), payload, format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(OrderItem.objects.get(order_id=response.data["id"]).quantity, 4)
+        self.assertEqual(Decimal(response.data["total_price"]), Decimal("80.00"))
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        category = Category.objects.create(name="Qurilish", slug="qurilish")
+        self.product = Product.objects.create(
+            name="Sement", price="50.00", stock=100, category=category
+        )
+        self.user = User.objects.create_user(username="buyer", password="testpass123")
+        self.client.force_authenticate(user=self.user)
+        cart = Cart.objects.create(user=self.user)
+        CartItem.objects.create(cart=cart, product=self.product, quantity=2)
+
+    def checkout(self, key, payment_method="cash"):
+        return self.client.post(
+            reverse("order-list"),
+            {"delivery_type": "pickup", "payment_method": payment_method},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_stored_response_without_second_checkout(self):
+        first = self.checkout("retry-1")
+        second = self.checkout("retry-1")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.data["id"], first.data["id"])
+        self.assertEqual(second["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 98)
+
+    def test_key_reused_with_different_body_is_rejected(self):
+        self.checkout("retry-1")
+
+        response = self.checkout("retry-1", payment_method="card")
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_failed_attempt_releases_key(self):
+        CartItem.objects.all().delete()
+        self.assertEqual(self.checkout("retry-1").status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        CartItem.objects.create(cart=Cart.objects.get(user=self.user), product=self.product, quantity=1)
+        self.assertEqual(self.checkout("retry-1").status_code, status.HTTP_201_CREATED)
+
+    def test_concurrent_retry_waits_for_first_attempt(self):
+        first = self.checkout("retry-1")
+        record = IdempotencyKey.objects.get()
+        stored = (record.status_code, record.response)
+        IdempotencyKey.objects.filter(pk=record.pk).update(status_code=None, response=None)
+
+        def first_attempt_finishes(delay):
+            IdempotencyKey.objects.filter(pk=record.pk).update(
+                status_code=stored[0], response=stored[1]
+            )
+
+        with patch("orders.idempotency.time.sleep", side_effect=first_attempt_finishes) as sleep:
+            response = self.checkout("retry-1")
+
+        sleep.assert_called_once()
+        self.assertEqual(response.data["id"], first.data["id"])
+        self.assertEqual(Order.objects.count(), 1)
+
+        IdempotencyKey.objects.update(status_code=None, response=None)
+        with override_settings(IDEMPOTENCY_WAIT=0):
+            response = self.checkout("retry-1")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("Retry-After", response)
+
+    def test_expired_keys_are_evicted(self):
+        self.checkout("retry-1")
+        IdempotencyKey.objects.update(
+            created_at=timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL + 1)
+        )
+
+        out = StringIO()
+        call_command("purge_idempotency_keys", stdout=out)
+
+        self.assertIn("1 ta", out.getvalue())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class HotQueryIndexTests(APITestCase):
+    def test_bench_indexes_reports_plans(self):
+        user = User.objects.create_user(username="buyer", password="testpass123")
+        Order.objects.create(user=user, status=Order.Status.PAID)
+
+        out = StringIO()
+        call_command("bench_indexes", "--repeat", "1", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("kurer kutayotgan buyurtmalar", output)
+        self.assertIn("indeks bilan", output)
+        self.assertNotIn("indekssiz", output)
+        self.assertNotIn("Bazada yo'q indekslar", output)
+
+    @override_settings(DEBUG=False, BENCH_DATABASE=False)
+    def test_dropping_indexes_requires_bench_database(self):
+        with self.assertRaisesMessage(CommandError, "--drop-indexes"):
+            call_command("bench_indexes", "--drop-indexes", stdout=StringIO())
+
+
+class SeedStoreTests(APITestCase):
+    def seed(self):
+        out = StringIO()
+        call_command(
+            "seed_store",
+            "--seed", "7",
+            "--products", "40",
+            "--users", "15",
+            "--couriers", "3",
+            "--carts", "5",
+            "--orders", "300",
+            "--expenses", "10",
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def snapshot(self):
+        return list(
+            OrderItem.objects.order_by("pk").values_list(
+                "order__user__username", "order__status", "product__name", "quantity", "price"
+            )
+        )
+
+    def test_seeded_store_is_consistent(self):
+        output = self.seed()
+
+        self.assertIn("orders: 300", output)
+        self.assertEqual(Order.objects.count(), 300)
+        self.assertFalse(
+            Order.objects.annotate(lines=Sum(F("items__price") * F("items__quantity")))
+            .exclude(total_price=F("lines"))
+            .exists()
+        )
+        levels = stock_levels()
+        sold_by_product = dict(
+            OrderItem.objects.exclude(order__status=Order.Status.CANCELED)
+            .values("product")
+            .annotate(total=Sum("quantity"))
+            .order_by()
+            .values_list("product", "total")
+        )
+        for product in Product.objects.all():
+            self.assertEqual(levels.get(product.pk, 0), product.stock)
+            self.assertEqual(product.total_stock_out, sold_by_product.get(product.pk, 0))
+            self.assertEqual(product.total_stock_in - product.total_stock_out, product.stock)
+        for cart in Cart.objects.all():
+            self.assertEqual(cart.item_count, cart.items.aggregate(total=Sum("quantity"))["total"])
+        sold = OrderItem.objects.exclude(order__status=Order.Status.CANCELED).aggregate(
+            total=Sum("quantity")
+        )["total"]
+        self.assertEqual(DailyProductSales.objects.aggregate(total=Sum("quantity"))["total"], sold)
+        # Seed buyurtmasini bekor qilish checkout dan o'tgan buyurtma kabi ishlaydi.
+        order = Order.objects.exclude(status=Order.Status.CANCELED).first()
+        order.status = Order.Status.CANCELED
+        order.save()
+        self.assertEqual(
+            sum(stock_levels().values()), Product.objects.aggregate(total=Sum("stock"))["total"]
+        )
+        # Yangi buyurtma qo'lda berilgan id lardan keyin davom etadi.
+        order = Order.objects.create(user=User.objects.first())
+        self.assertGreater(order.pk, Order.objects.exclude(pk=order.pk).aggregate(last=Max("pk"))["last"])
+
+    def test_same_seed_gives_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        with self.assertRaises(CommandError):
+            self.seed()
+
+        Order.objects.all().delete()
+        Cart.objects.all().delete()
+        Product.objects.all().delete()
+        Category.objects.all().delete()
+        User.objects.all().delete()
+        self.seed()
+
+        self.assertEqual(self.snapshot(), first)
+
+
+class EndpointBenchmarkTests(APITestCase):
+    def setUp(self):
+        call_command(
+            "seed_store",
+            "--products", "30",
+            "--users", "10",
+            "--couriers", "2",
+            "--carts", "2",
+            "--orders", "100",
+            "--expenses", "5",
+            stdout=StringIO(),
+        )
+        Product.objects.update(stock=1000, is_active=True)
+
+    def bench(self, *args):
+        out = StringIO()
+        call_command(
+            "bench_endpoints", "--iterations", "2", "--warmup", "1", "--baseline", self.path, *args,
+            stdout=out,
+        )
+        return out.getvalue()
+
+    def test_query_count_over_baseline_fails(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.path = os.path.join(directory, "baseline.json")
+            self.bench("--update-baseline")
+            baseline = load_baseline(self.path)
+            self.assertEqual(set(baseline["endpoints"]), set(load_baseline()["endpoints"]))
+            self.assertEqual(baseline["endpoints"]["order_list"]["queries"], 2)
+
+            output = self.bench("--latency-tolerance", "1000", "--memory-tolerance", "1000")
+            self.assertIn("byudjet ichida", output)
+
+            baseline["endpoints"]["checkout"]["queries"] -= 1
+            with open(self.path, "w", encoding="utf-8") as baseline_file:
+                json.dump(baseline, baseline_file)
+            with self.assertRaisesMessage(CommandError, "checkout: SQL so'rovlar"):
+                self.bench("--latency-tolerance", "1000", "--memory-tolerance", "1000")
+
+        # Benchmark tranzaksiyasi bekor qilinadi: seed ma'lumotiga checkout qo'shilmaydi.
+        self.assertEqual(Order.objects.count(), 100)
+
+    def test_on_commit_work_is_measured(self):
+        with patch("catalog.cache._flush_cache_versions", wraps=_flush_cache_versions) as flush:
+            results = run_benchmarks(iterations=1, warmup=0, only=["checkout"])
+
+        # Bitta o'lchov va so'rovlar/xotira uchun bitta o'tish.
+        self.assertEqual(flush.call_count, 2)
+        self.assertEqual(list(results), ["checkout"])
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Sum
+
+from .models import HourlySales
+
+
+GRANULARITIES = ("hour", "day", "week", "month")
+METRICS = ("revenue", "cost", "quantity", "orders")
+MONEY_METRICS = ("revenue", "cost")
+# Standart davr va eng uzun ruxsat etilgan davr (kunlarda).
+DEFAULT_SPAN_DAYS = {"hour": 2, "day": 30, "week": 26 * 7, "month": 730}
+MAX_SPAN_DAYS = {"hour": 92, "day": 3 * 366, "week": 10 * 366, "month": 20 * 366}
+
+
+def _column(metric, values):
+    """Pul ustunlari butun tiyinda (int64): float yig'indisi tiyinlarni yo'qotadi."""
+    if metric in MONEY_METRICS:
+        return np.fromiter((round(value * 100) for value in values), dtype=np.int64, count=len(values))
+    return np.array(values, dtype=np.int64)
+
+
+def _bucket_rows(granularity, start, end):
+    """(kunlar, soatlar, [metrika ustunlari]) - bucketlash uchun numpy massivlari."""
+    queryset = HourlySales.objects.filter(day__gte=start, day__lte=end)
+    if granularity == "hour":
+        rows = list(queryset.values_list("day", "hour", *METRICS))
+    else:
+        rows = [
+            (day, 0, *values)
+            for day, *values in queryset.values("day")
+            .annotate(**{metric: Sum(metric) for metric in METRICS})
+            .order_by()
+            .values_list("day", *METRICS)
+        ]
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=int), [empty] * len(METRICS)
+    days, hours, *columns = zip(*rows)
+    return (
+        np.array(days, dtype="datetime64[D]"),
+        np.array(hours, dtype=int),
+        [_column(metric, column) for metric, column in zip(METRICS, columns)],
+    )
+
+
+def _buckets(granularity, start, end, days, hours):
+    """Har bir qator qaysi bucketga tushishi va bucket boshlanishlari (bo'shliqlarsiz)."""
+    first = np.datetime64(start, "D")
+    last = np.datetime64(end, "D")
+    if granularity == "hour":
+        labels = np.arange(first, last + 1, dtype="datetime64[h]")
+        index = (days - first).astype(int) * 24 + hours
+        return index, np.datetime_as_string(labels, unit="m")
+    if granularity == "day":
+        labels = np.arange(first, last + 1)
+        return (days - first).astype(int), np.datetime_as_string(labels, unit="D")
+    if granularity == "week":
+        # Hafta dushanbadan boshlanadi.
+        origin = first - np.timedelta64(start.weekday(), "D")
+        index = (days - origin).astype(int) // 7
+        labels = np.arange(origin, last + 1, np.timedelta64(7, "D"))
+        return index, np.datetime_as_string(labels, unit="D")
+    origin = first.astype("datetime64[M]")
+    labels = np.arange(origin, last.astype("datetime64[M]") + 1)
+    index = (days.astype("datetime64[M]") - origin).astype(int)
+    return index, np.datetime_as_string(labels, unit="M")
+
+
+def sales_series(granularity, start, end):
+    """
+    [start, end] oralig'idagi savdo vaqt qatori, do'kon vaqt mintaqasida.
+
+    Soatlik jadvaldan bitta so'rov, keyin bucketlash va bo'shliqlarni nol bilan
+    to'ldirish `np.add.at` bilan int64 da - Python sikli yo'q. Javob ustunli massivlar;
+    pul qiymatlari tiyindan `Decimal` ga qaytariladi, shuning uchun yig'indilari
+    `FinanceEngine` jamilari bilan aynan teng.
+    """
+    days, hours, columns = _bucket_rows(granularity, start, end)
+    index, labels = _buckets(granularity, start, end, days, hours)
+    series = {
+        "granularity": granularity,
+        "timezone": settings.STORE_TIME_ZONE,
+        "start": start.isoformat(),
+        "end": end.isoformat(),
+        "dates": labels.tolist(),
+    }
+    for metric, column in zip(METRICS, columns):
+        values = np.zeros(len(labels), dtype=np.int64)
+        np.add.at(values, index, column)
+        if metric in MONEY_METRICS:
+            series[metric] = [Decimal(tiyin).scaleb(-2) for tiyin in values.tolist()]
+        else:
+            series[metric] = values.tolist()
+    return series
+
+
+def default_range(granularity, today):
+    return today - timedelta(days=DEFAULT_SPAN_DAYS[granularity] - 1), today
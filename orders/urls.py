@@ -2,6 +2,7 @@ from django.urls import path
 from rest_framework.routers import DefaultRouter
 
 from .views import (
+    CartBatchView,
     CartClearView,
     CartItemDetailView,
     CartItemListCreateView,
@@ -9,7 +10,11 @@ from .views import (
     DeliveryMapView,
     ExpenseViewSet,
     FinanceOverviewAPIView,
+    GuestCartView,
     OrderViewSet,
+    ProductProfitabilityAPIView,
+    ReorderListAPIView,
+    SalesTimeSeriesAPIView,
 )
 
 router = DefaultRouter()
@@ -20,9 +25,14 @@ router.register("expenses", ExpenseViewSet, basename="expense")
 urlpatterns = [
     path("cart/", CartView.as_view(), name="cart-detail"),
     path("cart/items/", CartItemListCreateView.as_view(), name="cart-items"),
+    path("cart/items/batch/", CartBatchView.as_view(), name="cart-items-batch"),
     path("cart/items/<int:item_id>/", CartItemDetailView.as_view(), name="cart-item-detail"),
+    path("cart/guest/", GuestCartView.as_view(), name="guest-cart"),
     path("cart/clear/", CartClearView.as_view(), name="cart-clear"),
     path("orders/delivery-map/", DeliveryMapView.as_view(), name="delivery-map"),
     path("finance/overview/", FinanceOverviewAPIView.as_view(), name="finance-overview"),
+    path("finance/products/", ProductProfitabilityAPIView.as_view(), name="finance-products"),
+    path("finance/reorder/", ReorderListAPIView.as_view(), name="finance-reorder"),
+    path("finance/timeseries/", SalesTimeSeriesAPIView.as_view(), name="finance-timeseries"),
 ]
 urlpatterns += router.urls
@@ -1,43 +1,57 @@
-from datetime import timedelta
-from decimal import Decimal
-
-from django.db.models import DecimalField, ExpressionWrapper, F, Sum
-from django.db.models.functions import TruncDate
-from django.utils import timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.views.generic import TemplateView
 from rest_framework import generics, permissions, status, viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .models import Cart, CartItem, Expense, Order, OrderItem
+from config.conditional import ConditionalGetMixin
+from config.serializers import requested_expansions
+from .cart import (
+    add_item,
+    apply_cart_batch,
+    clear_cart,
+    get_cart_for_update,
+    load_cart,
+    remove_item,
+    set_item_quantity,
+)
+from .finance import cached_finance_overview, cached_sales_series, product_profitability
+from .guest_cart import (
+    apply_guest_batch,
+    forget_guest_cart,
+    guest_cart_data,
+    merge_guest_cart,
+    read_guest_cart,
+    write_guest_cart,
+)
+from .idempotency import run_idempotent
+from .models import Cart, CartItem, DemandForecast, Expense, Order, OrderItem
 from .serializers import (
+    CartBatchSerializer,
     CartItemCreateSerializer,
     CartItemSerializer,
     CartItemUpdateSerializer,
+    CartMutationSerializer,
     CartSerializer,
+    DemandForecastSerializer,
     ExpenseSerializer,
     OrderCreateSerializer,
+    OrderListSerializer,
     OrderSerializer,
+    ProductProfitabilityQuerySerializer,
+    ProductProfitabilitySerializer,
+    SalesTimeSeriesQuerySerializer,
 )
 
 
-MONEY_OUTPUT = DecimalField(max_digits=18, decimal_places=2)
-REVENUE_EXPR = ExpressionWrapper(F("price") * F("quantity"), output_field=MONEY_OUTPUT)
-COST_EXPR = ExpressionWrapper(F("cost_price") * F("quantity"), output_field=MONEY_OUTPUT)
-
-
-def _sum_or_zero(queryset, expression):
-    value = queryset.aggregate(total=Sum(expression))["total"]
-    return value or Decimal("0.00")
-
-
-def _as_decimal(value):
-    return value if isinstance(value, Decimal) else Decimal(value or 0)
-
-
-def get_user_cart(user):
-    cart, _ = Cart.objects.get_or_create(user=user)
-    return cart
+def cart_mutation_response(cart, item=None, status_code=status.HTTP_200_OK):
+    return Response(
+        CartMutationSerializer({"item": item, "cart": cart}).data, status=status_code
+    )
 
 
 class DeliveryMapView(TemplateView):
@@ -49,15 +63,14 @@ class CartView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return get_user_cart(self.request.user)
+        return load_cart(self.request.user)
 
 
 class CartItemListCreateView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        cart = get_user_cart(self.request.user)
-        return cart.items.select_related("product")
+        return CartItem.objects.filter(cart__user=self.request.user).select_related("product")
 
     def get_serializer_class(self):
         if self.request.method == "POST":
@@ -68,24 +81,66 @@ class CartItemListCreateView(generics.ListCreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        cart = get_user_cart(request.user)
-        product = serializer.validated_data["product"]
-        quantity = serializer.validated_data["quantity"]
+        item, created = add_item(
+            get_cart_for_update(request.user),
+            serializer.validated_data["product"],
+            serializer.validated_data["quantity"],
+        )
+        return cart_mutation_response(
+            item.cart, item, status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
 
-        cart_item, created = CartItem.objects.get_or_create(
-            cart=cart,
-            product=product,
-            defaults={"quantity": quantity},
+
+class CartBatchView(generics.GenericAPIView):
+    """Ko'p qatorli o'zgarish bitta so'rov va bitta tranzaksiyada; javobda butun savat bir marta."""
+
+    serializer_class = CartBatchSerializer
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        apply_cart_batch(
+            get_cart_for_update(request.user),
+            serializer.validated_data["items"],
+            remove=serializer.validated_data["remove"],
+            replace=serializer.validated_data["replace"],
         )
-        if not created:
-            cart_item.quantity += quantity
-            cart_item.save()
-
-        output = CartSerializer(cart)
-        return Response(
-            output.data,
-            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        return Response(CartSerializer(load_cart(request.user)).data)
+
+
+class GuestCartView(APIView):
+    """
+    Kirmagan foydalanuvchi savati imzolangan cookie da: GET - ko'rish, POST - `cart/items/batch/`
+    bilan bir xil sinxronlash, DELETE - tozalash. Bazaga hech narsa yozilmaydi.
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request):
+        return Response(guest_cart_data(read_guest_cart(request)))
+
+    def post(self, request):
+        serializer = CartBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        quantities = apply_guest_batch(
+            read_guest_cart(request),
+            serializer.validated_data["items"],
+            remove=serializer.validated_data["remove"],
+            replace=serializer.validated_data["replace"],
         )
+        if len(quantities) > settings.GUEST_CART_MAX_ITEMS:
+            raise ValidationError(
+                {"items": f"Mehmon savatida eng ko'pi {settings.GUEST_CART_MAX_ITEMS} ta mahsulot."}
+            )
+        response = Response(guest_cart_data(quantities))
+        write_guest_cart(response, quantities)
+        return response
+
+    def delete(self, request):
+        response = Response(guest_cart_data({}))
+        forget_guest_cart(response)
+        return response
 
 
 class CartItemDetailView(generics.RetrieveUpdateDestroyAPIView):
@@ -93,8 +148,7 @@ class CartItemDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_url_kwarg = "item_id"
 
     def get_queryset(self):
-        cart = get_user_cart(self.request.user)
-        return cart.items.select_related("product")
+        return CartItem.objects.filter(cart__user=self.request.user).select_related("product")
 
     def get_serializer_class(self):
         if self.request.method in ("PUT", "PATCH"):
@@ -106,41 +160,76 @@ class CartItemDetailView(generics.RetrieveUpdateDestroyAPIView):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
-        return Response(CartSerializer(instance.cart).data)
+        quantity = serializer.validated_data.get("quantity", instance.quantity)
+        item = set_item_quantity(instance, quantity)
+        return cart_mutation_response(item.cart, item)
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        cart = instance.cart
-        instance.delete()
-        return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
+        remove_item(instance)
+        return cart_mutation_response(Cart.objects.get(pk=instance.cart_id))
 
 
 class CartClearView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def delete(self, request, *args, **kwargs):
-        cart = get_user_cart(request.user)
-        cart.items.all().delete()
-        return Response(CartSerializer(cart).data, status=status.HTTP_200_OK)
+        cart = get_cart_for_update(request.user)
+        clear_cart(cart.pk)
+        cart.refresh_from_db(fields=["item_count", "subtotal", "updated_at"])
+        return cart_mutation_response(cart)
 
 
-class OrderViewSet(viewsets.ModelViewSet):
-    queryset = Order.objects.all().prefetch_related("items__product")
+class OrderViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Order.objects.all()
     permission_classes = [permissions.IsAuthenticated]
     http_method_names = ["get", "post", "head", "options"]
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        if self.request.user.is_staff:
-            return queryset
-        return queryset.filter(user=self.request.user)
+        if not self.request.user.is_staff:
+            queryset = queryset.filter(user=self.request.user)
+        if self.action != "list":
+            return queryset.select_related("courier__user").prefetch_related("items__product")
+
+        # Ro'yxat: sahifa bitta so'rov (kurer JOIN, qatorlar soni subquery); `?expand=`
+        # so'ralgandagina qatorlar prefetch qilinadi va kurer foydalanuvchisi qo'shiladi.
+        expand = requested_expansions(self.request)
+        item_count = (
+            OrderItem.objects.filter(order=OuterRef("pk"))
+            .order_by()
+            .values("order")
+            .annotate(total=Sum("quantity"))
+            .values("total")
+        )
+        queryset = queryset.select_related(
+            "courier__user" if "courier" in expand else "courier"
+        ).annotate(item_count=Coalesce(Subquery(item_count), Value(0)))
+        if "items" in expand:
+            queryset = queryset.prefetch_related("items__product")
+        return queryset
 
     def get_serializer_class(self):
         if self.action == "create":
             return OrderCreateSerializer
+        if self.action == "list":
+            return OrderListSerializer
         return OrderSerializer
 
+    def create(self, request, *args, **kwargs):
+        # `Idempotency-Key` bilan takrorlangan so'rov saqlangan javobni oladi, checkout qayta bajarilmaydi.
+        response = run_idempotent(request, lambda: self.checkout(request, *args, **kwargs))
+        if settings.GUEST_CART_COOKIE_NAME in request.COOKIES:
+            forget_guest_cart(response)
+        return response
+
+    def checkout(self, request, *args, **kwargs):
+        # Kirmasdan yig'ilgan savat checkout dan oldin foydalanuvchi savatiga qo'shiladi;
+        # checkout yiqilsa birlashtirish ham qaytariladi (cookie qoladi, qayta urinish mumkin).
+        with transaction.atomic():
+            merge_guest_cart(request, request.user)
+            return super().create(request, *args, **kwargs)
+
 
 class ExpenseViewSet(viewsets.ModelViewSet):
     queryset = Expense.objects.all()
@@ -149,6 +238,7 @@ class ExpenseViewSet(viewsets.ModelViewSet):
     filterset_fields = ["expense_date"]
     search_fields = ["title", "note"]
     ordering_fields = ["expense_date", "created_at", "amount"]
+    ordering = ["-expense_date"]
 
 
 class FinanceOverviewAPIView(APIView):
@@ -161,54 +251,7 @@ class FinanceOverviewAPIView(APIView):
         top_limit = self._read_positive_int(
             request.query_params.get("top_limit"), default=10, max_value=100
         )
-
-        sales_orders = Order.objects.exclude(status=Order.Status.CANCELED)
-        sales_items = OrderItem.objects.exclude(
-            order__status=Order.Status.CANCELED
-        ).select_related("product")
-
-        total_revenue = _sum_or_zero(sales_items, REVENUE_EXPR)
-        total_cost = _sum_or_zero(sales_items, COST_EXPR)
-        gross_profit = total_revenue - total_cost
-        total_expense = _as_decimal(Expense.objects.aggregate(total=Sum("amount"))["total"])
-        net_profit = gross_profit - total_expense
-
-        order_count = sales_orders.count()
-        average_check = total_revenue / order_count if order_count else Decimal("0.00")
-        profit_percent = (
-            (net_profit / total_revenue) * Decimal("100")
-            if total_revenue > 0
-            else Decimal("0.00")
-        )
-
-        revenue_periods = [
-            {"label": "1 kun", "value": self._revenue_for_days(sales_items, 1)},
-            {"label": "7 kun", "value": self._revenue_for_days(sales_items, 7)},
-            {"label": "30 kun", "value": self._revenue_for_days(sales_items, 30)},
-            {"label": "90 kun", "value": self._revenue_for_days(sales_items, 90)},
-            {"label": "Barchasi", "value": total_revenue},
-        ]
-
-        product_profit = self._product_profit_rows(sales_items)
-        top_products = product_profit[:top_limit]
-        daily_revenue_chart = self._daily_revenue_chart(sales_items, days=chart_days)
-
-        return Response(
-            {
-                "total_revenue": total_revenue,
-                "total_expense": total_expense,
-                "total_cost": total_cost,
-                "gross_profit": gross_profit,
-                "net_profit": net_profit,
-                "average_check": average_check,
-                "profit_percent": profit_percent,
-                "total_orders": order_count,
-                "revenue_periods": revenue_periods,
-                "daily_revenue_chart": daily_revenue_chart,
-                "top_products": top_products,
-                "product_profit": product_profit,
-            }
-        )
+        return Response(cached_finance_overview(chart_days=chart_days, top_limit=top_limit))
 
     def _read_positive_int(self, value, default, max_value):
         try:
@@ -219,71 +262,53 @@ class FinanceOverviewAPIView(APIView):
         except (TypeError, ValueError):
             return default
 
-    def _revenue_for_days(self, sales_items, days):
-        since = timezone.now() - timedelta(days=days)
-        return _sum_or_zero(sales_items.filter(order__created_at__gte=since), REVENUE_EXPR)
 
-    def _daily_revenue_chart(self, sales_items, days=30):
-        start_day = timezone.localdate() - timedelta(days=days - 1)
+class ProductProfitabilityAPIView(generics.ListAPIView):
+    """
+    Mahsulotlar bo'yicha foyda, SQL da hisoblanadi va keyset bilan sahifalanadi:
+    `?ordering=-profit&start=YYYY-MM-DD&end=YYYY-MM-DD&search=...`.
+    """
 
-        daily_rows = (
-            sales_items.filter(order__created_at__date__gte=start_day)
-            .annotate(day=TruncDate("order__created_at"))
-            .values("day")
-            .annotate(revenue=Sum(REVENUE_EXPR))
-            .order_by("day")
-        )
-        daily_map = {row["day"]: _as_decimal(row["revenue"]) for row in daily_rows}
-
-        points = []
-        for offset in range(days):
-            day = start_day + timedelta(days=offset)
-            revenue = daily_map.get(day, Decimal("0.00"))
-            points.append(
-                {
-                    "date": day.isoformat(),
-                    "label": day.strftime("%d-%m"),
-                    "revenue": revenue,
-                }
-            )
+    serializer_class = ProductProfitabilitySerializer
+    permission_classes = [permissions.IsAdminUser]
+    search_fields = ["name"]
+    ordering_fields = ["revenue", "cost", "profit", "margin_percent", "quantity_sold", "name"]
+    ordering = ["-revenue"]
 
-        max_revenue = max((point["revenue"] for point in points), default=Decimal("0.00"))
-        for point in points:
-            if max_revenue > 0:
-                point["percent"] = float((point["revenue"] / max_revenue) * Decimal("100"))
-            else:
-                point["percent"] = 0.0
-
-        return points
-
-    def _product_profit_rows(self, sales_items):
-        rows = (
-            sales_items.values("product_id", "product__name")
-            .annotate(
-                quantity_sold=Sum("quantity"),
-                revenue=Sum(REVENUE_EXPR),
-                cost=Sum(COST_EXPR),
-            )
-            .order_by("-revenue")
-        )
+    def get_queryset(self):
+        query = ProductProfitabilityQuerySerializer(data=self.request.query_params)
+        query.is_valid(raise_exception=True)
+        return product_profitability(**query.validated_data)
 
-        product_rows = []
-        for row in rows:
-            revenue = _as_decimal(row["revenue"])
-            cost = _as_decimal(row["cost"])
-            profit = revenue - cost
-            margin_percent = (
-                (profit / revenue) * Decimal("100") if revenue > 0 else Decimal("0.00")
-            )
-            product_rows.append(
-                {
-                    "product_id": row["product_id"],
-                    "name": row["product__name"],
-                    "quantity_sold": row["quantity_sold"] or 0,
-                    "revenue": revenue,
-                    "cost": cost,
-                    "profit": profit,
-                    "margin_percent": margin_percent,
-                }
-            )
-        return product_rows
+
+class ReorderListAPIView(generics.ListAPIView):
+    """
+    `forecast_demand` buyrug'i hisoblagan buyurtma ro'yxati, eng tez tugaydiganlari
+    birinchi. `?all=true` - talabi bor barcha mahsulotlar.
+    """
+
+    serializer_class = DemandForecastSerializer
+    permission_classes = [permissions.IsAdminUser]
+    search_fields = ["product__name"]
+    ordering_fields = ["days_of_cover", "daily_demand", "reorder_quantity", "stock"]
+    ordering = ["days_of_cover"]
+
+    def get_queryset(self):
+        queryset = DemandForecast.objects.select_related("product")
+        if self.request.query_params.get("all", "").lower() not in ("1", "true"):
+            queryset = queryset.filter(needs_reorder=True)
+        return queryset
+
+
+class SalesTimeSeriesAPIView(APIView):
+    """
+    Savdo vaqt qatori: `?granularity=hour|day|week|month&start=YYYY-MM-DD&end=YYYY-MM-DD`.
+    Javob ustunli: `dates[]`, `revenue[]`, `cost[]`, `quantity[]`, `orders[]`.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        query = SalesTimeSeriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(cached_sales_series(**query.validated_data))
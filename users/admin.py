@@ -23,7 +23,7 @@ class CourierAdmin(admin.ModelAdmin):
             'fields': ('user', 'phone', 'first_name', 'last_name', 'avatar', 'avatar_preview')
         }),
         ('Mashina ma\'lumotlari', {
-            'fields': ('car_number', 'car_name', 'car_capacity')
+            'fields': ('car_number', 'car_name', 'car_capacity', 'car_max_weight')
         }),
         ('Holat', {
             'fields': ('is_active',)
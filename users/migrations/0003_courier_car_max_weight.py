@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_courier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courier',
+            name='car_max_weight',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text="Bo'sh qoldirilsa og'irlik cheklanmaydi", max_digits=10, null=True, verbose_name="Mashina yuk ko'tarishi (kg)"),
+        ),
+    ]
@@ -31,6 +31,14 @@ class Courier(models.Model):
         verbose_name="Mashina sig'imi (kub metr)",
         help_text="Mashina necha kub metr yuk tashiydi (masalan: 10.00)"
     )
+    car_max_weight = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        null=True,
+        blank=True,
+        verbose_name="Mashina yuk ko'tarishi (kg)",
+        help_text="Bo'sh qoldirilsa og'irlik cheklanmaydi"
+    )
     is_active = models.BooleanField(default=True, verbose_name="Faol")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Yaratilgan vaqt")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Yangilangan vaqt")
@@ -70,7 +70,7 @@ class CourierSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'user', 'phone', 'first_name', 'last_name', 
             'full_name', 'avatar', 'car_number', 'car_name', 
-            'car_capacity', 'is_active', 'created_at', 'updated_at'
+            'car_capacity', 'car_max_weight', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
 
@@ -84,7 +84,7 @@ class CourierCreateSerializer(serializers.ModelSerializer):
         model = Courier
         fields = [
             'username', 'password', 'phone', 'first_name', 'last_name',
-            'avatar', 'car_number', 'car_name', 'car_capacity'
+            'avatar', 'car_number', 'car_name', 'car_capacity', 'car_max_weight'
         ]
 
     def validate_phone(self, value):
@@ -121,7 +121,7 @@ class CourierUpdateSerializer(serializers.ModelSerializer):
         model = Courier
         fields = [
             'phone', 'first_name', 'last_name', 'avatar',
-            'car_number', 'car_name', 'car_capacity', 'is_active'
+            'car_number', 'car_name', 'car_capacity', 'car_max_weight', 'is_active'
         ]
 
     def validate_phone(self, value):
@@ -3,6 +3,10 @@ from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from orders.models import Order
+from orders.routing import haversine_matrix, plan_route
+from users.models import Courier
+
 User = get_user_model()
 
 
@@ -46,14 +50,14 @@ class UserApiTests(APITestCase):
         self.client.force_authenticate(user=self.user)
         response = self.client.get(reverse("user-list"))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]["id"], self.user.id)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["id"], self.user.id)
 
     def test_staff_user_list_returns_all(self):
         self.client.force_authenticate(user=self.staff)
         response = self.client.get(reverse("user-list"))
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertGreaterEqual(len(response.data), 3)
+        self.assertGreaterEqual(len(response.data["results"]), 3)
 
     def test_user_cannot_retrieve_other_user(self):
         self.client.force_authenticate(user=self.user)
@@ -70,3 +74,78 @@ class UserApiTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.user.refresh_from_db()
         self.assertEqual(self.user.first_name, "Updated")
+
+
+class CourierRouteTests(APITestCase):
+    def setUp(self):
+        self.courier_user = User.objects.create_user(username="kurer", password="testpass123")
+        self.courier = Courier.objects.create(
+            user=self.courier_user,
+            phone="+998901112233",
+            first_name="Ali",
+            last_name="Valiyev",
+            car_number="01A123AA",
+            car_name="Damas",
+            car_capacity="5.00",
+        )
+        self.buyer = User.objects.create_user(username="buyer", password="testpass123")
+
+    def create_order(self, latitude, longitude, status=Order.Status.PAID):
+        return Order.objects.create(
+            user=self.buyer,
+            courier=self.courier,
+            status=status,
+            delivery_type=Order.DeliveryType.COURIER,
+            delivery_latitude=latitude,
+            delivery_longitude=longitude,
+        )
+
+    def test_haversine_matrix_matches_known_distance(self):
+        # Toshkent - Samarqand ~ 270 km
+        matrix = haversine_matrix([41.2995, 39.6542], [69.2401, 66.9597])
+        self.assertAlmostEqual(matrix[0, 1], 270, delta=5)
+        self.assertEqual(matrix[0, 0], 0)
+
+    def test_plan_route_visits_points_along_a_line(self):
+        points = [(41.0, 69.0 + offset / 100) for offset in (5, 1, 9, 3, 7, 2)]
+        order, legs = plan_route(points, start=(41.0, 69.0))
+        self.assertEqual([points[index][1] for index in order], sorted(point[1] for point in points))
+        self.assertEqual(len(legs), len(points))
+
+    def test_courier_sees_own_route(self):
+        far = self.create_order("41.3500", "69.3500")
+        near = self.create_order("41.3000", "69.2500")
+        middle = self.create_order("41.3200", "69.3000")
+        self.create_order("41.3100", "69.2600", status=Order.Status.CANCELED)
+
+        self.client.force_authenticate(user=self.courier_user)
+        response = self.client.get(
+            reverse("courier-route", args=[self.courier.id]),
+            {"start_lat": "41.2995", "start_lon": "69.2401"},
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([stop["order"] for stop in response.data["stops"]], [near.id, middle.id, far.id])
+        self.assertAlmostEqual(
+            response.data["distance_km"], sum(stop["leg_km"] for stop in response.data["stops"]), places=2
+        )
+
+    def test_route_rejects_partial_start(self):
+        self.client.force_authenticate(user=self.courier_user)
+        response = self.client.get(reverse("courier-route", args=[self.courier.id]), {"start_lat": "41.3"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_route_rejects_non_finite_or_out_of_range_start(self):
+        self.create_order("41.3000", "69.2500")
+        self.client.force_authenticate(user=self.courier_user)
+        for latitude, longitude in (("nan", "69.2"), ("41.3", "inf"), ("91", "69.2"), ("41.3", "-181")):
+            response = self.client.get(
+                reverse("courier-route", args=[self.courier.id]),
+                {"start_lat": latitude, "start_lon": longitude},
+            )
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, (latitude, longitude))
+
+    def test_other_users_cannot_see_route(self):
+        self.client.force_authenticate(user=self.buyer)
+        response = self.client.get(reverse("courier-route", args=[self.courier.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,8 +1,11 @@
 from rest_framework import generics, permissions, viewsets, status
 from rest_framework.response import Response
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.views import TokenObtainPairView
 from rest_framework.decorators import action
 
+from orders.guest_cart import forget_guest_cart, merge_guest_cart
 from .models import User, Courier
 from .serializers import (
     RegisterSerializer, 
@@ -28,7 +31,26 @@ class RegisterView(generics.CreateAPIView):
             "refresh": str(refresh),
             "access": str(refresh.access_token),
         }
-        return Response(data, status=201)
+        response = Response(data, status=201)
+        if merge_guest_cart(request, user):
+            forget_guest_cart(response)
+        return response
+
+
+class LoginView(TokenObtainPairView):
+    """JWT olish; cookie dagi mehmon savati shu foydalanuvchi savatiga qo'shiladi."""
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+
+        response = Response(serializer.validated_data, status=status.HTTP_200_OK)
+        if merge_guest_cart(request, serializer.user):
+            forget_guest_cart(response)
+        return response
 
 
 class MeView(generics.RetrieveAPIView):
@@ -130,6 +152,29 @@ class CourierViewSet(viewsets.ModelViewSet):
         from orders.models import Order
         from orders.serializers import OrderSerializer
         
-        orders = Order.objects.filter(courier=courier).prefetch_related('items__product')
+        orders = Order.objects.filter(courier=courier).select_related('courier__user').prefetch_related('items__product')
+        page = self.paginate_queryset(orders)
+        if page is not None:
+            serializer = OrderSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
         serializer = OrderSerializer(orders, many=True)
         return Response(serializer.data)
+
+    @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def route(self, request, pk=None):
+        """Kurerning ochiq buyurtmalari uchun yetkazish tartibi (nearest neighbour + 2-opt)"""
+        courier = self.get_object()
+        from orders.routing import courier_route, parse_location
+
+        start = None
+        latitude = request.query_params.get('start_lat')
+        longitude = request.query_params.get('start_lon')
+        if latitude is not None or longitude is not None:
+            try:
+                start = parse_location(latitude, longitude)
+            except (TypeError, ValueError):
+                return Response(
+                    {'detail': "start_lat (-90..90) va start_lon (-180..180) birga, chekli son ko'rinishida yuborilishi kerak."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+        return Response(courier_route(courier, start=start))